@@ -0,0 +1,96 @@
+import threading
+import time
+from typing import NamedTuple, Union
+import MetaTrader5 as mt5
+
+from utils.utils import Utils
+
+
+class AccountSnapshot(NamedTuple):
+    login: int
+    currency: str
+    leverage: int
+    balance: float
+    equity: float
+    margin: float
+    margin_free: float
+    margin_mode: int
+    trade_mode: int
+
+
+class AccountStateService:
+    """
+    Serves a snapshot of the trading account, so a single order path does not
+    query the terminal again and again. The snapshot is refreshed when it is
+    older than max_staleness seconds or after being invalidated (i.e. on fills).
+    It is shared by the trading director and the order dispatch workers, so
+    the snapshot is read and refreshed under a lock
+    """
+
+    def __init__(self, max_staleness: float = 1.0) -> None:
+        self.max_staleness = max_staleness
+
+        self._snapshot: Union[AccountSnapshot, None] = None
+        self._snapshot_time: float = 0.0
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.broker_calls: int = 0
+        self.saved_broker_calls: int = 0
+
+    def invalidate(self) -> None:
+        """
+        Discards the current snapshot so the next read goes to the broker
+        """
+        with self._lock:
+            self._snapshot = None
+
+    def get_snapshot(self) -> Union[AccountSnapshot, None]:
+        """
+        Returns the account snapshot, refreshing it from the broker if needed
+
+        Returns:
+            AccountSnapshot | None: None if the account info could not be retrieved
+        """
+        with self._lock:
+            if (
+                self._snapshot is not None
+                and time.monotonic() - self._snapshot_time <= self.max_staleness
+            ):
+                self.saved_broker_calls += 1
+                return self._snapshot
+
+            self.broker_calls += 1
+            account_info = mt5.account_info()  # type: ignore
+            if account_info is None:
+                print(
+                    f"[{Utils.dateprint()}] - ACCOUNT: Unable to retrieve the account info - MT5 error: {mt5.last_error()}"  # type: ignore
+                )
+                return self._snapshot
+
+            self._snapshot = AccountSnapshot(
+                login=account_info.login,  # type: ignore
+                currency=account_info.currency,  # type: ignore
+                leverage=account_info.leverage,  # type: ignore
+                balance=account_info.balance,  # type: ignore
+                equity=account_info.equity,  # type: ignore
+                margin=account_info.margin,  # type: ignore
+                margin_free=account_info.margin_free,  # type: ignore
+                margin_mode=account_info.margin_mode,  # type: ignore
+                trade_mode=account_info.trade_mode,  # type: ignore
+            )
+            self._snapshot_time = time.monotonic()
+            return self._snapshot
+
+    @property
+    def equity(self) -> float:
+        snapshot = self.get_snapshot()
+        return snapshot.equity if snapshot is not None else 0.0
+
+    @property
+    def currency(self) -> str:
+        snapshot = self.get_snapshot()
+        return snapshot.currency if snapshot is not None else ""
+
+    def report(self) -> str:
+        return f"ACCOUNT: {self.broker_calls} account info calls to the broker, {self.saved_broker_calls} saved by the snapshot"
@@ -0,0 +1,445 @@
+import sys
+import time
+from collections import namedtuple
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+
+SymbolInfo = namedtuple(
+    "SymbolInfo",
+    "name visible currency_base currency_profit currency_margin trade_contract_size "
+    "trade_tick_size trade_tick_value volume_min volume_max volume_step digits point "
+    "filling_mode trade_exemode trade_stops_level trade_freeze_level",
+)
+AccountInfo = namedtuple(
+    "AccountInfo",
+    "login trade_mode leverage balance equity margin margin_free margin_mode "
+    "currency name server company",
+)
+TerminalInfo = namedtuple("TerminalInfo", "connected trade_allowed")
+Tick = namedtuple("Tick", "time bid ask last volume time_msc flags volume_real")
+TradePosition = namedtuple(
+    "TradePosition",
+    "ticket time time_msc type magic identifier volume price_open sl tp "
+    "price_current profit symbol comment",
+)
+TradeOrder = namedtuple(
+    "TradeOrder",
+    "ticket time_setup type state magic volume_initial volume_current price_open "
+    "sl tp symbol comment",
+)
+TradeDeal = namedtuple(
+    "TradeDeal",
+    "ticket order time time_msc type entry magic position_id volume price "
+    "commission swap profit fee symbol comment",
+)
+TradeRequest = namedtuple(
+    "TradeRequest",
+    "action magic order symbol volume price sl tp deviation type type_filling "
+    "type_time comment position",
+)
+OrderSendResult = namedtuple(
+    "OrderSendResult",
+    "retcode deal order volume price bid ask comment request_id retcode_external request",
+)
+OrderCheckResult = namedtuple(
+    "OrderCheckResult",
+    "retcode balance equity profit margin margin_free margin_level comment request",
+)
+
+RATES_DTYPE = np.dtype(
+    [
+        ("time", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("tick_volume", "<u8"),
+        ("spread", "<i4"),
+        ("real_volume", "<u8"),
+    ]
+)
+
+# Bars of the price cycle of every market: quiet markets cross their moving
+# averages rarely and at different times; bursty markets cross them all at once
+MARKET_CYCLES = {"quiet": 400, "bursty": 24}
+
+# Deals kept by default by the fake broker: enough for the framework to find
+# the deal of every fill, without growing through long simulations
+MAX_DEAL_HISTORY = 10_000
+
+
+class FakeMetaTrader5:
+    """
+    In-process stand-in for the MetaTrader5 package: a simulated broker with
+    a deterministic bar clock (advanced with advance_bar), a hedging account,
+    instant fills and a configurable latency (seconds) added to every call.
+    Only the API used by the framework is implemented
+    """
+
+    # Constants with the values of the MetaTrader5 package
+    TIMEFRAME_M1, TIMEFRAME_M2, TIMEFRAME_M3, TIMEFRAME_M4, TIMEFRAME_M5 = 1, 2, 3, 4, 5
+    TIMEFRAME_M6, TIMEFRAME_M10, TIMEFRAME_M12, TIMEFRAME_M15 = 6, 10, 12, 15
+    TIMEFRAME_M20, TIMEFRAME_M30 = 20, 30
+    TIMEFRAME_H1, TIMEFRAME_H2, TIMEFRAME_H3, TIMEFRAME_H4 = 16385, 16386, 16387, 16388
+    TIMEFRAME_H6, TIMEFRAME_H8, TIMEFRAME_H12 = 16390, 16392, 16396
+    TIMEFRAME_D1, TIMEFRAME_W1, TIMEFRAME_MN1 = 16408, 32769, 49153
+    ORDER_TYPE_BUY, ORDER_TYPE_SELL = 0, 1
+    ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_SELL_LIMIT = 2, 3
+    ORDER_TYPE_BUY_STOP, ORDER_TYPE_SELL_STOP = 4, 5
+    POSITION_TYPE_BUY, POSITION_TYPE_SELL = 0, 1
+    DEAL_TYPE_BUY, DEAL_TYPE_SELL = 0, 1
+    DEAL_ENTRY_IN, DEAL_ENTRY_OUT, DEAL_ENTRY_INOUT, DEAL_ENTRY_OUT_BY = 0, 1, 2, 3
+    TRADE_ACTION_DEAL, TRADE_ACTION_PENDING, TRADE_ACTION_SLTP = 1, 5, 6
+    TRADE_ACTION_MODIFY, TRADE_ACTION_REMOVE, TRADE_ACTION_CLOSE_BY = 7, 8, 10
+    ORDER_FILLING_FOK, ORDER_FILLING_IOC, ORDER_FILLING_RETURN = 0, 1, 2
+    ORDER_TIME_GTC = 0
+    SYMBOL_FILLING_FOK, SYMBOL_FILLING_IOC = 1, 2
+    ORDER_STATE_STARTED, ORDER_STATE_PLACED, ORDER_STATE_CANCELED = 0, 1, 2
+    ORDER_STATE_PARTIAL, ORDER_STATE_FILLED, ORDER_STATE_REJECTED = 3, 4, 5
+    ORDER_STATE_EXPIRED = 6
+    TRADE_RETCODE_REQUOTE, TRADE_RETCODE_DONE, TRADE_RETCODE_DONE_PARTIAL = (
+        10004,
+        10009,
+        10010,
+    )
+    TRADE_RETCODE_INVALID, TRADE_RETCODE_PRICE_CHANGED = 10013, 10020
+    TRADE_RETCODE_PRICE_OFF, TRADE_RETCODE_FROZEN = 10021, 10029
+    TRADE_RETCODE_INVALID_FILL = 10030
+    ACCOUNT_TRADE_MODE_DEMO, ACCOUNT_TRADE_MODE_CONTEST, ACCOUNT_TRADE_MODE_REAL = (
+        0,
+        1,
+        2,
+    )
+    ACCOUNT_MARGIN_MODE_RETAIL_NETTING, ACCOUNT_MARGIN_MODE_EXCHANGE = 0, 1
+    ACCOUNT_MARGIN_MODE_RETAIL_HEDGING = 2
+    RES_S_OK = 1
+    RES_E_INTERNAL_FAIL_SEND, RES_E_INTERNAL_FAIL_RECEIVE = -10001, -10002
+    RES_E_INTERNAL_FAIL_INIT, RES_E_INTERNAL_FAIL_CONNECT = -10003, -10004
+    RES_E_INTERNAL_FAIL_TIMEOUT = -10005
+
+    def __init__(
+        self,
+        symbols: List[str],
+        latency: float = 0.0,
+        market: str = "quiet",
+        balance: float = 1e9,
+        bar_seconds: int = 60,
+        seed: int = 0,
+        max_deals: int = MAX_DEAL_HISTORY,
+    ) -> None:
+        self.reset(symbols, latency, market, balance, bar_seconds, seed, max_deals)
+
+    def reset(
+        self,
+        symbols: List[str],
+        latency: float = 0.0,
+        market: str = "quiet",
+        balance: float = 1e9,
+        bar_seconds: int = 60,
+        seed: int = 0,
+        max_deals: int = MAX_DEAL_HISTORY,
+    ) -> None:
+        """
+        Starts a new simulation. The framework modules keep a reference to the
+        installed instance, so it is reset instead of replaced between runs
+        """
+        if market not in MARKET_CYCLES:
+            raise ValueError(f"ERROR: Unknown market {market}: {list(MARKET_CYCLES)}")
+
+        self.symbols = list(symbols)
+        self.latency = latency
+        self.balance = balance
+        self.bar_seconds = bar_seconds
+        self.max_deals = max_deals
+        self.calls: int = 0
+
+        # Price path of every symbol: a cycle around its base price
+        random = np.random.default_rng(seed)
+        self._symbol_index = {symbol: row for row, symbol in enumerate(self.symbols)}
+        self._base_prices = random.uniform(0.5, 2.0, len(self.symbols))
+        self._cycle = MARKET_CYCLES[market]
+        self._phases = (
+            random.uniform(0, 2 * np.pi, len(self.symbols))
+            if market == "quiet"
+            else np.zeros(len(self.symbols))
+        )
+
+        # The clock starts at a round time, one bar forming
+        self._start_time = 1_700_000_000 // bar_seconds * bar_seconds
+        self.bar_index = 0
+
+        self._next_ticket = 1
+        self._positions: Dict[int, Any] = {}
+        self._orders: Dict[int, Any] = {}
+        self._deals: Dict[int, Any] = {}
+
+    def install(self) -> "FakeMetaTrader5":
+        """
+        Registers the fake broker as the MetaTrader5 module. It must be
+        installed before importing the modules of the framework
+        """
+        sys.modules["MetaTrader5"] = self  # type: ignore
+        return self
+
+    def _call(self) -> None:
+        self.calls += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _ticket(self) -> int:
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        return ticket
+
+    # Simulated market
+
+    def advance_bar(self, bars: int = 1) -> None:
+        """
+        Closes the forming bar (and bars - 1 more) of every symbol
+        """
+        self.bar_index += bars
+
+    @property
+    def now(self) -> int:
+        return self._start_time + self.bar_index * self.bar_seconds
+
+    def _closes(self, row: int, bar_indices: np.ndarray) -> np.ndarray:
+        angle = 2 * np.pi * bar_indices / self._cycle + self._phases[row]
+        return self._base_prices[row] * (1 + 0.01 * np.sin(angle))
+
+    def _price(self, symbol: str) -> float:
+        return float(
+            self._closes(self._symbol_index[symbol], np.array([self.bar_index]))[0]
+        )
+
+    def open_positions(self, count: int, magic: int, volume: float = 0.01) -> None:
+        """
+        Opens count positions spread over the symbols (i.e. to simulate a
+        strategy with many open positions)
+        """
+        for n in range(count):
+            symbol = self.symbols[n % len(self.symbols)]
+            self._open_position(symbol, n % 2, volume, magic, self._price(symbol))
+
+    def _open_position(
+        self, symbol: str, position_type: int, volume: float, magic: int, price: float
+    ) -> int:
+        ticket = self._ticket()
+        self._positions[ticket] = TradePosition(
+            ticket, self.now, self.now * 1000, position_type, magic, ticket,
+            volume, price, 0.0, 0.0, price, 0.0, symbol, "",
+        )  # fmt: skip
+        return ticket
+
+    # Terminal and account
+
+    def initialize(self, *args: Any, **kwargs: Any) -> bool:
+        self._call()
+        return True
+
+    def shutdown(self) -> bool:
+        return True
+
+    def last_error(self) -> Tuple[int, str]:
+        return (self.RES_S_OK, "Success")
+
+    def terminal_info(self) -> Any:
+        self._call()
+        return TerminalInfo(connected=True, trade_allowed=True)
+
+    def account_info(self) -> Any:
+        self._call()
+        return AccountInfo(
+            login=1, trade_mode=self.ACCOUNT_TRADE_MODE_DEMO, leverage=100,
+            balance=self.balance, equity=self.balance, margin=0.0,
+            margin_free=self.balance, margin_mode=self.ACCOUNT_MARGIN_MODE_RETAIL_HEDGING,
+            currency="USD", name="Benchmark", server="Fake", company="Fake",
+        )  # fmt: skip
+
+    # Symbols and market data
+
+    def _symbol_info(self, symbol: str) -> Any:
+        return SymbolInfo(
+            name=symbol, visible=True, currency_base=symbol,
+            currency_profit="USD", currency_margin=symbol,
+            trade_contract_size=100000.0, trade_tick_size=0.00001,
+            trade_tick_value=1.0, volume_min=0.01, volume_max=100.0,
+            volume_step=0.01, digits=5, point=0.00001,
+            filling_mode=self.SYMBOL_FILLING_FOK | self.SYMBOL_FILLING_IOC,
+            trade_exemode=2, trade_stops_level=0, trade_freeze_level=0,
+        )  # fmt: skip
+
+    def symbols_get(self, group: Union[str, None] = None) -> Any:
+        self._call()
+        return tuple(self._symbol_info(symbol) for symbol in self.symbols)
+
+    def symbol_info(self, symbol: str) -> Any:
+        self._call()
+        return self._symbol_info(symbol) if symbol in self._symbol_index else None
+
+    def symbol_select(self, symbol: str, enable: bool = True) -> bool:
+        self._call()
+        return symbol in self._symbol_index
+
+    def symbol_info_tick(self, symbol: str) -> Any:
+        self._call()
+        if symbol not in self._symbol_index:
+            return None
+        price = self._price(symbol)
+        return Tick(self.now, price, price + 0.0001, 0.0, 0, self.now * 1000, 0, 0.0)
+
+    def copy_rates_from_pos(
+        self, symbol: str, timeframe: int, start_pos: int, count: int
+    ) -> Any:
+        self._call()
+        row = self._symbol_index.get(symbol)
+        if row is None:
+            return None
+
+        bar_indices = np.arange(self.bar_index - start_pos - count + 1, self.bar_index - start_pos + 1)  # fmt: skip
+        closes = self._closes(row, bar_indices)
+        rates = np.zeros(count, dtype=RATES_DTYPE)
+        rates["time"] = self._start_time + bar_indices * self.bar_seconds
+        rates["open"] = self._closes(row, bar_indices - 1)
+        rates["high"] = np.maximum(rates["open"], closes)
+        rates["low"] = np.minimum(rates["open"], closes)
+        rates["close"] = closes
+        rates["tick_volume"] = 100
+        rates["spread"] = 10
+        return rates
+
+    # Trading
+
+    def positions_get(
+        self,
+        symbol: Union[str, None] = None,
+        group: Union[str, None] = None,
+        ticket: Union[int, None] = None,
+    ) -> Any:
+        self._call()
+        return tuple(
+            position
+            for position in self._positions.values()
+            if (symbol is None or position.symbol == symbol)
+            and (ticket is None or position.ticket == ticket)
+        )
+
+    def positions_total(self) -> int:
+        self._call()
+        return len(self._positions)
+
+    def orders_get(self, *args: Any, **kwargs: Any) -> Any:
+        self._call()
+        return tuple(self._orders.values())
+
+    def history_orders_get(self, *args: Any, **kwargs: Any) -> Any:
+        self._call()
+        return ()
+
+    def history_deals_get(self, *args: Any, ticket: Union[int, None] = None, **kwargs: Any) -> Any:  # fmt: skip
+        self._call()
+        if ticket is not None:
+            deal = self._deals.get(ticket)
+            return (deal,) if deal is not None else ()
+        return tuple(self._deals.values())
+
+    def order_check(self, request: Dict[str, Any]) -> Any:
+        self._call()
+        return OrderCheckResult(
+            0, self.balance, self.balance, 0.0, 0.0, self.balance, 0.0, "Done",
+            self._to_trade_request(request),
+        )  # fmt: skip
+
+    def _to_trade_request(self, request: Dict[str, Any]) -> Any:
+        return TradeRequest(
+            action=request.get("action", 0), magic=request.get("magic", 0),
+            order=request.get("order", 0), symbol=request.get("symbol", ""),
+            volume=request.get("volume", 0.0), price=request.get("price", 0.0),
+            sl=request.get("sl", 0.0), tp=request.get("tp", 0.0),
+            deviation=request.get("deviation", 0), type=request.get("type", 0),
+            type_filling=request.get("type_filling", 0),
+            type_time=request.get("type_time", 0),
+            comment=request.get("comment", ""), position=request.get("position", 0),
+        )  # fmt: skip
+
+    def order_send(self, request: Dict[str, Any]) -> Any:
+        self._call()
+        trade_request = self._to_trade_request(request)
+        action = request["action"]
+        symbol = request.get("symbol", "")
+
+        if action == self.TRADE_ACTION_PENDING:
+            ticket = self._ticket()
+            self._orders[ticket] = TradeOrder(
+                ticket, self.now, request["type"], self.ORDER_STATE_PLACED,
+                request.get("magic", 0), request["volume"], request["volume"],
+                request["price"], request.get("sl", 0.0), request.get("tp", 0.0),
+                symbol, request.get("comment", ""),
+            )  # fmt: skip
+            return self._result(self.TRADE_RETCODE_DONE, 0, ticket, trade_request)
+
+        if action == self.TRADE_ACTION_REMOVE:
+            self._orders.pop(request["order"], None)
+            return self._result(self.TRADE_RETCODE_DONE, 0, request["order"], trade_request)  # fmt: skip
+
+        if action != self.TRADE_ACTION_DEAL or symbol not in self._symbol_index:
+            return self._result(self.TRADE_RETCODE_INVALID, 0, 0, trade_request)
+
+        # Market orders fill instantly at the current price
+        is_buy = request["type"] == self.ORDER_TYPE_BUY
+        price = self._price(symbol) + (0.0001 if is_buy else 0.0)
+        volume = request["volume"]
+        position_ticket = request.get("position", 0)
+        if position_ticket:
+            position = self._positions.get(position_ticket)
+            if position is None:
+                return self._result(self.TRADE_RETCODE_INVALID, 0, 0, trade_request)
+            entry = self.DEAL_ENTRY_OUT
+            if volume >= position.volume - 1e-9:
+                del self._positions[position_ticket]
+            else:
+                self._positions[position_ticket] = position._replace(
+                    volume=round(position.volume - volume, 8)
+                )
+        else:
+            entry = self.DEAL_ENTRY_IN
+            position_ticket = self._open_position(
+                symbol,
+                self.POSITION_TYPE_BUY if is_buy else self.POSITION_TYPE_SELL,
+                volume,
+                request.get("magic", 0),
+                price,
+            )
+
+        deal_ticket = self._ticket()
+        self._deals[deal_ticket] = TradeDeal(
+            deal_ticket, deal_ticket, self.now, self.now * 1000,
+            self.DEAL_TYPE_BUY if is_buy else self.DEAL_TYPE_SELL, entry,
+            request.get("magic", 0), position_ticket, volume, price,
+            0.0, 0.0, 0.0, 0.0, symbol, request.get("comment", ""),
+        )  # fmt: skip
+        if len(self._deals) > self.max_deals:
+            del self._deals[next(iter(self._deals))]
+        return self._result(
+            self.TRADE_RETCODE_DONE,
+            deal_ticket,
+            deal_ticket,
+            trade_request,
+            volume,
+            price,
+        )
+
+    def _result(
+        self,
+        retcode: int,
+        deal: int,
+        order: int,
+        request: Any,
+        volume: float = 0.0,
+        price: float = 0.0,
+    ) -> Any:
+        comment = "Request executed" if retcode == self.TRADE_RETCODE_DONE else "Invalid request"  # fmt: skip
+        return OrderSendResult(
+            retcode, deal, order, volume, price, price, price, comment, 0, 0, request
+        )
@@ -0,0 +1,451 @@
+"""
+End-to-end benchmark of the event pipeline (TradingDirector -> SignalGenerator
+-> PositionSizer -> RiskManager -> OrderExecutor) against an in-process fake
+broker, so it runs offline on any platform.
+
+    python -m benchmarks.pipeline_benchmark [--scenarios s12_quiet,s100_bursty]
+        [--bars 200] [--latency 0.0] [--dispatch-workers 4]
+        [--output benchmark_results.json] [--baseline previous_results.json]
+
+For every scenario it reports the events per second, the latency percentiles
+of every stage (event handler) and of whole bars, and the memory allocated
+per event. The results are written to a JSON file to compare versions
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+from queue import Empty
+from typing import Any, Callable, Dict, List, NamedTuple, Union
+
+import numpy as np
+
+from benchmarks.fake_mt5 import FakeMetaTrader5
+
+# The fake broker must be the MetaTrader5 module seen by the framework, so it
+# is installed before any module of the framework is imported
+FAKE_MT5 = FakeMetaTrader5([]).install()
+
+from account_state.account_state import AccountStateService  # noqa: E402
+from config_manager.config_manager import ConfigManager  # noqa: E402
+from config_manager.trading_config import load_trading_config  # noqa: E402
+from data_provider.data_provider import DataProvider  # noqa: E402
+from events.event_queue import EventQueue  # noqa: E402
+from notifications.notifications import NotificationService  # noqa: E402
+from notifications.properties.properties import FileNotificationProperties  # noqa: E402
+from order_executor.order_executor import OrderExecutor  # noqa: E402
+from platform_connector.connection_supervisor import ConnectionSupervisor  # noqa: E402
+from platform_connector.platform_connector import PlatformConnector  # noqa: E402
+from portfolio.portfolio import Portfolio  # noqa: E402
+from position_sizer.position_sizer import PositionSizer  # noqa: E402
+from risk_manager.risk_manager import RiskManager  # noqa: E402
+from signal_generator.signal_generator import SignalGenerator  # noqa: E402
+from trading_director.trading_director import TradingDirector  # noqa: E402
+
+RESULTS_FORMAT_VERSION = 1
+MAGIC_NUMBER = 12345
+PERCENTILES = (50, 95, 99)
+# Trade requests are sent by as many workers as in trading_app (0 -> synchronously)
+DISPATCH_WORKERS = 4
+
+STRATEGY_CONFIG = """
+symbols = {symbols}
+timeframe = "1min"
+
+[signal.ma_crossover]
+fast_period = 10
+slow_period = 30
+
+[sizing.fixed]
+volume = 0.01
+
+[risk.max_leverage_factor]
+max_leverage_factor = 5
+"""
+
+
+class Scenario(NamedTuple):
+    name: str
+    symbols: int
+    market: str
+    open_positions: int = 0
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario("s12_quiet", 12, "quiet"),
+        Scenario("s12_bursty", 12, "bursty"),
+        Scenario("s100_quiet", 100, "quiet"),
+        Scenario("s100_bursty", 100, "bursty"),
+        Scenario("s1000_quiet", 1000, "quiet"),
+        Scenario("s1000_bursty", 1000, "bursty"),
+        Scenario("s100_positions", 100, "quiet", open_positions=2000),
+    )
+}
+
+
+class Pipeline(NamedTuple):
+    events_queue: EventQueue
+    data_provider: DataProvider
+    portfolio: Portfolio
+    order_executor: OrderExecutor
+    notifications: NotificationService
+    director: TradingDirector
+
+
+def build_pipeline(
+    symbols: List[str], config_path: str, dispatch_workers: int = DISPATCH_WORKERS
+) -> Pipeline:
+    """
+    Builds the modules of the framework as trading_app.main does
+    """
+    with open(config_path, "w") as file:
+        file.write(STRATEGY_CONFIG.format(symbols=json.dumps(symbols)))
+    trading_config = load_trading_config(config_path)
+
+    events_queue = EventQueue()
+    connect = PlatformConnector(symbol_list=symbols)
+    data_provider = DataProvider(
+        events_queue=events_queue,
+        symbol_list=list(symbols),
+        timeframe=trading_config.timeframe,
+        symbol_registry=connect.symbol_registry,
+    )
+    account_state = AccountStateService(max_staleness=1.0)
+    portfolio = Portfolio(
+        magic_number=MAGIC_NUMBER,
+        account_state=account_state,
+        symbol_registry=connect.symbol_registry,
+    )
+    order_executor = OrderExecutor(
+        events_queue=events_queue,
+        portfolio=portfolio,
+        account_state=account_state,
+        symbol_registry=connect.symbol_registry,
+        dispatch_workers=dispatch_workers,
+    )
+    signal_generator = SignalGenerator(
+        events_queue=events_queue,
+        data_provider=data_provider,
+        portfolio=portfolio,
+        order_executor=order_executor,
+        signal_properties=trading_config.signal,
+    )
+    position_sizer = PositionSizer(
+        events_queue=events_queue,
+        data_provider=data_provider,
+        sizing_properties=trading_config.sizing,
+        account_state=account_state,
+    )
+    risk_manager = RiskManager(
+        events_queue=events_queue,
+        data_provider=data_provider,
+        portfolio=portfolio,
+        risk_properties=trading_config.risk,
+        account_state=account_state,
+    )
+    notifications = NotificationService(
+        properties=FileNotificationProperties(path=os.devnull)
+    )
+    director = TradingDirector(
+        events_queue=events_queue,
+        data_provider=data_provider,
+        portfolio=portfolio,
+        signal_generator=signal_generator,
+        position_sizer=position_sizer,
+        risk_manager=risk_manager,
+        order_executor=order_executor,
+        notification_service=notifications,
+        account_state=account_state,
+        connection_supervisor=ConnectionSupervisor(
+            connect, data_provider, portfolio, account_state, order_executor
+        ),
+        config_manager=ConfigManager(
+            config_path,
+            trading_config,
+            connect,
+            data_provider,
+            signal_generator,
+            position_sizer,
+            risk_manager,
+        ),
+    )
+    return Pipeline(
+        events_queue, data_provider, portfolio, order_executor, notifications, director
+    )
+
+
+class PipelineRunner:
+    """
+    Runs the bars of the fake broker through the handlers of the director,
+    as its main loop does (without the idle sleep), timing every stage
+    """
+
+    def __init__(self, pipeline: Pipeline) -> None:
+        self.pipeline = pipeline
+        self.stage_times: Dict[str, List[float]] = defaultdict(list)
+        self.bar_times: List[float] = []
+        self.events: int = 0
+
+        # Every event put in the queue is counted, including the ones the
+        # handlers take from the queue in batches
+        events_queue = pipeline.events_queue
+        put = events_queue.put
+
+        def counted_put(item: Any, *args: Any, **kwargs: Any) -> None:
+            self.events += 1
+            put(item, *args, **kwargs)
+
+        events_queue.put = counted_put  # type: ignore
+
+        self.handlers = {
+            event_type: self._timed(event_type, handler)
+            for event_type, handler in pipeline.director.event_handler.items()
+        }
+
+    def _timed(self, stage: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        stage_times = self.stage_times[stage]
+
+        def timed_call(*args: Any) -> Any:
+            start = time.perf_counter()
+            result = function(*args)
+            stage_times.append(time.perf_counter() - start)
+            return result
+
+        return timed_call
+
+    def run_bar(self) -> None:
+        FAKE_MT5.advance_bar()
+        start = time.perf_counter()
+
+        self._timed("POLL", self.pipeline.data_provider.check_for_new_data)()
+        while True:
+            try:
+                event = self.pipeline.events_queue.get_nowait()
+            except Empty:
+                # Trade requests still in flight put their events when sent
+                dispatch_pool = self.pipeline.order_executor.dispatch_pool
+                if dispatch_pool is None or self.pipeline.events_queue.qsize():
+                    break
+                dispatch_pool.join()
+                if self.pipeline.events_queue.empty():
+                    break
+                continue
+            self.handlers[event.event_type](event)
+
+        self.bar_times.append(time.perf_counter() - start)
+
+    def reset_statistics(self) -> None:
+        # The timed handlers keep a reference to their lists
+        for samples in self.stage_times.values():
+            samples.clear()
+        self.bar_times.clear()
+        self.events = 0
+
+
+def _percentiles_ms(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    values = np.percentile(np.asarray(samples) * 1000, PERCENTILES)
+    statistics = {f"p{p}_ms": round(float(v), 4) for p, v in zip(PERCENTILES, values)}
+    statistics["max_ms"] = round(max(samples) * 1000, 4)
+    return statistics
+
+
+def run_scenario(
+    scenario: Scenario,
+    bars: int,
+    warmup_bars: int = 5,
+    memory_bars: int = 10,
+    latency: float = 0.0,
+    dispatch_workers: int = DISPATCH_WORKERS,
+) -> Dict[str, Any]:
+    symbols = [f"SYM{n:04d}" for n in range(scenario.symbols)]
+    FAKE_MT5.reset(symbols, latency=latency, market=scenario.market)
+    FAKE_MT5.open_positions(scenario.open_positions, MAGIC_NUMBER)
+
+    # The framework logs every event: it is part of the cost but not of the output
+    with tempfile.TemporaryDirectory() as directory, open(
+        os.devnull, "w"
+    ) as output, contextlib.redirect_stdout(output):
+        pipeline = build_pipeline(
+            symbols, os.path.join(directory, "strategy.toml"), dispatch_workers
+        )
+        runner = PipelineRunner(pipeline)
+
+        # The first bars fill the caches and open the initial positions
+        for _ in range(warmup_bars):
+            runner.run_bar()
+        runner.reset_statistics()
+
+        start = time.perf_counter()
+        for _ in range(bars):
+            runner.run_bar()
+        elapsed = time.perf_counter() - start
+        events = runner.events
+        stage_times = {
+            stage: list(samples)
+            for stage, samples in runner.stage_times.items()
+            if samples
+        }
+        bar_times = list(runner.bar_times)
+
+        # Memory pass: traced separately, as tracing slows everything down
+        runner.reset_statistics()
+        blocks_before = sys.getallocatedblocks()
+        tracemalloc.start()
+        peak_bytes: List[int] = []
+        for _ in range(memory_bars):
+            tracemalloc.reset_peak()
+            current_before, _ = tracemalloc.get_traced_memory()
+            runner.run_bar()
+            peak_bytes.append(tracemalloc.get_traced_memory()[1] - current_before)
+        tracemalloc.stop()
+        blocks_after = sys.getallocatedblocks()
+        memory_events = max(runner.events, 1)
+
+        pipeline.order_executor.shutdown()
+        pipeline.notifications.shutdown(timeout=1.0)
+
+    return {
+        "name": scenario.name,
+        "symbols": scenario.symbols,
+        "market": scenario.market,
+        "open_positions": scenario.open_positions,
+        "bars": bars,
+        "events": events,
+        "elapsed_s": round(elapsed, 4),
+        "events_per_second": round(events / elapsed, 1) if elapsed > 0 else 0.0,
+        "bar_latency": _percentiles_ms(bar_times),
+        "stages": {
+            stage: {"calls": len(samples), **_percentiles_ms(samples)}
+            for stage, samples in sorted(stage_times.items())
+        },
+        "peak_bytes_per_event": round(sum(peak_bytes) / memory_events, 1),
+        "retained_blocks_per_event": round(
+            (blocks_after - blocks_before) / memory_events, 2
+        ),
+        "broker_calls": FAKE_MT5.calls,
+    }
+
+
+def _git_revision() -> Union[str, None]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> str:
+    baseline_scenarios = {
+        scenario["name"]: scenario for scenario in baseline.get("scenarios", [])
+    }
+    lines = [f"COMPARISON against {baseline.get('revision')} ({baseline.get('date')})"]
+    # Older results did not record the workers: they ran synchronously
+    if baseline.get("dispatch_workers", 0) != results.get("dispatch_workers", 0):
+        lines.append(
+            f"  WARNING: The baseline ran with {baseline.get('dispatch_workers', 0)} dispatch workers and these results with {results.get('dispatch_workers', 0)}"
+        )
+    for scenario in results["scenarios"]:
+        previous = baseline_scenarios.get(scenario["name"])
+        if previous is None or not previous["events_per_second"]:
+            continue
+        ratio = scenario["events_per_second"] / previous["events_per_second"]
+        lines.append(
+            f"  {scenario['name']}: {previous['events_per_second']:.0f} -> {scenario['events_per_second']:.0f} events/s (x{ratio:.2f}) - bar p95 {previous['bar_latency'].get('p95_ms', 0):.2f} -> {scenario['bar_latency'].get('p95_ms', 0):.2f} ms"
+        )
+    return "\n".join(lines)
+
+
+def report(results: Dict[str, Any]) -> str:
+    lines = [
+        f"PIPELINE BENCHMARK ({results['revision']}, latency {results['latency']}s, {results.get('dispatch_workers', 0)} dispatch workers)"
+    ]
+    for scenario in results["scenarios"]:
+        lines.append(
+            f"  {scenario['name']}: {scenario['events']} events in {scenario['elapsed_s']:.2f}s - {scenario['events_per_second']:.0f} events/s - bar p50 {scenario['bar_latency']['p50_ms']:.2f} / p99 {scenario['bar_latency']['p99_ms']:.2f} ms - {scenario['peak_bytes_per_event']:.0f} peak bytes/event"
+        )
+        for stage, statistics in scenario["stages"].items():
+            lines.append(
+                f"      {stage:<15} {statistics['calls']:>7} calls - p50 {statistics['p50_ms']:.3f} / p95 {statistics['p95_ms']:.3f} / p99 {statistics['p99_ms']:.3f} ms"
+            )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--bars", type=int, default=200)
+    parser.add_argument("--warmup-bars", type=int, default=5)
+    parser.add_argument("--memory-bars", type=int, default=10)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds added to every MT5 call"
+    )
+    parser.add_argument("--dispatch-workers", type=int, default=DISPATCH_WORKERS)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None, help="Previous results to compare")
+    args = parser.parse_args()
+
+    # The connector reads the terminal settings from the environment
+    for key, value in (
+        ("MT5_PATH", "fake"),
+        ("MT5_LOGIN", "1"),
+        ("MT5_PASSWORD", "fake"),
+        ("MT5_SERVER", "fake"),
+        ("MT5_TIMEOUT", "60000"),
+        ("MT5_PORTABLE", "False"),
+    ):
+        os.environ.setdefault(key, value)
+
+    scenario_results: List[Dict[str, Any]] = []
+    for name in args.scenarios.split(","):
+        if name not in SCENARIOS:
+            raise ValueError(f"ERROR: Unknown scenario {name}: {list(SCENARIOS)}")
+        scenario_results.append(
+            run_scenario(
+                SCENARIOS[name],
+                args.bars,
+                args.warmup_bars,
+                args.memory_bars,
+                args.latency,
+                args.dispatch_workers,
+            )
+        )
+
+    results = {
+        "version": RESULTS_FORMAT_VERSION,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency": args.latency,
+        "dispatch_workers": args.dispatch_workers,
+        "scenarios": scenario_results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+
+    print(report(results))
+    if args.baseline:
+        with open(args.baseline) as file:
+            print(compare(results, json.load(file)))
+
+
+if __name__ == "__main__":
+    main()
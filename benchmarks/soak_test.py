@@ -0,0 +1,341 @@
+"""
+Soak test of the event pipeline: simulates days of bars at accelerated speed
+through the whole framework against the in-process fake broker, sampling the
+memory of the process to find slow leaks.
+
+    python -m benchmarks.soak_test [--days 3] [--symbols 12] [--market bursty]
+        [--budget-kib-per-day 1024] [--rss-budget-kib-per-day 4096]
+        [--output soak_results.json]
+
+Every sample interval the RSS of the process and a tracemalloc snapshot are
+taken. After the warmup, the growth rate of the traced memory and of the RSS
+(least squares fit, per simulated day) is checked against the budgets, and
+the allocation sites that keep growing are reported. The process exits with
+status 1 when a budget is exceeded
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+import psutil
+
+from benchmarks import fake_mt5, pipeline_benchmark
+from benchmarks.pipeline_benchmark import (
+    FAKE_MT5,
+    PipelineRunner,
+    _git_revision,
+    _percentiles_ms,
+    build_pipeline,
+)
+
+RESULTS_FORMAT_VERSION = 1
+SECONDS_PER_DAY = 86400
+
+# Memory of the harness itself (and of the fake broker) is not part of the framework
+IGNORED_FILES = (
+    tracemalloc.__file__,
+    fake_mt5.__file__,
+    pipeline_benchmark.__file__,
+    __file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<unknown>",
+)
+
+
+class MemorySample(NamedTuple):
+    bar: int
+    rss_bytes: int
+    traced_bytes: int
+    bar_p50_ms: float
+    bar_p99_ms: float
+
+
+class SiteGrowth(NamedTuple):
+    site: str
+    size_diff: int
+    count_diff: int
+    size: int
+    growing_intervals: int
+
+
+class GrowthTracker:
+    """
+    Compares every tracemalloc snapshot with the previous one and with the
+    baseline (the first snapshot after the warmup), counting for every
+    allocation site the intervals in which it grew
+    """
+
+    def __init__(self, key_type: str) -> None:
+        self.key_type = key_type
+        self.baseline: Any = None
+        self._previous: Dict[str, int] = {}
+        self._growing_intervals: Dict[str, int] = {}
+        self.intervals: int = 0
+
+    @staticmethod
+    def take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, filename) for filename in IGNORED_FILES]
+        )
+
+    def _sizes(self, snapshot: tracemalloc.Snapshot) -> Dict[str, int]:
+        return {
+            str(statistic.traceback): statistic.size
+            for statistic in snapshot.statistics(self.key_type)
+        }
+
+    def add(self, snapshot: tracemalloc.Snapshot) -> None:
+        sizes = self._sizes(snapshot)
+        if self.baseline is None:
+            self.baseline = snapshot
+        else:
+            self.intervals += 1
+            for site, size in sizes.items():
+                if size > self._previous.get(site, 0):
+                    self._growing_intervals[site] = (
+                        self._growing_intervals.get(site, 0) + 1
+                    )
+        self._previous = sizes
+
+    def top_growing(
+        self, snapshot: tracemalloc.Snapshot, limit: int = 10
+    ) -> List[SiteGrowth]:
+        """
+        Sites with more memory than in the baseline, ordered by growth
+        """
+        if self.baseline is None:
+            return []
+
+        growth: List[SiteGrowth] = []
+        for statistic in snapshot.compare_to(self.baseline, self.key_type):
+            if statistic.size_diff <= 0:
+                continue
+            site = str(statistic.traceback)
+            growth.append(
+                SiteGrowth(
+                    site,
+                    statistic.size_diff,
+                    statistic.count_diff,
+                    statistic.size,
+                    self._growing_intervals.get(site, 0),
+                )
+            )
+            if len(growth) == limit:
+                break
+        return growth
+
+
+def _growth_per_day(
+    samples: List[MemorySample], field: str, bars_per_day: float
+) -> float:
+    """
+    Slope of the least squares fit of a memory series, in bytes per simulated day
+    """
+    if len(samples) < 2:
+        return 0.0
+    bars = np.array([sample.bar for sample in samples], dtype=np.float64)
+    values = np.array([getattr(sample, field) for sample in samples], dtype=np.float64)
+    return float(np.polyfit(bars, values, 1)[0] * bars_per_day)
+
+
+def run_soak(
+    days: float,
+    symbols: int = 12,
+    market: str = "bursty",
+    sample_every: int = 60,
+    warmup_bars: int = 240,
+    trace_frames: int = 1,
+    top: int = 10,
+) -> Tuple[Dict[str, Any], List[SiteGrowth]]:
+    bars_per_day = SECONDS_PER_DAY / FAKE_MT5.bar_seconds
+    total_bars = int(days * bars_per_day)
+    symbol_list = [f"SYM{n:04d}" for n in range(symbols)]
+    # The deal history of the fake broker would be mistaken for a leak
+    FAKE_MT5.reset(symbol_list, market=market, max_deals=100)
+
+    process = psutil.Process()
+    tracker = GrowthTracker("traceback" if trace_frames > 1 else "lineno")
+    samples: List[MemorySample] = []
+
+    tracemalloc.start(trace_frames)
+    start = time.perf_counter()
+    # The framework logs every event: it is part of the cost but not of the output
+    with tempfile.TemporaryDirectory() as directory, open(
+        os.devnull, "w"
+    ) as output, contextlib.redirect_stdout(output):
+        pipeline = build_pipeline(symbol_list, os.path.join(directory, "strategy.toml"))
+        runner = PipelineRunner(pipeline)
+        director = pipeline.director
+
+        for bar in range(1, total_bars + 1):
+            runner.run_bar()
+
+            # Idle duties of the main loop between bars
+            director.config_manager.check_for_changes()
+            if director.connection_supervisor.check():
+                pipeline.order_executor.pending_orders.poll()
+
+            if bar < warmup_bars or (bar - warmup_bars) % sample_every:
+                continue
+
+            gc.collect()
+            bar_latency = _percentiles_ms(runner.bar_times)
+            # The statistics of the runner would grow with the simulation
+            runner.reset_statistics()
+            traced_bytes, _ = tracemalloc.get_traced_memory()
+            samples.append(
+                MemorySample(
+                    bar,
+                    # Without the memory used by tracemalloc to store the traces
+                    process.memory_info().rss - tracemalloc.get_tracemalloc_memory(),
+                    traced_bytes,
+                    bar_latency.get("p50_ms", 0.0),
+                    bar_latency.get("p99_ms", 0.0),
+                )
+            )
+            tracker.add(GrowthTracker.take_snapshot())
+
+        final_snapshot = GrowthTracker.take_snapshot()
+        fills = len(pipeline.order_executor.analytics)
+        pipeline.order_executor.shutdown()
+        pipeline.notifications.shutdown(timeout=1.0)
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+
+    growing_sites = tracker.top_growing(final_snapshot, top)
+    results = {
+        "version": RESULTS_FORMAT_VERSION,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "days": days,
+        "bars": total_bars,
+        "symbols": symbols,
+        "market": market,
+        "fills": fills,
+        "elapsed_s": round(elapsed, 2),
+        "simulated_days_per_hour": round(days / elapsed * 3600, 1) if elapsed else 0.0,
+        "traced_growth_kib_per_day": round(
+            _growth_per_day(samples, "traced_bytes", bars_per_day) / 1024, 1
+        ),
+        "rss_growth_kib_per_day": round(
+            _growth_per_day(samples, "rss_bytes", bars_per_day) / 1024, 1
+        ),
+        "samples": [sample._asdict() for sample in samples],
+        "growing_sites": [
+            {**site._asdict(), "intervals": tracker.intervals} for site in growing_sites
+        ],
+    }
+    return results, growing_sites
+
+
+def report(
+    results: Dict[str, Any],
+    growing_sites: List[SiteGrowth],
+    budget_kib_per_day: float,
+    rss_budget_kib_per_day: float,
+) -> Tuple[str, bool]:
+    samples = results["samples"]
+    traced_growth = results["traced_growth_kib_per_day"]
+    rss_growth = results["rss_growth_kib_per_day"]
+    passed = (
+        traced_growth <= budget_kib_per_day and rss_growth <= rss_budget_kib_per_day
+    )
+
+    lines = [
+        f"SOAK TEST: {results['days']} days ({results['bars']} bars) of {results['symbols']} symbols "
+        f"({results['market']} market) - {results['fills']} fills - "
+        f"{results['elapsed_s']:.1f}s ({results['simulated_days_per_hour']} simulated days per hour)"
+    ]
+    if samples:
+        first, last = samples[0], samples[-1]
+        lines += [
+            f"  RSS: {first['rss_bytes'] / 2**20:.1f} -> {last['rss_bytes'] / 2**20:.1f} MiB - "
+            f"growth {rss_growth:.1f} KiB/day (budget {rss_budget_kib_per_day:.0f})",
+            f"  Traced: {first['traced_bytes'] / 2**20:.1f} -> {last['traced_bytes'] / 2**20:.1f} MiB - "
+            f"growth {traced_growth:.1f} KiB/day (budget {budget_kib_per_day:.0f})",
+            f"  Bar latency p50/p99: {first['bar_p50_ms']:.2f}/{first['bar_p99_ms']:.2f} ms -> "
+            f"{last['bar_p50_ms']:.2f}/{last['bar_p99_ms']:.2f} ms",
+        ]
+
+    if growing_sites:
+        intervals = max(results["growing_sites"][0]["intervals"], 1)
+        lines.append("  Top growing allocation sites (growth since the warmup):")
+        for site in growing_sites:
+            lines.append(
+                f"    {site.size_diff / 1024:+.1f} KiB ({site.count_diff:+d} blocks, "
+                f"grew in {site.growing_intervals}/{intervals} intervals) {site.site}"
+            )
+
+    lines.append("  PASSED" if passed else "  FAILED: memory growth over budget")
+    return "\n".join(lines), passed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Soak test of the event pipeline")
+    parser.add_argument("--days", type=float, default=3.0)
+    parser.add_argument("--symbols", type=int, default=12)
+    parser.add_argument(
+        "--market", default="bursty", choices=list(fake_mt5.MARKET_CYCLES)
+    )
+    parser.add_argument(
+        "--sample-every", type=int, default=60, help="Bars between memory samples"
+    )
+    parser.add_argument(
+        "--warmup-bars", type=int, default=240, help="Bars before the baseline sample"
+    )
+    parser.add_argument(
+        "--trace-frames", type=int, default=1, help="Frames stored by tracemalloc"
+    )
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-kib-per-day", type=float, default=1024.0)
+    parser.add_argument("--rss-budget-kib-per-day", type=float, default=4096.0)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    # The connector reads the terminal settings from the environment
+    for key, value in (
+        ("MT5_PATH", "fake"),
+        ("MT5_LOGIN", "1"),
+        ("MT5_PASSWORD", "fake"),
+        ("MT5_SERVER", "fake"),
+        ("MT5_TIMEOUT", "60000"),
+        ("MT5_PORTABLE", "False"),
+    ):
+        os.environ.setdefault(key, value)
+
+    results, growing_sites = run_soak(
+        args.days,
+        args.symbols,
+        args.market,
+        args.sample_every,
+        args.warmup_bars,
+        args.trace_frames,
+        args.top,
+    )
+    text, passed = report(
+        results, growing_sites, args.budget_kib_per_day, args.rss_budget_kib_per_day
+    )
+    results["budget_kib_per_day"] = args.budget_kib_per_day
+    results["rss_budget_kib_per_day"] = args.rss_budget_kib_per_day
+    results["passed"] = passed
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    print(text)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Benchmark of the event transport: the cost and size of the encoding of every
+event type (against pickle), and the latency and throughput of the events
+between two processes over ZeroMQ (tcp:// on localhost and ipc://).
+
+    python -m benchmarks.transport_benchmark [--events 100000]
+        [--latency-samples 10000] [--event data] [--transports tcp,ipc]
+        [--output transport_results.json]
+
+The latency is measured as half the round trip of an event echoed by the
+other process, and the throughput as the events per second published until
+the other process has received and decoded all of them
+"""
+
+import argparse
+import json
+import multiprocessing
+import pickle
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.pipeline_benchmark import _git_revision
+from event_transport.codec import EventCodec
+from event_transport.transports.zmq_transport import ZmqEventTransport
+from events.events import (
+    BaseEvent,
+    DataEvent,
+    DealEntry,
+    ExecutionEvent,
+    OrderEvent,
+    OrderRejectedEvent,
+    OrderType,
+    PendingOrderState,
+    PendingOrderUpdateEvent,
+    PlacePendingOrderEvent,
+    SignalEvent,
+    SignalType,
+    SizingEvent,
+)
+
+RESULTS_FORMAT_VERSION = 1
+PERCENTILES = (50, 95, 99)
+
+# Symbols of the control events of the echo process
+PING = "PING"
+STOP = "STOP"
+
+
+def sample_events() -> Dict[str, BaseEvent]:
+    """
+    One event of every type, with the values of a live session
+    """
+    bar_time = pd.Timestamp("2024-01-02 10:00")
+    order = {
+        "symbol": "EURUSD",
+        "signal": SignalType.BUY,
+        "target_order": OrderType.MARKET,
+        "target_price": Decimal("0"),
+        "magic_number": 12345,
+        "sl": Decimal("1.09350"),
+        "tp": Decimal("1.10350"),
+        "signal_time": bar_time,
+        "reference_price": Decimal("1.09850"),
+        "generated_time": datetime(2024, 1, 2, 10, 0, 0, 4000),
+    }
+    execution = ExecutionEvent(
+        symbol="EURUSD",
+        signal=SignalType.BUY,
+        fill_price=Decimal("1.09852"),
+        fill_time=bar_time + pd.Timedelta(milliseconds=35),
+        volume=Decimal("0.10"),
+        magic_number=12345,
+        position_id=500123,
+        entry=DealEntry.IN,
+        signal_time=bar_time,
+        reference_price=Decimal("1.09850"),
+    )
+    return {
+        "data": DataEvent(
+            symbol="EURUSD",
+            data=pd.Series(
+                [1.09812, 1.09861, 1.09805, 1.0985, 412.0, 0.0, 1.0],
+                index=["open", "high", "low", "close", "tickvol", "vol", "spread"],
+                name=bar_time,
+            ),
+        ),
+        "signal": SignalEvent(**order),
+        "sizing": SizingEvent(**order, volume=Decimal("0.10")),
+        "order": OrderEvent(**order, volume=Decimal("0.10")),
+        "execution": execution,
+        "pending": PlacePendingOrderEvent(
+            **{
+                key: value
+                for key, value in order.items()
+                if key not in ("signal_time", "reference_price", "generated_time")
+            },
+            volume=Decimal("0.10"),
+        ),
+        "pending_update": PendingOrderUpdateEvent(
+            ticket=500124,
+            symbol="EURUSD",
+            signal=SignalType.BUY,
+            target_order=OrderType.LIMIT,
+            target_price=Decimal("1.09500"),
+            magic_number=12345,
+            state=PendingOrderState.FILLED,
+            previous_state=PendingOrderState.PLACED,
+            volume_initial=Decimal("0.10"),
+            volume_filled=Decimal("0.10"),
+        ),
+        "rejected": OrderRejectedEvent(
+            symbol="EURUSD",
+            signal=SignalType.BUY,
+            target_order=OrderType.MARKET,
+            volume=Decimal("0.10"),
+            magic_number=12345,
+            retcode=10019,
+            comment="No money",
+        ),
+    }
+
+
+def _time_per_call_us(function: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def run_codec(events: Dict[str, BaseEvent], repeat: int = 10_000) -> Dict[str, Any]:
+    codec = EventCodec()
+    results: Dict[str, Any] = {}
+    for name, event in events.items():
+        encoded = codec.encode(event)
+        pickled = pickle.dumps(event, protocol=pickle.HIGHEST_PROTOCOL)
+        results[name] = {
+            "bytes": len(encoded),
+            "encode_us": round(
+                _time_per_call_us(lambda: codec.encode(event), repeat), 3
+            ),
+            "decode_us": round(
+                _time_per_call_us(lambda: codec.decode(encoded), repeat), 3
+            ),
+            "pickle_bytes": len(pickled),
+            "pickle_dumps_us": round(
+                _time_per_call_us(
+                    lambda: pickle.dumps(event, protocol=pickle.HIGHEST_PROTOCOL),
+                    repeat,
+                ),
+                3,
+            ),
+            "pickle_loads_us": round(
+                _time_per_call_us(lambda: pickle.loads(pickled), repeat), 3
+            ),
+        }
+    return results
+
+
+def _echo_process(
+    subscribe_endpoint: str, publish_endpoint: str, echo_every: int, pipe: Connection
+) -> None:
+    """
+    Other end of the benchmark: receives (and decodes) the events and sends
+    back the pings and one of every echo_every events
+    """
+    transport = ZmqEventTransport(
+        publish_endpoint=publish_endpoint,
+        subscribe_endpoints=[subscribe_endpoint],
+        high_water_mark=0,
+    )
+    pipe.send(transport.publish_endpoint)
+
+    received = 0
+    while True:
+        event = transport.receive(1.0)
+        if event is None:
+            continue
+        symbol = event.symbol  # type: ignore
+        if symbol == STOP:
+            break
+        if symbol == PING:
+            transport.send(event)
+            continue
+        received += 1
+        if echo_every and received % echo_every == 0:
+            transport.send(event)
+    transport.close()
+
+
+def _handshake(transport: ZmqEventTransport, ping: BaseEvent) -> None:
+    """
+    Pings until the echo process answers: the events published before both
+    subscriptions are in place would be lost
+    """
+    while True:
+        transport.send(ping)
+        event = transport.receive(0.05)
+        if event is not None:
+            break
+    # Late answers to the previous pings
+    while transport.receive(0.2) is not None:
+        pass
+
+
+def _endpoints(scheme: str, directory: str) -> List[str]:
+    if scheme == "tcp":
+        return ["tcp://127.0.0.1:*", "tcp://127.0.0.1:*"]
+    if scheme == "ipc":
+        return [f"ipc://{directory}/to_echo", f"ipc://{directory}/from_echo"]
+    raise ValueError(f"ERROR: Unknown transport {scheme} (tcp or ipc)")
+
+
+def _run_echo(
+    scheme: str, event: BaseEvent, echo_every: int, function: Callable[..., Any]
+) -> Any:
+    """
+    Runs function(transport) against an echo process connected over scheme
+    """
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        to_echo, from_echo = _endpoints(scheme, directory)
+        transport = ZmqEventTransport(
+            publish_endpoint=to_echo, subscribe_endpoints=[], high_water_mark=0
+        )
+        parent_pipe, child_pipe = context.Pipe()
+        process = context.Process(
+            target=_echo_process,
+            args=(transport.publish_endpoint, from_echo, echo_every, child_pipe),
+            daemon=True,
+        )
+        process.start()
+        try:
+            transport.connect(parent_pipe.recv())
+            _handshake(transport, event.model_copy(update={"symbol": PING}))
+            return function(transport)
+        finally:
+            transport.send(event.model_copy(update={"symbol": STOP}))
+            process.join(timeout=10)
+            transport.close()
+
+
+def run_latency(scheme: str, event: BaseEvent, samples: int) -> Dict[str, float]:
+    def measure(transport: ZmqEventTransport) -> List[float]:
+        round_trips: List[float] = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            transport.send(event)
+            while transport.receive(1.0) is None:
+                pass
+            round_trips.append(time.perf_counter() - start)
+        return round_trips
+
+    round_trips = _run_echo(scheme, event, 1, measure)
+    one_way_us = np.asarray(round_trips) / 2 * 1e6
+    values = np.percentile(one_way_us, PERCENTILES)
+    statistics = {f"p{p}_us": round(float(v), 2) for p, v in zip(PERCENTILES, values)}
+    statistics["max_us"] = round(float(one_way_us.max()), 2)
+    return statistics
+
+
+def run_throughput(scheme: str, event: BaseEvent, events: int) -> Dict[str, float]:
+    def measure(transport: ZmqEventTransport) -> float:
+        start = time.perf_counter()
+        for _ in range(events):
+            transport.send(event)
+        # The echo process answers once it has decoded the last event
+        while transport.receive(10.0) is None:
+            pass
+        return time.perf_counter() - start
+
+    elapsed = _run_echo(scheme, event, events, measure)
+    return {
+        "events": events,
+        "elapsed_s": round(elapsed, 4),
+        "events_per_second": round(events / elapsed, 1),
+    }
+
+
+def report(results: Dict[str, Any]) -> str:
+    lines = [f"TRANSPORT BENCHMARK ({results['revision']}, {results['event']} events)"]
+    lines.append("  Encoding (bytes - encode / decode us | pickle)")
+    for name, codec in results["codec"].items():
+        lines.append(
+            f"      {name:<15} {codec['bytes']:>5} B - {codec['encode_us']:.2f} / {codec['decode_us']:.2f} us | {codec['pickle_bytes']:>5} B - {codec['pickle_dumps_us']:.2f} / {codec['pickle_loads_us']:.2f} us"
+        )
+    for scheme, transport in results["transports"].items():
+        latency = transport["latency"]
+        throughput = transport["throughput"]
+        lines.append(
+            f"  {scheme}: {throughput['events_per_second']:.0f} events/s - latency p50 {latency['p50_us']:.1f} / p95 {latency['p95_us']:.1f} / p99 {latency['p99_us']:.1f} us (max {latency['max_us']:.1f})"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    events = sample_events()
+
+    parser = argparse.ArgumentParser(description="Event transport benchmark")
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--latency-samples", type=int, default=10_000)
+    parser.add_argument("--event", choices=list(events), default="data")
+    parser.add_argument(
+        "--transports",
+        # ZeroMQ has no ipc:// on Windows
+        default="tcp" if sys.platform == "win32" else "tcp,ipc",
+    )
+    parser.add_argument("--output", default="transport_results.json")
+    args = parser.parse_args()
+
+    event = events[args.event]
+    transports: Dict[str, Any] = {}
+    for scheme in args.transports.split(","):
+        transports[scheme] = {
+            "latency": run_latency(scheme, event, args.latency_samples),
+            "throughput": run_throughput(scheme, event, args.events),
+        }
+
+    results = {
+        "version": RESULTS_FORMAT_VERSION,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "event": args.event,
+        "codec": run_codec(events),
+        "transports": transports,
+    }
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+
+    print(report(results))
+
+
+if __name__ == "__main__":
+    main()
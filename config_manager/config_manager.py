@@ -0,0 +1,133 @@
+import os
+import time
+from typing import List
+
+from config_manager.trading_config import TradingConfig, load_trading_config
+from data_provider.data_provider import DataProvider
+from platform_connector.platform_connector import PlatformConnector
+from position_sizer.position_sizer import PositionSizer
+from risk_manager.risk_manager import RiskManager
+from signal_generator.signal_generator import SignalGenerator
+from utils.utils import Utils
+
+
+class ConfigManager:
+    """
+    Watches the configuration file and applies its changes at runtime. The
+    director checks it while the events queue is empty, so changes are
+    applied between events. A change is applied only when the whole file is
+    valid, and then applied completely; otherwise the running configuration
+    is kept
+    """
+
+    def __init__(
+        self,
+        path: str,
+        trading_config: TradingConfig,
+        platform_connector: PlatformConnector,
+        data_provider: DataProvider,
+        signal_generator: SignalGenerator,
+        position_sizer: PositionSizer,
+        risk_manager: RiskManager,
+        check_interval: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.config = trading_config
+        self.platform_connector = platform_connector
+        self.data_provider = data_provider
+        self.signal_generator = signal_generator
+        self.position_sizer = position_sizer
+        self.risk_manager = risk_manager
+
+        self.check_interval = check_interval
+        self._next_check_time = 0.0
+        self._last_modified = self._get_modification_time()
+
+        # Statistics
+        self.reloads: int = 0
+        self.rejected_reloads: int = 0
+
+    def _get_modification_time(self) -> int:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def check_for_changes(self) -> bool:
+        """
+        Reloads the configuration file if it was modified since the last check
+        (at most once every check_interval seconds). Returns whether a new
+        configuration was applied
+        """
+        now = time.monotonic()
+        if now < self._next_check_time:
+            return False
+        self._next_check_time = now + self.check_interval
+
+        modified = self._get_modification_time()
+        if modified == self._last_modified:
+            return False
+        self._last_modified = modified
+
+        try:
+            new_config = load_trading_config(self.path)
+            self._validate(new_config)
+        except (OSError, ValueError) as e:
+            self.rejected_reloads += 1
+            print(
+                f"[{Utils.dateprint()}] - CONFIG: Changes in {self.path} not applied, the running configuration is kept: {e}"
+            )
+            return False
+
+        if new_config == self.config:
+            return False
+
+        self._apply(new_config)
+        self.reloads += 1
+        return True
+
+    def _validate(self, new_config: TradingConfig) -> None:
+        """
+        Checks the changes that the configuration file alone cannot validate
+        """
+        if new_config.timeframe != self.config.timeframe:
+            raise ValueError(
+                f"The timeframe cannot change at runtime ({self.config.timeframe} -> {new_config.timeframe}), it requires a restart"
+            )
+
+        unknown_symbols = [
+            symbol
+            for symbol in new_config.symbols
+            if self.platform_connector.symbol_registry.get(symbol) is None
+        ]
+        if unknown_symbols:
+            raise ValueError(f"Unknown symbols: {unknown_symbols}")
+
+    def _apply(self, new_config: TradingConfig) -> None:
+        old_config = self.config
+        added: List[str] = [
+            symbol for symbol in new_config.symbols if symbol not in old_config.symbols
+        ]
+        removed: List[str] = [
+            symbol for symbol in old_config.symbols if symbol not in new_config.symbols
+        ]
+
+        if removed:
+            self.data_provider.remove_symbols(removed)
+            self.platform_connector.remove_symbols(removed)
+        if added:
+            self.platform_connector.add_symbols(added)
+            self.data_provider.add_symbols(added)
+
+        # The indicators are seeded again only when their settings change
+        if new_config.signal != old_config.signal:
+            self.signal_generator.update_properties(new_config.signal)
+        if new_config.sizing != old_config.sizing:
+            self.position_sizer.update_properties(new_config.sizing)
+        if new_config.risk != old_config.risk:
+            self.risk_manager.update_properties(new_config.risk)
+
+        self.config = new_config
+        print(
+            f"[{Utils.dateprint()}] - CONFIG: New configuration applied from {self.path} - Symbols added: {added} - Symbols removed: {removed} - Signal: {new_config.signal} - Sizing: {new_config.sizing} - Risk: {new_config.risk}"
+        )
@@ -0,0 +1,135 @@
+import tomllib
+from typing import Any, Dict, List, Type
+
+from pydantic import BaseModel, field_validator, model_validator
+
+from position_sizer.properties.position_sizer_properties import (
+    BaseSizerProps,
+    FixedSizingProps,
+    MinSizingProps,
+    RiskPctSizingProps,
+)
+from risk_manager.properties.risk_manager_properties import (
+    BaseRiskProps,
+    MaxLeverageFactorRiskProps,
+    VaRRiskProps,
+)
+from signal_generator.properties.signal_generator_properties import (
+    BaseSignalProps,
+    MACrossoverProps,
+)
+
+# Name of the section of every method in the configuration file
+SIGNAL_METHODS: Dict[str, Type[BaseSignalProps]] = {"ma_crossover": MACrossoverProps}
+SIZING_METHODS: Dict[str, Type[BaseSizerProps]] = {
+    "min": MinSizingProps,
+    "fixed": FixedSizingProps,
+    "risk_pct": RiskPctSizingProps,
+}
+RISK_METHODS: Dict[str, Type[BaseRiskProps]] = {
+    "max_leverage_factor": MaxLeverageFactorRiskProps,
+    "var": VaRRiskProps,
+}
+
+
+def _parse_method(
+    section: str,
+    values: Any,
+    methods: Dict[str, Type[BaseModel]],
+    **extra: Any,
+) -> BaseModel:
+    """
+    Builds the properties of the method configured in a section, which must
+    hold a single subsection named after the method, i.e. [sizing.fixed]
+    """
+    if isinstance(values, BaseModel):
+        return values
+    if not isinstance(values, dict) or len(values) != 1:  # type: ignore
+        raise ValueError(
+            f"[{section}] must configure exactly one of the methods: {', '.join(methods)}"
+        )
+
+    ((method, properties),) = values.items()  # type: ignore
+    if method not in methods:
+        raise ValueError(
+            f"Unknown {section} method {method}. Available methods: {', '.join(methods)}"
+        )
+    if not isinstance(properties, dict):
+        raise ValueError(
+            f"The {section} method {method} must be configured in a table, i.e. [{section}.{method}]"
+        )
+    return methods[method](**{**properties, **extra})
+
+
+class TradingConfig(BaseModel):
+    """
+    Strategy and risk settings of the configuration file:
+
+        symbols = ["EURUSD", "USDJPY"]
+        timeframe = "1min"
+
+        [signal.ma_crossover]
+        fast_period = 25
+        slow_period = 50
+
+        [sizing.fixed]
+        volume = 1.0
+
+        [risk.max_leverage_factor]
+        max_leverage_factor = 5
+    """
+
+    symbols: List[str]
+    timeframe: str
+    signal: BaseSignalProps
+    sizing: BaseSizerProps
+    risk: BaseRiskProps
+
+    @model_validator(mode="before")
+    @classmethod
+    def _parse_methods(cls, data: Any) -> Any:
+        if not isinstance(data, dict):
+            return data
+
+        data = dict(data)  # type: ignore
+        data["signal"] = _parse_method(
+            "signal",
+            data.get("signal"),
+            SIGNAL_METHODS,  # type: ignore
+            timeframe=data.get("timeframe"),
+        )
+        data["sizing"] = _parse_method("sizing", data.get("sizing"), SIZING_METHODS)  # type: ignore
+        data["risk"] = _parse_method("risk", data.get("risk"), RISK_METHODS)  # type: ignore
+        return data
+
+    @field_validator("symbols")
+    @classmethod
+    def _check_symbols(cls, symbols: List[str]) -> List[str]:
+        if not symbols:
+            raise ValueError("At least one symbol must be traded")
+        if len(set(symbols)) != len(symbols):
+            raise ValueError(f"Duplicated symbols in {symbols}")
+        return symbols
+
+    @model_validator(mode="after")
+    def _check_signal(self) -> "TradingConfig":
+        if (
+            isinstance(self.signal, MACrossoverProps)
+            and self.signal.fast_period >= self.signal.slow_period
+        ):
+            raise ValueError(
+                f"The fast moving average {self.signal.fast_period} should be lower than the slow moving average {self.signal.slow_period}"
+            )
+        return self
+
+
+def load_trading_config(path: str) -> TradingConfig:
+    """
+    Reads and validates a TOML configuration file
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not valid TOML or its settings are not valid
+    """
+    with open(path, "rb") as file:
+        return TradingConfig.model_validate(tomllib.load(file))
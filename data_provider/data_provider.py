@@ -1,24 +1,61 @@
-from datetime import datetime
+from __future__ import annotations
+
+from datetime import datetime, timedelta
 from queue import Queue
-from typing import Dict, Union, List
-from pandera.typing import Series
+from typing import TYPE_CHECKING, Dict, Tuple, Union, List
+import numpy as np
 import pandas as pd
 import MetaTrader5 as mt5
 
 from events.events import DataEvent
+from symbol_registry.symbol_registry import SymbolRegistry
+from utils.utils import Utils
+
+# pandera is only used for type hints and takes longer to import than pandas
+if TYPE_CHECKING:
+    from pandera.typing import Series
 
 
 class DataProvider:
     def __init__(
-        self, events_queue: Queue[pd.DataFrame], symbol_list: List[str], timeframe: str
+        self,
+        events_queue: Queue[pd.DataFrame],
+        symbol_list: List[str],
+        timeframe: str,
+        symbol_registry: SymbolRegistry,
     ) -> None:
         self.events_queue = events_queue
         self.symbols = symbol_list
         self.timeframe = timeframe
+        self.symbol_registry = symbol_registry
 
         # Create a dict to store the time of the last bar seen of each symbol
         self.last_bar_datetime = {symbol: datetime.min for symbol in symbol_list}
 
+        # Rolling cache of the latest closes of each symbol (and the time of its last bar)
+        # so the lookback windows are not downloaded again on every new bar
+        self._closes_cache: Dict[str, Tuple[datetime, np.ndarray]] = {}
+        self._closes_cache_size: int = 0
+
+    def add_symbols(self, symbols: List[str]) -> None:
+        """
+        Starts polling the bars of symbols (their first bar is the next one closed)
+        """
+        for symbol in symbols:
+            if symbol not in self.last_bar_datetime:
+                self.symbols.append(symbol)
+                self.last_bar_datetime[symbol] = datetime.min
+
+    def remove_symbols(self, symbols: List[str]) -> None:
+        """
+        Stops polling the bars of symbols and drops their cached closes
+        """
+        for symbol in symbols:
+            if symbol in self.last_bar_datetime:
+                self.symbols.remove(symbol)
+                del self.last_bar_datetime[symbol]
+                self._closes_cache.pop(symbol, None)
+
     def _map_timeframes(self, timeframe: str) -> int:
         """
         Define a mapping to match the string timeframe
@@ -162,6 +199,103 @@ class DataProvider:
             # If everything ok, return the datarame with eh num_bars
             return bars
 
+    def get_latest_closes_matrix(
+        self, symbols: List[str], timeframe: str, num_bars: int
+    ) -> np.ndarray:
+        """
+            Get the close prices of the last closed bars of several symbols,
+            aligned in a single matrix
+
+        Args:
+            symbols: List[str] -> symbols, one row each
+            timeframe: str ->
+            num_bars: int -> lookback, one column per bar (oldest first)
+
+        Returns:
+            np.ndarray -> (symbols x num_bars) matrix, NaN where there is no data
+
+        """
+        bars_count = num_bars if num_bars > 0 else 1
+        closes = np.full((len(symbols), bars_count), np.nan)
+
+        for row, symbol in enumerate(symbols):
+            symbol_closes = self._get_cached_closes(symbol, timeframe, bars_count)
+            if symbol_closes.size > 0:
+                closes[row, bars_count - symbol_closes.size :] = symbol_closes  # noqa: E203
+
+        return closes
+
+    def _get_cached_closes(
+        self, symbol: str, timeframe: str, num_bars: int
+    ) -> np.ndarray:
+        """
+        Returns the last num_bars closes of symbol, downloading them only
+        when the cache cannot serve them
+        """
+        # The cache is only fed with the bars of the timeframe being polled
+        self._closes_cache_size = max(self._closes_cache_size, num_bars)
+        cached = self._closes_cache.get(symbol)
+
+        if (
+            timeframe == self.timeframe
+            and cached is not None
+            and cached[0] == self.last_bar_datetime.get(symbol)
+            and cached[1].size >= num_bars
+        ):
+            return cached[1][-num_bars:]
+
+        # Retrieve the closes straight from the numpy array (no DataFrame needed)
+        try:
+            bars_np_array = mt5.copy_rates_from_pos(  # type: ignore
+                symbol, self._map_timeframes(timeframe), 1, num_bars
+            )
+        except Exception as e:
+            print(
+                f"Unable to retrieve the last {num_bars} closes from {symbol} {timeframe} - MT5 Error: {mt5.last_error()}, exception: {e}"  # type: ignore
+            )
+            return np.empty(0)
+
+        if bars_np_array is None or len(bars_np_array) == 0:  # type: ignore
+            print(f"Symbol {symbol} does not exist or its data cannot be retrieved!")
+            return np.empty(0)
+
+        closes = np.asarray(bars_np_array["close"], dtype=np.float64)  # type: ignore
+        if timeframe == self.timeframe:
+            last_bar_time = pd.to_datetime(bars_np_array["time"][-1], unit="s")  # type: ignore
+            self._closes_cache[symbol] = (last_bar_time, closes)  # type: ignore
+
+        return closes
+
+    def _update_closes_cache(self, symbol: str, latest_bar: pd.Series) -> None:  # type: ignore
+        """
+        Appends a newly closed bar to the closes cache of symbol. If the new bar
+        is not contiguous with the cached ones, the cache is dropped so the
+        whole lookback is downloaded again on next use
+        """
+        cached = self._closes_cache.get(symbol)
+        if cached is None:
+            return
+
+        bar_period = self._timeframe_to_timedelta(self.timeframe)
+        if bar_period is None or latest_bar.name - cached[0] != bar_period:  # type: ignore
+            del self._closes_cache[symbol]
+            return
+
+        closes = np.append(cached[1], latest_bar["close"])[-self._closes_cache_size :]  # noqa: E203
+        self._closes_cache[symbol] = (latest_bar.name, closes)  # type: ignore
+
+    @staticmethod
+    def _timeframe_to_timedelta(timeframe: str) -> Union[timedelta, None]:
+        """
+        Duration of one bar of timeframe (None when it is not fixed, i.e. months)
+        """
+        if timeframe == "1M":
+            return None
+        try:
+            return pd.Timedelta(timeframe).to_pytimedelta()
+        except ValueError:
+            return None
+
     def get_latest_tick(self, symbol: str) -> Dict[str, Union[int, float]]:
         """
         Gets the data from the last tick for symbol
@@ -180,28 +314,75 @@ class DataProvider:
             return {}
 
         else:
+            # Keep the conversion rates fresh with every quote seen
+            Utils.get_currency_converter().update_rate(symbol, tick.bid)  # type: ignore
             return tick._asdict()  # type: ignore
 
     def check_for_new_data(self) -> None:
         # 1) Check if there is new data
 
         for symbol in self.symbols:
-            # Acceder últimos datos disponibles
-            latest_bar = self.get_latest_closed_bar(symbol, self.timeframe)  # type: ignore
+            self._check_symbol_for_new_data(symbol)
+
+    def _check_symbol_for_new_data(self, symbol: str) -> None:
+        # Acceder últimos datos disponibles
+        latest_bar = self.get_latest_closed_bar(symbol, self.timeframe)  # type: ignore
+
+        if latest_bar is None:
+            return
+
+        # 2) If new data, create DataEvent
+        if (
+            not latest_bar.empty
+            and latest_bar.name > self.last_bar_datetime[symbol]  # type: ignore
+        ):
+            self._put_data_event(symbol, latest_bar)  # type: ignore
+
+    def _put_data_event(self, symbol: str, bar: pd.Series) -> None:  # type: ignore
+        # Update the closes cache and the last retrieved candle
+        self._update_closes_cache(symbol, bar)
+        self.last_bar_datetime[symbol] = bar.name  # type: ignore
+        Utils.get_currency_converter().update_rate(symbol, bar.close)  # type: ignore
+
+        # Create DataEvent
+        data_event = DataEvent(symbol=symbol, data=bar)
+
+        # 3) Add event to EventQueue
+        self.events_queue.put(data_event)  # type: ignore
+
+    def backfill(self, max_bars: int = 1000) -> int:
+        """
+        Catches up with the bars closed since the last bar seen of each symbol
+        (up to max_bars per symbol), i.e. the bars closed while the terminal
+        was disconnected. The older missed bars only go to the closes cache: a
+        DataEvent is queued just for the latest bar of every symbol, as the
+        strategy would otherwise score every missed bar against the latest
+        closes and repeat the same signal. Returns the number of bars recovered
+        """
+        latest_bars: List[Tuple[datetime, str, pd.Series]] = []  # type: ignore
+        recovered_bars = 0
+        for symbol in self.symbols:
+            last_bar_datetime = self.last_bar_datetime[symbol]
+            if last_bar_datetime == datetime.min:
+                # Nothing seen yet: the next poll takes the latest bar as usual
+                continue
+
+            bars = self.get_latest_closed_bars(symbol, self.timeframe, max_bars)
+            if bars.empty:
+                continue
 
-            if latest_bar is None:
+            missed_bars = bars[bars.index > last_bar_datetime]
+            if missed_bars.empty:
                 continue
 
-            # 2) If new data, create DataEvent
-            if (
-                not latest_bar.empty
-                and latest_bar.name > self.last_bar_datetime[symbol]  # type: ignore
-            ):
-                # Update the last retrieved candle
-                self.last_bar_datetime[symbol] = latest_bar.name  # type: ignore
+            recovered_bars += len(missed_bars)
+            for _, bar in missed_bars.iloc[:-1].iterrows():
+                self._update_closes_cache(symbol, bar)
+            latest_bars.append((missed_bars.index[-1], symbol, missed_bars.iloc[-1]))  # type: ignore
 
-                # Create DataEvent
-                data_event = DataEvent(symbol=symbol, data=latest_bar)
+        # Bars of the same time stay together, so the director handles them in one go
+        latest_bars.sort(key=lambda latest_bar: latest_bar[0])
+        for _, symbol, bar in latest_bars:
+            self._put_data_event(symbol, bar)
 
-                # 3) Add event to EventQueue
-                self.events_queue.put(data_event)  # type: ignore
+        return recovered_bars
@@ -0,0 +1,316 @@
+import struct
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, List, Tuple, Type, Union, get_args, get_origin
+
+import numpy as np
+import pandas as pd
+
+from events.events import (
+    BaseEvent,
+    DataEvent,
+    ExecutionEvent,
+    OrderEvent,
+    OrderRejectedEvent,
+    PendingOrderUpdateEvent,
+    PlacePendingOrderEvent,
+    SignalEvent,
+    SizingEvent,
+)
+
+TRANSPORT_FORMAT_VERSION = 2
+
+# Events that can travel through a transport (their position is their tag)
+EVENT_CLASSES: List[Type[BaseEvent]] = [
+    DataEvent,
+    SignalEvent,
+    SizingEvent,
+    OrderEvent,
+    ExecutionEvent,
+    PlacePendingOrderEvent,
+    PendingOrderUpdateEvent,
+    OrderRejectedEvent,
+]
+
+# Index of the bars of DataProvider, which is not sent with every bar (and is
+# shared by the bars decoded, as building an index costs more than the bar)
+BAR_INDEX = pd.Index(["open", "high", "low", "close", "tickvol", "vol", "spread"])
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+_BYTE = struct.Struct("<B")
+_HEADER = struct.Struct("<BB")
+_LENGTH = struct.Struct("<H")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+
+FieldEncoder = Callable[[bytearray, Any], None]
+FieldDecoder = Callable[[memoryview, int], Tuple[Any, int]]
+
+
+def _encode_str(buffer: bytearray, value: str) -> None:
+    data = value.encode()
+    buffer += _LENGTH.pack(len(data))
+    buffer += data
+
+
+def _decode_str(view: memoryview, offset: int) -> Tuple[str, int]:
+    (length,) = _LENGTH.unpack_from(view, offset)
+    offset += _LENGTH.size
+    return str(view[offset : offset + length], "utf-8"), offset + length  # noqa: E203
+
+
+def _encode_int(buffer: bytearray, value: int) -> None:
+    buffer += _INT.pack(value)
+
+
+def _decode_int(view: memoryview, offset: int) -> Tuple[int, int]:
+    return _INT.unpack_from(view, offset)[0], offset + _INT.size
+
+
+def _encode_float(buffer: bytearray, value: float) -> None:
+    buffer += _FLOAT.pack(value)
+
+
+def _decode_float(view: memoryview, offset: int) -> Tuple[float, int]:
+    return _FLOAT.unpack_from(view, offset)[0], offset + _FLOAT.size
+
+
+def _encode_bool(buffer: bytearray, value: bool) -> None:
+    buffer += _BYTE.pack(value)
+
+
+def _decode_bool(view: memoryview, offset: int) -> Tuple[bool, int]:
+    return bool(view[offset]), offset + 1
+
+
+def _encode_decimal(buffer: bytearray, value: Decimal) -> None:
+    # As text, so the value arrives exactly as it was sent
+    _encode_str(buffer, str(value))
+
+
+def _decode_decimal(view: memoryview, offset: int) -> Tuple[Decimal, int]:
+    text, offset = _decode_str(view, offset)
+    return Decimal(text), offset
+
+
+def _encode_datetime(buffer: bytearray, value: datetime) -> None:
+    # Microseconds since the epoch, flagged when the time had a timezone (UTC)
+    buffer += _BYTE.pack(value.tzinfo is not None)
+    if isinstance(value, pd.Timestamp):
+        # Already an offset from the epoch (in UTC), far cheaper than subtracting
+        buffer += _INT.pack(value.value // 1000)
+        return
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    buffer += _INT.pack((value - EPOCH) // MICROSECOND)
+
+
+def _decode_datetime(view: memoryview, offset: int) -> Tuple[datetime, int]:
+    aware = view[offset]
+    (microseconds,) = _INT.unpack_from(view, offset + 1)
+    value = EPOCH + timedelta(microseconds=microseconds)
+    if aware:
+        value = value.replace(tzinfo=timezone.utc)
+    return value, offset + 1 + _INT.size
+
+
+def _encode_series(buffer: bytearray, series: pd.Series) -> None:  # type: ignore
+    name = series.name
+    if isinstance(name, datetime):
+        buffer += _BYTE.pack(1)
+        _encode_datetime(buffer, name)
+    elif name is not None:
+        buffer += _BYTE.pack(2)
+        _encode_str(buffer, str(name))
+    else:
+        buffer += _BYTE.pack(0)
+
+    if series.index.equals(BAR_INDEX):
+        buffer += _BYTE.pack(0)
+    else:
+        buffer += _BYTE.pack(1)
+        buffer += _LENGTH.pack(len(series.index))
+        for label in series.index:
+            _encode_str(buffer, str(label))
+
+    values = np.ascontiguousarray(series.values, dtype=np.float64)
+    buffer += _LENGTH.pack(values.size)
+    buffer += values.tobytes()
+
+
+def _decode_series(view: memoryview, offset: int) -> Tuple[pd.Series, int]:  # type: ignore
+    name_kind = view[offset]
+    offset += 1
+    name: Any = None
+    if name_kind == 1:
+        name, offset = _decode_datetime(view, offset)
+        name = pd.Timestamp(name)
+    elif name_kind == 2:
+        name, offset = _decode_str(view, offset)
+
+    labels: Any = BAR_INDEX
+    if view[offset]:
+        (count,) = _LENGTH.unpack_from(view, offset + 1)
+        offset += 1 + _LENGTH.size
+        labels = []
+        for _ in range(count):
+            label, offset = _decode_str(view, offset)
+            labels.append(label)
+    else:
+        offset += 1
+
+    (size,) = _LENGTH.unpack_from(view, offset)
+    offset += _LENGTH.size
+    values = np.frombuffer(view, dtype=np.float64, count=size, offset=offset).copy()
+    return pd.Series(values, index=labels, name=name, copy=False), offset + 8 * size
+
+
+def _enum_codec(enum_type: Type[Enum]) -> Tuple[FieldEncoder, FieldDecoder]:
+    members = list(enum_type)
+    indices = {member: index for index, member in enumerate(members)}
+
+    def encode(buffer: bytearray, value: Enum) -> None:
+        buffer += _BYTE.pack(indices[value])
+
+    def decode(view: memoryview, offset: int) -> Tuple[Enum, int]:
+        return members[view[offset]], offset + 1
+
+    return encode, decode
+
+
+def _optional_codec(
+    encode_value: FieldEncoder, decode_value: FieldDecoder
+) -> Tuple[FieldEncoder, FieldDecoder]:
+    def encode(buffer: bytearray, value: Any) -> None:
+        if value is None:
+            buffer += _BYTE.pack(0)
+        else:
+            buffer += _BYTE.pack(1)
+            encode_value(buffer, value)
+
+    def decode(view: memoryview, offset: int) -> Tuple[Any, int]:
+        if not view[offset]:
+            return None, offset + 1
+        return decode_value(view, offset + 1)
+
+    return encode, decode
+
+
+SCALAR_CODECS: Dict[Any, Tuple[FieldEncoder, FieldDecoder]] = {
+    str: (_encode_str, _decode_str),
+    int: (_encode_int, _decode_int),
+    float: (_encode_float, _decode_float),
+    bool: (_encode_bool, _decode_bool),
+    Decimal: (_encode_decimal, _decode_decimal),
+    datetime: (_encode_datetime, _decode_datetime),
+    pd.Series: (_encode_series, _decode_series),
+}
+
+
+class EventCodec:
+    """
+    Compact binary encoding of the events: a header with the format version
+    and the event class, followed by the values of its fields in declaration
+    order in a fixed binary form (int64, float64 arrays, enum indices...)
+    instead of field names and text. The layout of every event class is
+    built once from the annotations of its fields
+    """
+
+    def __init__(self) -> None:
+        self._tags: Dict[Type[BaseEvent], int] = {
+            event_class: tag for tag, event_class in enumerate(EVENT_CLASSES)
+        }
+        self._layouts: Dict[
+            Type[BaseEvent], List[Tuple[str, FieldEncoder, FieldDecoder]]
+        ] = {
+            event_class: [
+                (name, *self._field_codec(field.annotation))
+                for name, field in event_class.model_fields.items()
+                # The event type comes with the class
+                if name != "event_type"
+            ]
+            for event_class in EVENT_CLASSES
+        }
+
+    def _field_codec(self, annotation: Any) -> Tuple[FieldEncoder, FieldDecoder]:
+        origin = get_origin(annotation)
+        if origin is Union:
+            arguments = [
+                argument
+                for argument in get_args(annotation)
+                if argument is not type(None)
+            ]
+            if len(arguments) == 1:
+                return _optional_codec(*self._field_codec(arguments[0]))
+        elif origin is list:
+            (item_class,) = get_args(annotation)
+            if item_class in EVENT_CLASSES:
+                return self._event_list_codec(item_class)
+        elif isinstance(annotation, type) and issubclass(annotation, Enum):
+            return _enum_codec(annotation)
+        elif annotation in SCALAR_CODECS:
+            return SCALAR_CODECS[annotation]
+
+        raise TypeError(
+            f"ERROR: Event field type not supported by the codec: {annotation}"
+        )
+
+    def _event_list_codec(
+        self, event_class: Type[BaseEvent]
+    ) -> Tuple[FieldEncoder, FieldDecoder]:
+        # The layout is looked up when used, as the list may hold the same class
+        def encode(buffer: bytearray, events: List[BaseEvent]) -> None:
+            buffer += _LENGTH.pack(len(events))
+            for event in events:
+                self._encode_fields(event_class, buffer, event)
+
+        def decode(view: memoryview, offset: int) -> Tuple[List[BaseEvent], int]:
+            (count,) = _LENGTH.unpack_from(view, offset)
+            offset += _LENGTH.size
+            events: List[BaseEvent] = []
+            for _ in range(count):
+                event, offset = self._decode_fields(event_class, view, offset)
+                events.append(event)
+            return events, offset
+
+        return encode, decode
+
+    def _encode_fields(
+        self, event_class: Type[BaseEvent], buffer: bytearray, event: BaseEvent
+    ) -> None:
+        for name, encode, _ in self._layouts[event_class]:
+            encode(buffer, getattr(event, name))
+
+    def _decode_fields(
+        self, event_class: Type[BaseEvent], view: memoryview, offset: int
+    ) -> Tuple[BaseEvent, int]:
+        values: Dict[str, Any] = {}
+        for name, _, decode in self._layouts[event_class]:
+            values[name], offset = decode(view, offset)
+        # The values were validated when the event was created
+        return event_class.model_construct(**values), offset
+
+    def encode(self, event: BaseEvent) -> bytes:
+        event_class = type(event)
+        tag = self._tags.get(event_class)
+        if tag is None:
+            raise TypeError(
+                f"ERROR: Events of type {event_class.__name__} cannot be encoded"
+            )
+
+        buffer = bytearray(_HEADER.pack(TRANSPORT_FORMAT_VERSION, tag))
+        self._encode_fields(event_class, buffer, event)
+        return bytes(buffer)
+
+    def decode(self, data: bytes) -> BaseEvent:
+        view = memoryview(data)
+        version, tag = _HEADER.unpack_from(view)
+        if version != TRANSPORT_FORMAT_VERSION:
+            raise ValueError(
+                f"ERROR: Event encoded with version {version} of the transport format (expected {TRANSPORT_FORMAT_VERSION})"
+            )
+        event, _ = self._decode_fields(EVENT_CLASSES[tag], view, _HEADER.size)
+        return event
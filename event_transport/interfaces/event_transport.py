@@ -0,0 +1,19 @@
+from typing import Protocol, Union
+
+from events.events import BaseEvent
+
+
+class IEventTransport(Protocol):
+    """
+    Carries events between the processes of the framework
+    """
+
+    def send(self, event: BaseEvent) -> None: ...
+
+    def receive(self, timeout: float) -> Union[BaseEvent, None]:
+        """
+        Next event received, or None when nothing arrives within timeout seconds
+        """
+        ...
+
+    def close(self) -> None: ...
@@ -0,0 +1,61 @@
+import threading
+from typing import Any, Iterable, Union
+
+from event_transport.interfaces.event_transport import IEventTransport
+from events.event_queue import EventQueue
+from events.events import EventType
+from utils.utils import Utils
+
+
+class TransportEventQueue(EventQueue):
+    """
+    Events queue of the trading director shared with other processes: the
+    events of remote_types are sent through the transport instead of being
+    queued locally, and the events received from the transport are queued as
+    if a local component had put them. The director and the components use it
+    as the queue they already know
+    """
+
+    def __init__(
+        self,
+        transport: IEventTransport,
+        remote_types: Iterable[EventType] = (),
+        receive_events: bool = True,
+        receive_timeout: float = 0.1,
+    ) -> None:
+        super().__init__()
+        self.transport = transport
+        self.remote_types = frozenset(remote_types)
+        self.receive_timeout = receive_timeout
+
+        self._running = threading.Event()
+        self._running.set()
+        self._receiver: Union[threading.Thread, None] = None
+        if receive_events:
+            self._receiver = threading.Thread(
+                target=self._receive_events, name="event-transport", daemon=True
+            )
+            self._receiver.start()
+
+    def put(self, item: Any, block: bool = True, timeout: Any = None) -> None:
+        if getattr(item, "event_type", None) in self.remote_types:
+            self.transport.send(item)
+        else:
+            super().put(item, block, timeout)
+
+    def _receive_events(self) -> None:
+        while self._running.is_set():
+            try:
+                event = self.transport.receive(self.receive_timeout)
+            except ValueError as e:
+                # Event of an incompatible version of the framework
+                print(f"[{Utils.dateprint()}] - EVENT TRANSPORT: {e}")
+                continue
+            if event is not None:
+                super().put(event)
+
+    def close(self) -> None:
+        self._running.clear()
+        if self._receiver is not None:
+            self._receiver.join()
+        self.transport.close()
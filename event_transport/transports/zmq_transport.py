@@ -0,0 +1,123 @@
+import threading
+from typing import List, Union
+
+import zmq
+
+from event_transport.codec import EventCodec
+from event_transport.interfaces.event_transport import IEventTransport
+from events.events import BaseEvent
+
+
+def topic(event_type: str, symbol: Union[str, None] = None) -> bytes:
+    """
+    Topic of the events of event_type (and symbol). Every part ends in a null
+    byte, so PENDING does not take the PENDING_UPDATE events nor EURUSD the
+    EURUSDm ones when the subscribers filter by prefix
+    """
+    prefix = event_type.encode() + b"\x00"
+    if symbol is not None:
+        prefix += symbol.encode() + b"\x00"
+    return prefix
+
+
+def parse_topic(text: str) -> bytes:
+    """
+    Topic from its text form: TYPE or TYPE:SYMBOL (i.e. DATA:EURUSD)
+    """
+    event_type, _, symbol = text.partition(":")
+    return topic(event_type.strip().upper(), symbol.strip() or None)
+
+
+class ZmqEventTransport(IEventTransport):
+    """
+    Publishes the events on a ZeroMQ PUB socket bound to publish_endpoint and
+    receives those of the processes publishing on subscribe_endpoints
+    (ipc:// or tcp:// on localhost). Every message carries the topic of the
+    event (so the filtering by type and symbol happens in ZeroMQ, without
+    decoding) and the event with the compact encoding of EventCodec.
+
+    As with any PUB socket, the events published before a subscriber is
+    connected are lost, and so are those that exceed high_water_mark while a
+    subscriber falls behind: the transport is meant for the live flow of
+    events, not for those that need to be delivered no matter what
+    """
+
+    def __init__(
+        self,
+        publish_endpoint: Union[str, None] = None,
+        subscribe_endpoints: Union[List[str], None] = None,
+        topics: Union[List[bytes], None] = None,
+        context: Union[zmq.Context, None] = None,  # type: ignore
+        high_water_mark: int = 100_000,
+    ) -> None:
+        self.context = context or zmq.Context.instance()
+        self.codec = EventCodec()
+
+        self._publisher: Union[zmq.Socket, None] = None  # type: ignore
+        # The executor threads send as well, and ZeroMQ sockets are not thread safe
+        self._send_lock = threading.Lock()
+        if publish_endpoint:
+            self._publisher = self.context.socket(zmq.PUB)
+            self._publisher.setsockopt(zmq.SNDHWM, high_water_mark)
+            self._publisher.setsockopt(zmq.LINGER, 0)
+            self._publisher.bind(publish_endpoint)
+
+        self._subscriber: Union[zmq.Socket, None] = None  # type: ignore
+        self._poller = zmq.Poller()
+        if subscribe_endpoints is not None:
+            self._subscriber = self.context.socket(zmq.SUB)
+            self._subscriber.setsockopt(zmq.RCVHWM, high_water_mark)
+            self._subscriber.setsockopt(zmq.LINGER, 0)
+            for prefix in topics or [b""]:
+                self._subscriber.setsockopt(zmq.SUBSCRIBE, prefix)
+            for endpoint in subscribe_endpoints:
+                self.connect(endpoint)
+            self._poller.register(self._subscriber, zmq.POLLIN)
+
+        # Statistics
+        self.sent: int = 0
+        self.received: int = 0
+
+    @property
+    def publish_endpoint(self) -> Union[str, None]:
+        """
+        Endpoint actually bound (i.e. the port chosen for tcp://127.0.0.1:*)
+        """
+        if self._publisher is None:
+            return None
+        return self._publisher.getsockopt_string(zmq.LAST_ENDPOINT)
+
+    def connect(self, endpoint: str) -> None:
+        """
+        Receives the events of one more publisher
+        """
+        if self._subscriber is None:
+            raise ValueError("ERROR: The event transport has no subscribe endpoints")
+        self._subscriber.connect(endpoint)
+
+    def send(self, event: BaseEvent) -> None:
+        if self._publisher is None:
+            raise ValueError("ERROR: The event transport has no publish endpoint")
+
+        payload = self.codec.encode(event)
+        message_topic = topic(event.event_type, event.symbol)  # type: ignore
+        with self._send_lock:
+            self._publisher.send_multipart([message_topic, payload], copy=False)
+            self.sent += 1
+
+    def receive(self, timeout: float) -> Union[BaseEvent, None]:
+        if self._subscriber is None:
+            raise ValueError("ERROR: The event transport has no subscribe endpoints")
+
+        if not self._poller.poll(timeout * 1000):
+            return None
+        _, payload = self._subscriber.recv_multipart(copy=False)
+        self.received += 1
+        return self.codec.decode(payload.buffer)
+
+    def close(self) -> None:
+        for socket in (self._publisher, self._subscriber):
+            if socket is not None:
+                socket.close()
+        self._publisher = None
+        self._subscriber = None
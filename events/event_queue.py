@@ -0,0 +1,21 @@
+from queue import Queue
+from typing import Any, Callable, List
+
+
+class EventQueue(Queue[Any]):
+    """
+    Events queue of the trading director, able to take in one go the events at
+    its head that are handled together (i.e. the data events of the same bar)
+    """
+
+    def take_while(self, condition: Callable[[Any], bool]) -> List[Any]:
+        """
+        Takes the events at the head of the queue while they meet condition,
+        without blocking and with the same bookkeeping as get
+        """
+        events: List[Any] = []
+        with self.not_empty:
+            while self._qsize() and condition(self.queue[0]):
+                events.append(self._get())
+                self.not_full.notify()
+        return events
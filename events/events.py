@@ -1,6 +1,7 @@
 from datetime import datetime
 from enum import StrEnum
 from decimal import Decimal
+from typing import List, Union
 
 import pandas as pd
 from pydantic import BaseModel
@@ -15,6 +16,8 @@ class EventType(StrEnum):
     ORDER = "ORDER"
     EXECUTION = "EXECUTION"
     PENDING = "PENDING"
+    REJECTED = "REJECTED"
+    PENDING_UPDATE = "PENDING_UPDATE"
 
 
 class SignalType(StrEnum):
@@ -29,6 +32,22 @@ class OrderType(StrEnum):
     STOP_LIMIT = "STOP_LIMIT"
 
 
+class DealEntry(StrEnum):
+    IN = "IN"
+    OUT = "OUT"
+    INOUT = "INOUT"
+    OUT_BY = "OUT_BY"
+
+
+class PendingOrderState(StrEnum):
+    PLACED = "PLACED"
+    PARTIALLY_FILLED = "PARTIALLY_FILLED"
+    FILLED = "FILLED"
+    CANCELLED = "CANCELLED"
+    EXPIRED = "EXPIRED"
+    REJECTED = "REJECTED"
+
+
 class BaseEvent(BaseModel):
     event_type: EventType
 
@@ -51,6 +70,11 @@ class SignalEvent(BaseEvent):
     magic_number: int
     sl: Decimal
     tp: Decimal
+    # Time of the bar that triggered the signal and price of reference
+    signal_time: Union[datetime, None] = None
+    reference_price: Decimal = Decimal(0)
+    # Local time when the signal was generated
+    generated_time: Union[datetime, None] = None
 
 
 class SizingEvent(BaseEvent):
@@ -63,6 +87,11 @@ class SizingEvent(BaseEvent):
     sl: Decimal
     tp: Decimal
     volume: Decimal
+    # Time of the bar that triggered the signal and price of reference
+    signal_time: Union[datetime, None] = None
+    reference_price: Decimal = Decimal(0)
+    # Local time when the signal was generated
+    generated_time: Union[datetime, None] = None
 
 
 class OrderEvent(BaseEvent):
@@ -75,6 +104,11 @@ class OrderEvent(BaseEvent):
     sl: Decimal
     tp: Decimal
     volume: Decimal
+    # Time of the bar that triggered the signal and price of reference
+    signal_time: Union[datetime, None] = None
+    reference_price: Decimal = Decimal(0)
+    # Local time when the signal was generated
+    generated_time: Union[datetime, None] = None
 
 
 class ExecutionEvent(BaseEvent):
@@ -84,6 +118,15 @@ class ExecutionEvent(BaseEvent):
     fill_price: Decimal
     fill_time: datetime
     volume: Decimal
+    magic_number: int = 0
+    position_id: int = 0
+    entry: DealEntry = DealEntry.IN
+    signal_time: Union[datetime, None] = None
+    reference_price: Decimal = Decimal(0)
+    # Individual fills of an aggregated execution (i.e. a bulk close). An
+    # aggregated execution spans several positions (position_id is 0), so the
+    # consumers that follow positions must use its legs
+    legs: List["ExecutionEvent"] = []
 
 
 class PlacePendingOrderEvent(BaseEvent):
@@ -96,3 +139,30 @@ class PlacePendingOrderEvent(BaseEvent):
     sl: Decimal
     tp: Decimal
     volume: Decimal
+    ticket: int = 0
+
+
+class PendingOrderUpdateEvent(BaseEvent):
+    event_type: EventType = EventType.PENDING_UPDATE
+    ticket: int
+    symbol: str
+    signal: SignalType
+    target_order: OrderType
+    target_price: Decimal
+    magic_number: int
+    state: PendingOrderState
+    previous_state: PendingOrderState
+    volume_initial: Decimal
+    volume_filled: Decimal
+
+
+class OrderRejectedEvent(BaseEvent):
+    event_type: EventType = EventType.REJECTED
+    symbol: str
+    signal: Union[SignalType, None] = None
+    target_order: Union[OrderType, None] = None
+    volume: Decimal = Decimal(0)
+    magic_number: int = 0
+    ticket: int = 0
+    retcode: int = 0
+    comment: str = ""
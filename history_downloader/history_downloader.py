@@ -0,0 +1,399 @@
+"""
+Downloads the history of bars and ticks of many symbols for research. Every
+range is split in chunks small enough for a single MT5 request, which are
+downloaded concurrently and stored as they arrive, so an interrupted download
+resumes from the chunks already stored. The chunks of every symbol and
+timeframe are then merged (without the overlaps between them), checked for
+gaps and saved as a single .npy file, which can be memory-mapped.
+
+    python -m history_downloader.history_downloader --symbols EURUSD,GBPUSD
+        --timeframes 1min,1h [--ticks] --start 2020-01-01 [--end 2024-01-01]
+        [--output history] [--workers 4]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+import MetaTrader5 as mt5
+import numpy as np
+
+from utils.utils import Utils
+
+# MT5 timeframe and approximate duration in seconds of every timeframe
+TIMEFRAMES: Dict[str, Tuple[int, int]] = {
+    "1min": (mt5.TIMEFRAME_M1, 60),
+    "2min": (mt5.TIMEFRAME_M2, 120),
+    "3min": (mt5.TIMEFRAME_M3, 180),
+    "4min": (mt5.TIMEFRAME_M4, 240),
+    "5min": (mt5.TIMEFRAME_M5, 300),
+    "6min": (mt5.TIMEFRAME_M6, 360),
+    "10min": (mt5.TIMEFRAME_M10, 600),
+    "12min": (mt5.TIMEFRAME_M12, 720),
+    "15min": (mt5.TIMEFRAME_M15, 900),
+    "20min": (mt5.TIMEFRAME_M20, 1200),
+    "30min": (mt5.TIMEFRAME_M30, 1800),
+    "1h": (mt5.TIMEFRAME_H1, 3600),
+    "2h": (mt5.TIMEFRAME_H2, 7200),
+    "3h": (mt5.TIMEFRAME_H3, 10800),
+    "4h": (mt5.TIMEFRAME_H4, 14400),
+    "6h": (mt5.TIMEFRAME_H6, 21600),
+    "8h": (mt5.TIMEFRAME_H8, 28800),
+    "12h": (mt5.TIMEFRAME_H12, 43200),
+    "1d": (mt5.TIMEFRAME_D1, 86400),
+    "1w": (mt5.TIMEFRAME_W1, 604800),
+    "1M": (mt5.TIMEFRAME_MN1, 2678400),
+}
+
+# Name used as the timeframe of the tick downloads
+TICKS = "ticks"
+
+
+class HistoryChunk(NamedTuple):
+    symbol: str
+    timeframe: str
+    start: datetime
+    end: datetime
+
+
+class HistoryGap(NamedTuple):
+    start: datetime
+    end: datetime
+
+
+class HistoryDownloadResult(NamedTuple):
+    symbol: str
+    timeframe: str
+    path: Union[str, None]
+    rows: int
+    chunks: int
+    cached_chunks: int
+    failed_chunks: int
+    gaps: List[HistoryGap]
+
+
+class HistoryDownloader:
+    """
+    Downloads the bars (copy_rates_range) and ticks (copy_ticks_range) of a
+    range in chunks of at most bars_per_chunk bars or tick_chunk of time,
+    with at most workers requests at the same time. Every chunk is written
+    to its own file once complete, so the chunks already stored are skipped
+    when the download is repeated. Gaps longer than max_gap (i.e. longer
+    than a weekend) are reported after merging
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        workers: int = 4,
+        bars_per_chunk: int = 50_000,
+        tick_chunk: timedelta = timedelta(days=1),
+        max_attempts: int = 3,
+        retry_backoff: float = 1.0,
+        max_gap: timedelta = timedelta(days=4),
+    ) -> None:
+        self.output_dir = output_dir
+        self.workers = workers
+        self.bars_per_chunk = bars_per_chunk
+        self.tick_chunk = tick_chunk
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_gap = max_gap
+
+    def plan(
+        self, symbol: str, timeframe: str, start: datetime, end: datetime
+    ) -> List[HistoryChunk]:
+        """
+        Splits the range [start, end) in consecutive chunks
+        """
+        if timeframe == TICKS:
+            chunk_length = self.tick_chunk
+        elif timeframe in TIMEFRAMES:
+            chunk_length = timedelta(
+                seconds=TIMEFRAMES[timeframe][1] * self.bars_per_chunk
+            )
+        else:
+            raise ValueError(f"ERROR: Unknown timeframe {timeframe}")
+
+        chunks: List[HistoryChunk] = []
+        chunk_start = start
+        while chunk_start < end:
+            chunk_end = min(chunk_start + chunk_length, end)
+            chunks.append(HistoryChunk(symbol, timeframe, chunk_start, chunk_end))
+            chunk_start = chunk_end
+        return chunks
+
+    def _chunks_dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.output_dir, "chunks", symbol, timeframe)
+
+    def _chunk_path(self, chunk: HistoryChunk) -> str:
+        return os.path.join(
+            self._chunks_dir(chunk.symbol, chunk.timeframe),
+            f"{int(chunk.start.timestamp())}_{int(chunk.end.timestamp())}.npy",
+        )
+
+    def history_path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.output_dir, f"{symbol}_{timeframe}.npy")
+
+    @staticmethod
+    def _save(path: str, array: np.ndarray) -> None:
+        # Written aside and renamed, so an interrupted write never leaves a chunk
+        # that looks complete
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as file:
+            np.save(file, array)
+        os.replace(temporary_path, path)
+
+    def _fetch(self, chunk: HistoryChunk) -> Union[np.ndarray, None]:
+        for attempt in range(self.max_attempts):
+            if chunk.timeframe == TICKS:
+                data = mt5.copy_ticks_range(  # type: ignore
+                    chunk.symbol,
+                    chunk.start,
+                    chunk.end - timedelta(milliseconds=1),
+                    mt5.COPY_TICKS_ALL,
+                )
+            else:
+                data = mt5.copy_rates_range(  # type: ignore
+                    chunk.symbol,
+                    TIMEFRAMES[chunk.timeframe][0],
+                    chunk.start,
+                    chunk.end - timedelta(seconds=1),
+                )
+            if data is not None:
+                return data
+
+            print(
+                f"[{Utils.dateprint()}] - HISTORY: Unable to download {chunk.symbol} {chunk.timeframe} from {chunk.start} to {chunk.end} (attempt {attempt + 1} of {self.max_attempts}) - MT5 error: {mt5.last_error()}"  # type: ignore
+            )
+            time.sleep(self.retry_backoff * 2**attempt)
+        return None
+
+    def _download_chunk(self, chunk: HistoryChunk) -> bool:
+        data = self._fetch(chunk)
+        if data is None:
+            return False
+
+        self._save(self._chunk_path(chunk), data)
+        return True
+
+    def _load_chunks(self, chunks: List[HistoryChunk]) -> np.ndarray:
+        """
+        Concatenates the chunks in time order without the rows repeated at
+        their boundaries
+        """
+        time_field = "time_msc" if chunks[0].timeframe == TICKS else "time"
+        parts: List[np.ndarray] = []
+        last_time: Union[int, None] = None
+        for chunk in chunks:
+            data = np.load(self._chunk_path(chunk))
+            if data.size == 0:
+                continue
+
+            times = data[time_field]
+            if np.any(np.diff(times) < 0):
+                data = data[np.argsort(times, kind="stable")]
+                times = data[time_field]
+            if last_time is not None:
+                data = data[times > last_time]
+            if data.size:
+                parts.append(data)
+                last_time = data[time_field][-1]
+
+        if not parts:
+            return np.load(self._chunk_path(chunks[0]))
+        return np.concatenate(parts)
+
+    def find_gaps(self, data: np.ndarray, timeframe: str) -> List[HistoryGap]:
+        """
+        Intervals between consecutive rows longer than max_gap
+        """
+        if data.size < 2:
+            return []
+        if timeframe == TICKS:
+            times = data["time_msc"].astype(np.int64)
+            max_gap = int(self.max_gap.total_seconds() * 1000)
+            scale = 1000
+        else:
+            times = data["time"].astype(np.int64)
+            max_gap = int(self.max_gap.total_seconds())
+            scale = 1
+
+        gap_indices = np.flatnonzero(np.diff(times) > max_gap)
+        return [
+            HistoryGap(
+                datetime.fromtimestamp(times[index] / scale, timezone.utc),
+                datetime.fromtimestamp(times[index + 1] / scale, timezone.utc),
+            )
+            for index in gap_indices
+        ]
+
+    def _merge(
+        self,
+        chunks: List[HistoryChunk],
+        cached_chunks: int,
+        failed_chunks: int,
+    ) -> HistoryDownloadResult:
+        symbol, timeframe = chunks[0].symbol, chunks[0].timeframe
+        if failed_chunks:
+            return HistoryDownloadResult(
+                symbol,
+                timeframe,
+                None,
+                0,
+                len(chunks),
+                cached_chunks,
+                failed_chunks,
+                [],
+            )
+
+        data = self._load_chunks(chunks)
+        path = self.history_path(symbol, timeframe)
+        self._save(path, data)
+
+        # Chunks of previous downloads with other boundaries are not used anymore
+        chunk_files = {os.path.basename(self._chunk_path(chunk)) for chunk in chunks}
+        chunks_dir = self._chunks_dir(symbol, timeframe)
+        for file_name in os.listdir(chunks_dir):
+            if file_name not in chunk_files:
+                os.remove(os.path.join(chunks_dir, file_name))
+
+        return HistoryDownloadResult(
+            symbol,
+            timeframe,
+            path,
+            int(data.size),
+            len(chunks),
+            cached_chunks,
+            0,
+            self.find_gaps(data, timeframe),
+        )
+
+    def download(
+        self,
+        symbols: List[str],
+        timeframes: List[str],
+        start: datetime,
+        end: Union[datetime, None] = None,
+    ) -> List[HistoryDownloadResult]:
+        """
+        Downloads the range [start, end) (until now if end is None) of every
+        symbol and timeframe (TICKS for ticks). Times without timezone are
+        taken as UTC
+        """
+        now = datetime.now(timezone.utc)
+        start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+        end = now if end is None else end
+        end = min(end if end.tzinfo else end.replace(tzinfo=timezone.utc), now)
+
+        plans: Dict[Tuple[str, str], List[HistoryChunk]] = {}
+        for symbol in symbols:
+            for timeframe in timeframes:
+                chunks = self.plan(symbol, timeframe, start, end)
+                if chunks:
+                    plans[(symbol, timeframe)] = chunks
+                    os.makedirs(self._chunks_dir(symbol, timeframe), exist_ok=True)
+
+        # The chunks stored by a previous (maybe interrupted) download are skipped
+        cached: Dict[Tuple[str, str], int] = {key: 0 for key in plans}
+        failed: Dict[Tuple[str, str], int] = {key: 0 for key in plans}
+        pending: List[HistoryChunk] = []
+        for key, chunks in plans.items():
+            for chunk in chunks:
+                if os.path.exists(self._chunk_path(chunk)):
+                    cached[key] += 1
+                else:
+                    pending.append(chunk)
+
+        print(
+            f"[{Utils.dateprint()}] - HISTORY: Downloading {len(pending)} chunks ({sum(cached.values())} already downloaded) with {self.workers} workers"
+        )
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="history"
+        ) as pool:
+            futures = {
+                pool.submit(self._download_chunk, chunk): chunk for chunk in pending
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                chunk = futures[future]
+                if not future.result():
+                    failed[(chunk.symbol, chunk.timeframe)] += 1
+                if done % 100 == 0 or done == len(futures):
+                    print(
+                        f"[{Utils.dateprint()}] - HISTORY: {done} of {len(futures)} chunks done ({sum(failed.values())} failed)"
+                    )
+
+        return [
+            self._merge(chunks, cached[key], failed[key])
+            for key, chunks in plans.items()
+        ]
+
+
+def load_history(path: str) -> np.ndarray:
+    """
+    Memory-maps a history file written by HistoryDownloader
+    """
+    return np.load(path, mmap_mode="r")
+
+
+def report(results: List[HistoryDownloadResult]) -> str:
+    lines = ["HISTORY DOWNLOAD:"]
+    for result in results:
+        if result.path is None:
+            lines.append(
+                f"  {result.symbol} {result.timeframe}: {result.failed_chunks} of {result.chunks} chunks failed - download again to resume"
+            )
+            continue
+        lines.append(
+            f"  {result.symbol} {result.timeframe}: {result.rows} rows in {result.path} ({result.cached_chunks} of {result.chunks} chunks from previous downloads) - {len(result.gaps)} gaps"
+        )
+        for gap in result.gaps:
+            lines.append(f"    gap from {gap.start} to {gap.end}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Historical data downloader")
+    parser.add_argument("--symbols", required=True, help="Comma separated symbols")
+    parser.add_argument(
+        "--timeframes", default="", help=f"Comma separated: {', '.join(TIMEFRAMES)}"
+    )
+    parser.add_argument("--ticks", action="store_true", help="Download ticks too")
+    parser.add_argument("--start", required=True, type=datetime.fromisoformat)
+    parser.add_argument("--end", default=None, type=datetime.fromisoformat)
+    parser.add_argument("--output", default="history")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--bars-per-chunk", type=int, default=50_000)
+    parser.add_argument(
+        "--tick-chunk-hours", type=float, default=24.0, help="Hours of ticks per chunk"
+    )
+    args = parser.parse_args()
+
+    symbols = args.symbols.split(",")
+    timeframes = [timeframe for timeframe in args.timeframes.split(",") if timeframe]
+    if args.ticks:
+        timeframes.append(TICKS)
+    if not timeframes:
+        parser.error("at least one timeframe or --ticks is required")
+
+    # Imported here, as the connector is only needed to download from the terminal
+    from platform_connector.platform_connector import PlatformConnector
+
+    PlatformConnector(symbol_list=symbols)
+    downloader = HistoryDownloader(
+        args.output,
+        workers=args.workers,
+        bars_per_chunk=args.bars_per_chunk,
+        tick_chunk=timedelta(hours=args.tick_chunk_hours),
+    )
+    try:
+        print(report(downloader.download(symbols, timeframes, args.start, args.end)))
+    finally:
+        mt5.shutdown()  # type: ignore
+
+
+if __name__ == "__main__":
+    main()
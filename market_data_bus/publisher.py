@@ -0,0 +1,181 @@
+"""
+Publisher of the market data bus: the only process polling the terminal for
+the bars and quotes of the symbols of all the strategies, which read them
+from shared memory (see BusDataProvider).
+
+    python -m market_data_bus.publisher [--config strategy.toml ...]
+        [--name mt5_market_data] [--capacity 1024]
+
+The trading_app instances use the bus when MARKET_DATA_BUS has its name
+"""
+
+import argparse
+import time
+from queue import Empty, Queue
+from typing import Any, List
+
+import numpy as np
+import pandas as pd
+
+from data_provider.data_provider import DataProvider
+from market_data_bus.ring import BAR_DTYPE, BAR_FIELDS, MarketDataRing
+from utils.utils import Utils
+
+DEFAULT_BUS_NAME = "mt5_market_data"
+
+
+def bars_to_records(bars: pd.DataFrame) -> np.ndarray:
+    """
+    Converts the bars of DataProvider (indexed by time) to ring records
+    """
+    records = np.zeros(len(bars), dtype=BAR_DTYPE)
+    records["time"] = (
+        pd.DatetimeIndex(bars.index).to_numpy().astype("datetime64[s]").astype(np.int64)
+    )
+    for field in BAR_FIELDS[1:]:
+        records[field] = bars[field].to_numpy()
+    return records
+
+
+class MarketDataPublisher:
+    """
+    Polls the bars (through a DataProvider) and quotes of the symbols of the
+    bus and writes them to shared memory. The ring of every symbol is primed
+    with its last capacity bars, so the subscribers take their lookback
+    windows from the bus as well
+    """
+
+    def __init__(
+        self,
+        data_provider: DataProvider,
+        name: str = DEFAULT_BUS_NAME,
+        capacity: int = 1024,
+        quote_interval: float = 0.1,
+    ) -> None:
+        self.data_provider = data_provider
+        self.quote_interval = quote_interval
+        self.ring = MarketDataRing.create(
+            name, list(data_provider.symbols), data_provider.timeframe, capacity
+        )
+        self._next_quote_time = 0.0
+
+        # Statistics
+        self.published_bars: int = 0
+        self.published_quotes: int = 0
+
+    def prime(self) -> None:
+        """
+        Publishes the last capacity closed bars of every symbol
+        """
+        for row, symbol in enumerate(self.ring.symbols):
+            bars = self.data_provider.get_latest_closed_bars(
+                symbol, self.ring.timeframe, self.ring.capacity
+            )
+            if bars.empty:
+                continue
+
+            self.ring.write_bars(row, bars_to_records(bars))
+            self.published_bars += len(bars)
+            # The latest bar is already published: the polling starts after it
+            self.data_provider.last_bar_datetime[symbol] = bars.index[-1]
+        self.ring.beat()
+
+    def poll(self) -> None:
+        """
+        Publishes the bars closed since the last poll and, every
+        quote_interval seconds, the quotes of every symbol
+        """
+        self.ring.beat()
+        self.data_provider.check_for_new_data()
+
+        events_queue: Queue[Any] = self.data_provider.events_queue  # type: ignore
+        while True:
+            try:
+                data_event = events_queue.get_nowait()
+            except Empty:
+                break
+            self.ring.write_bars(
+                self.ring.index[data_event.symbol],
+                bars_to_records(data_event.data.to_frame().T),
+            )
+            self.published_bars += 1
+
+        now = time.monotonic()
+        if now >= self._next_quote_time:
+            self._next_quote_time = now + self.quote_interval
+            for row, symbol in enumerate(self.ring.symbols):
+                tick = self.data_provider.get_latest_tick(symbol)
+                if tick:
+                    self.ring.write_quote(row, tick)
+                    self.published_quotes += 1
+
+    def run(self, poll_interval: float = 0.01) -> None:
+        """
+        Publishes until interrupted
+        """
+        self.prime()
+        print(
+            f"[{Utils.dateprint()}] - MARKET DATA BUS: Publishing {len(self.ring.symbols)} symbols ({self.ring.timeframe}) on {self.ring.shared_memory.name}"
+        )
+        try:
+            while True:
+                self.poll()
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        print(self.report())
+        self.ring.close()
+
+    def report(self) -> str:
+        return f"MARKET DATA BUS: {self.published_bars} bars and {self.published_quotes} quotes published"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Market data bus publisher")
+    parser.add_argument(
+        "--config",
+        action="append",
+        help="Strategy configuration whose symbols are published (repeatable)",
+    )
+    parser.add_argument("--name", default=DEFAULT_BUS_NAME)
+    parser.add_argument("--capacity", type=int, default=1024, help="Bars per symbol")
+    parser.add_argument("--quote-interval", type=float, default=0.1)
+    parser.add_argument("--poll-interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    # Imported here, as the subscribers only need the ring
+    from config_manager.trading_config import load_trading_config
+    from platform_connector.platform_connector import PlatformConnector
+
+    # The bus carries the symbols of all the strategies, which share the timeframe
+    symbols: List[str] = []
+    timeframes = set()
+    for path in args.config or ["strategy.toml"]:
+        trading_config = load_trading_config(path)
+        timeframes.add(trading_config.timeframe)
+        symbols += [
+            symbol for symbol in trading_config.symbols if symbol not in symbols
+        ]
+    if len(timeframes) != 1:
+        raise ValueError(
+            f"ERROR: The strategies of a market data bus must share the timeframe: {sorted(timeframes)}"
+        )
+
+    connect = PlatformConnector(symbol_list=symbols)
+    data_provider = DataProvider(
+        events_queue=Queue(),
+        symbol_list=symbols,
+        timeframe=timeframes.pop(),
+        symbol_registry=connect.symbol_registry,
+    )
+    MarketDataPublisher(
+        data_provider, args.name, args.capacity, args.quote_interval
+    ).run(args.poll_interval)
+
+
+if __name__ == "__main__":
+    main()
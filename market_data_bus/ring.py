@@ -0,0 +1,269 @@
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Union
+
+import numpy as np
+
+BUS_MAGIC = 0x4D54354D44425553  # "MT5MDBUS"
+BUS_FORMAT_VERSION = 1
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", np.uint64),
+        ("version", np.uint32),
+        ("symbols", np.uint32),
+        ("capacity", np.uint32),
+        ("timeframe", "S8"),
+        # Incremented after every publication, so the subscribers find out
+        # whether there is anything new reading a single number
+        ("sequence", np.uint64),
+        ("heartbeat", np.float64),
+    ],
+    align=True,
+)
+
+SYMBOL_DTYPE = np.dtype(
+    [
+        ("name", "S32"),
+        # Bars published since the bus was created (bar n lives in slot n % capacity)
+        ("bars", np.uint64),
+        # Last quote, guarded by its own sequence lock
+        ("quote_sequence", np.uint64),
+        ("time", np.int64),
+        ("bid", np.float64),
+        ("ask", np.float64),
+        ("last", np.float64),
+        ("volume", np.uint64),
+        ("time_msc", np.int64),
+        ("flags", np.uint32),
+        ("volume_real", np.float64),
+    ],
+    align=True,
+)
+
+BAR_DTYPE = np.dtype(
+    [
+        # 2n + 1 while bar n is being written, 2n + 2 once written
+        ("sequence", np.uint64),
+        ("time", np.int64),
+        ("open", np.float64),
+        ("high", np.float64),
+        ("low", np.float64),
+        ("close", np.float64),
+        ("tickvol", np.uint64),
+        ("vol", np.uint64),
+        ("spread", np.int32),
+    ],
+    align=True,
+)
+
+BAR_FIELDS = ["time", "open", "high", "low", "close", "tickvol", "vol", "spread"]
+
+QUOTE_FIELDS = [
+    "time",
+    "bid",
+    "ask",
+    "last",
+    "volume",
+    "time_msc",
+    "flags",
+    "volume_real",
+]
+
+# Copies retried before giving up on a slot whose writer stopped halfway
+MAX_READ_ATTEMPTS = 1000
+
+# Seconds without heartbeat after which a segment is taken as abandoned
+STALE_SEGMENT_AFTER = 5.0
+
+
+class MarketDataRing:
+    """
+    Shared memory segment with the last capacity bars and the last quote of
+    every symbol of the bus. A single publisher writes it and any number of
+    subscribers read it without locks: every bar slot and quote carries a
+    sequence number that is odd while it is being written, so the readers
+    retry the copies torn by a concurrent write (seqlock). The ordering of
+    the stores relies on the memory model of x86/x64, where MT5 runs
+    """
+
+    def __init__(self, shared_memory: SharedMemory, owner: bool) -> None:
+        self.shared_memory = shared_memory
+        self.owner = owner
+
+        buffer = shared_memory.buf
+        self._header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buffer)
+        if int(self._header["magic"]) != BUS_MAGIC:
+            raise ValueError(f"ERROR: {shared_memory.name} is not a market data bus")
+        if int(self._header["version"]) != BUS_FORMAT_VERSION:
+            raise ValueError(
+                f"ERROR: Market data bus version {int(self._header['version'])} not supported (expected {BUS_FORMAT_VERSION})"
+            )
+
+        n_symbols = int(self._header["symbols"])
+        self.capacity = int(self._header["capacity"])
+        self.timeframe = self._header["timeframe"].item().decode()
+        self._symbols = np.ndarray(
+            (n_symbols,),
+            dtype=SYMBOL_DTYPE,
+            buffer=buffer,
+            offset=HEADER_DTYPE.itemsize,
+        )
+        self._bars = np.ndarray(
+            (n_symbols, self.capacity),
+            dtype=BAR_DTYPE,
+            buffer=buffer,
+            offset=HEADER_DTYPE.itemsize + SYMBOL_DTYPE.itemsize * n_symbols,
+        )
+        self.symbols: List[str] = [name.decode() for name in self._symbols["name"]]
+        self.index: Dict[str, int] = {
+            symbol: row for row, symbol in enumerate(self.symbols)
+        }
+
+    @staticmethod
+    def size(n_symbols: int, capacity: int) -> int:
+        return (
+            HEADER_DTYPE.itemsize
+            + SYMBOL_DTYPE.itemsize * n_symbols
+            + BAR_DTYPE.itemsize * n_symbols * capacity
+        )
+
+    @classmethod
+    def create(
+        cls, name: str, symbols: List[str], timeframe: str, capacity: int = 1024
+    ) -> "MarketDataRing":
+        """
+        Creates the segment of a new bus (by the publisher)
+        """
+        try:
+            shared_memory = SharedMemory(
+                name=name, create=True, size=cls.size(len(symbols), capacity)
+            )
+        except FileExistsError:
+            # Segment left by a publisher that stopped without removing it
+            previous = cls.attach(name)
+            alive = time.time() - previous.heartbeat <= STALE_SEGMENT_AFTER
+            previous.close()
+            if alive:
+                raise ValueError(
+                    f"ERROR: The market data bus {name} is already published"
+                )
+            SharedMemory(name=name).unlink()
+            shared_memory = SharedMemory(
+                name=name, create=True, size=cls.size(len(symbols), capacity)
+            )
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shared_memory.buf)
+        header["version"] = BUS_FORMAT_VERSION
+        header["symbols"] = len(symbols)
+        header["capacity"] = capacity
+        header["timeframe"] = timeframe.encode()
+        names = np.ndarray(
+            (len(symbols),),
+            dtype=SYMBOL_DTYPE,
+            buffer=shared_memory.buf,
+            offset=HEADER_DTYPE.itemsize,
+        )
+        names["name"] = [symbol.encode() for symbol in symbols]
+        # Written last: the segment is not a bus until it is complete
+        header["magic"] = BUS_MAGIC
+        return cls(shared_memory, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "MarketDataRing":
+        """
+        Opens the segment of an existing bus (by a subscriber)
+        """
+        shared_memory = SharedMemory(name=name)
+        # Otherwise the segment is destroyed when the first subscriber exits
+        resource_tracker.unregister(shared_memory._name, "shared_memory")  # type: ignore
+        return cls(shared_memory, owner=False)
+
+    def close(self) -> None:
+        # The views must be released before the segment is closed
+        del self._header, self._symbols, self._bars
+        self.shared_memory.close()
+        if self.owner:
+            self.shared_memory.unlink()
+
+    @property
+    def sequence(self) -> int:
+        return int(self._header["sequence"])
+
+    @property
+    def heartbeat(self) -> float:
+        """
+        Time of the last poll of the publisher
+        """
+        return float(self._header["heartbeat"])
+
+    def beat(self) -> None:
+        self._header["heartbeat"] = time.time()
+
+    def bar_count(self, row: int) -> int:
+        return int(self._symbols["bars"][row])
+
+    def write_bars(self, row: int, bars: np.ndarray) -> None:
+        """
+        Appends bars (with the fields of BAR_FIELDS, oldest first) to the ring
+        of the symbol in row
+        """
+        count = self.bar_count(row) + bars.size
+        bars = bars[-self.capacity :]  # noqa: E203
+        numbers = np.arange(count - bars.size, count, dtype=np.uint64)
+        slots = numbers % self.capacity
+
+        ring = self._bars[row]
+        ring["sequence"][slots] = 2 * numbers + 1
+        for field in BAR_FIELDS:
+            ring[field][slots] = bars[field]
+        ring["sequence"][slots] = 2 * numbers + 2
+
+        self._symbols["bars"][row] = count
+        self._header["sequence"] += 1
+
+    def read_bars(self, row: int, start: int, stop: int) -> np.ndarray:
+        """
+        Copies the bars start to stop - 1 of the symbol in row. The bars
+        already overwritten are left out
+        """
+        start = max(start, stop - self.capacity, 0)
+        numbers = np.arange(start, stop, dtype=np.uint64)
+        slots = numbers % self.capacity
+        expected = 2 * numbers + 2
+        ring = self._bars[row]
+        for _ in range(MAX_READ_ATTEMPTS):
+            bars = ring[slots]
+            sequences = ring["sequence"][slots]
+            # Copies torn by a write of the same bar are retried
+            if not np.any(
+                (bars["sequence"] == expected - 1) | (sequences == expected - 1)
+            ):
+                break
+        return bars[(bars["sequence"] == expected) & (sequences == expected)]
+
+    def write_quote(self, row: int, tick: Dict[str, Union[int, float]]) -> None:
+        symbol = self._symbols[row : row + 1]  # noqa: E203
+        sequence = int(symbol["quote_sequence"][0])
+        symbol["quote_sequence"] = sequence + 1
+        for field in QUOTE_FIELDS:
+            symbol[field] = tick.get(field, 0)
+        symbol["quote_sequence"] = sequence + 2
+        self._header["sequence"] += 1
+
+    def read_quote(self, row: int) -> Union[Dict[str, Union[int, float]], None]:
+        """
+        Last quote of the symbol in row (None if nothing was published yet)
+        """
+        for _ in range(MAX_READ_ATTEMPTS):
+            sequence = int(self._symbols["quote_sequence"][row])
+            if sequence % 2:
+                continue
+            quote = self._symbols[row].copy()
+            if int(self._symbols["quote_sequence"][row]) == sequence:
+                if sequence == 0:
+                    return None
+                return {field: quote[field].item() for field in QUOTE_FIELDS}
+
+        # The publisher stopped in the middle of a write
+        return None
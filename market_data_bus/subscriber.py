@@ -0,0 +1,197 @@
+import time
+from queue import Queue
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from data_provider.data_provider import DataProvider
+from market_data_bus.ring import BAR_FIELDS, MarketDataRing
+from symbol_registry.symbol_registry import SymbolRegistry
+from utils.utils import Utils
+
+
+def records_to_bars(records: np.ndarray) -> pd.DataFrame:
+    """
+    Converts ring records to bars as returned by DataProvider
+    """
+    bars = pd.DataFrame(
+        {field: records[field] for field in BAR_FIELDS[1:]},
+        index=pd.to_datetime(records["time"], unit="s"),
+    )
+    bars.index.name = "time"
+    return bars
+
+
+class BusDataProvider(DataProvider):
+    """
+    DataProvider that reads the bars and quotes of the symbols of a market
+    data bus from shared memory instead of polling the terminal, so the load
+    on the terminal does not grow with the strategy processes. The symbols
+    not on the bus, other timeframes and lookbacks longer than the ring are
+    still requested from the terminal, and so is everything while the
+    publisher is down
+    """
+
+    def __init__(
+        self,
+        events_queue: Queue[pd.DataFrame],
+        symbol_list: List[str],
+        timeframe: str,
+        symbol_registry: SymbolRegistry,
+        bus_name: str,
+        stale_after: float = 5.0,
+    ) -> None:
+        super().__init__(events_queue, symbol_list, timeframe, symbol_registry)
+        self.bus_name = bus_name
+        self.stale_after = stale_after
+
+        self.ring = MarketDataRing.attach(bus_name)
+        if self.ring.timeframe != timeframe:
+            raise ValueError(
+                f"ERROR: The market data bus {bus_name} publishes {self.ring.timeframe} bars, not {timeframe}"
+            )
+
+        # Bars of every symbol already taken from the ring and last bus sequence seen
+        self._bars_seen: Dict[str, int] = {}
+        self._sequence_seen = -1
+        self._publisher_alive = True
+
+    def _check_publisher(self) -> bool:
+        """
+        Whether the publisher is alive. A restarted publisher creates a new
+        segment, which is attached once its heartbeat is fresh
+        """
+        alive = time.time() - self.ring.heartbeat <= self.stale_after
+        if not alive:
+            try:
+                ring = MarketDataRing.attach(self.bus_name)
+            except (FileNotFoundError, ValueError):
+                pass
+            else:
+                if (
+                    ring.timeframe == self.timeframe
+                    and time.time() - ring.heartbeat <= self.stale_after
+                ):
+                    self.ring.close()
+                    self.ring = ring
+                    self._bars_seen.clear()
+                    self._sequence_seen = -1
+                    alive = True
+                else:
+                    ring.close()
+
+        if alive != self._publisher_alive:
+            self._publisher_alive = alive
+            print(
+                f"[{Utils.dateprint()}] - MARKET DATA BUS: "
+                + (
+                    f"Publisher of {self.bus_name} back. Reading the market data from the bus"
+                    if alive
+                    else f"Publisher of {self.bus_name} down. Polling the terminal"
+                )
+            )
+        return alive
+
+    def _bus_row(
+        self, symbol: str, timeframe: Union[str, None] = None, num_bars: int = 1
+    ) -> Union[int, None]:
+        """
+        Row of symbol in the ring, when the bus can serve the request
+        """
+        if (
+            not self._publisher_alive
+            or (timeframe is not None and timeframe != self.timeframe)
+            or num_bars > self.ring.capacity
+        ):
+            return None
+        return self.ring.index.get(symbol)
+
+    def check_for_new_data(self) -> None:
+        if not self._check_publisher():
+            super().check_for_new_data()
+            return
+
+        for symbol in self.symbols:
+            if symbol not in self.ring.index:
+                self._check_symbol_for_new_data(symbol)
+
+        # Nothing was published since the last check
+        sequence = self.ring.sequence
+        if sequence == self._sequence_seen:
+            return
+        self._sequence_seen = sequence
+
+        new_bars: List[Tuple[pd.Timestamp, str, pd.Series]] = []  # type: ignore
+        for symbol in self.symbols:
+            row = self.ring.index.get(symbol)
+            if row is None:
+                continue
+
+            count = self.ring.bar_count(row)
+            # As when polling, the first bar of a symbol is its latest closed bar
+            seen = self._bars_seen.get(symbol, max(count - 1, 0))
+            if count > seen:
+                bars = records_to_bars(self.ring.read_bars(row, seen, count))
+                for bar_time, bar in bars[
+                    bars.index > self.last_bar_datetime[symbol]
+                ].iterrows():
+                    new_bars.append((bar_time, symbol, bar))  # type: ignore
+            self._bars_seen[symbol] = count
+
+        # Bars of the same time stay together, so the director handles them in one go
+        new_bars.sort(key=lambda new_bar: new_bar[0])
+        for _, symbol, bar in new_bars:
+            self._put_data_event(symbol, bar)
+
+    def get_latest_closed_bars(
+        self, symbol: str, timeframe: str, num_bars: int = 1
+    ) -> pd.DataFrame:
+        bars_count = num_bars if num_bars > 0 else 1
+        row = self._bus_row(symbol, timeframe, bars_count)
+        if row is None:
+            return super().get_latest_closed_bars(symbol, timeframe, num_bars)
+
+        count = self.ring.bar_count(row)
+        records = self.ring.read_bars(row, count - bars_count, count)
+        if records.size == 0:
+            return pd.DataFrame()
+        return records_to_bars(records)
+
+    def get_latest_closes_matrix(
+        self, symbols: List[str], timeframe: str, num_bars: int
+    ) -> np.ndarray:
+        bars_count = num_bars if num_bars > 0 else 1
+        closes = np.full((len(symbols), bars_count), np.nan)
+
+        for row, symbol in enumerate(symbols):
+            bus_row = self._bus_row(symbol, timeframe, bars_count)
+            if bus_row is None:
+                symbol_closes = self._get_cached_closes(symbol, timeframe, bars_count)
+            else:
+                count = self.ring.bar_count(bus_row)
+                records = self.ring.read_bars(bus_row, count - bars_count, count)
+                symbol_closes = records["close"]
+            if symbol_closes.size > 0:
+                first_column = bars_count - symbol_closes.size
+                closes[row, first_column:] = symbol_closes
+
+        return closes
+
+    def get_latest_tick(self, symbol: str) -> Dict[str, Union[int, float]]:
+        row = self._bus_row(symbol)
+        quote = self.ring.read_quote(row) if row is not None else None
+        if quote is None:
+            return super().get_latest_tick(symbol)
+
+        # Keep the conversion rates fresh with every quote seen
+        Utils.get_currency_converter().update_rate(symbol, quote["bid"])  # type: ignore
+        return quote
+
+    def remove_symbols(self, symbols: List[str]) -> None:
+        super().remove_symbols(symbols)
+        for symbol in symbols:
+            self._bars_seen.pop(symbol, None)
+
+    def close(self) -> None:
+        self.ring.close()
@@ -0,0 +1,69 @@
+from collections import namedtuple
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+# Version 2 records the type of the errors raised by the calls, not just their repr
+RECORDING_FORMAT_VERSION = 2
+SUPPORTED_RECORDING_VERSIONS = (1, 2)
+
+# Tags of the portable form of the values that are not plain Python values
+NAMEDTUPLE_TAG = "namedtuple"
+ARRAY_TAG = "ndarray"
+
+
+def encode(value: Any) -> Any:
+    """
+    Converts a value returned by (or passed to) the MetaTrader5 API into a
+    portable form made of plain Python values, so it can be read without the
+    MetaTrader5 package: namedtuples become (tag, type name, fields, values)
+    and numpy arrays (i.e. the bars of copy_rates_*) (tag, dtype, shape, bytes)
+    """
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return (
+            NAMEDTUPLE_TAG,
+            type(value).__name__,
+            tuple(value._fields),  # type: ignore
+            tuple(encode(item) for item in value),  # type: ignore
+        )
+    if isinstance(value, np.ndarray):
+        dtype = value.dtype.descr if value.dtype.names else value.dtype.str
+        return (ARRAY_TAG, dtype, value.shape, value.tobytes())
+    if isinstance(value, tuple):
+        return tuple(encode(item) for item in value)  # type: ignore
+    if isinstance(value, list):
+        return [encode(item) for item in value]  # type: ignore
+    if isinstance(value, dict):
+        return {key: encode(item) for key, item in value.items()}  # type: ignore
+    return value
+
+
+class Decoder:
+    """
+    Rebuilds the values encoded by encode. The namedtuple types are created
+    once per type name and field list
+    """
+
+    def __init__(self) -> None:
+        self._types: Dict[Tuple[str, Tuple[str, ...]], Any] = {}
+
+    def decode(self, value: Any) -> Any:
+        if isinstance(value, tuple) and value:
+            if value[0] == NAMEDTUPLE_TAG and len(value) == 4:  # type: ignore
+                _, type_name, fields, items = value  # type: ignore
+                key = (type_name, fields)
+                namedtuple_type = self._types.get(key)  # type: ignore
+                if namedtuple_type is None:
+                    namedtuple_type = namedtuple(type_name, fields)  # type: ignore
+                    self._types[key] = namedtuple_type  # type: ignore
+                return namedtuple_type(*(self.decode(item) for item in items))  # type: ignore
+            if value[0] == ARRAY_TAG and len(value) == 4:  # type: ignore
+                _, dtype, shape, data = value  # type: ignore
+                dtype = np.dtype([tuple(field) for field in dtype] if isinstance(dtype, list) else dtype)  # type: ignore
+                return np.frombuffer(data, dtype=dtype).reshape(shape).copy()  # type: ignore
+            return tuple(self.decode(item) for item in value)  # type: ignore
+        if isinstance(value, list):
+            return [self.decode(item) for item in value]  # type: ignore
+        if isinstance(value, dict):
+            return {key: self.decode(item) for key, item in value.items()}  # type: ignore
+        return value
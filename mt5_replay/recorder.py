@@ -0,0 +1,120 @@
+import gzip
+import importlib
+import pickle
+import threading
+import time
+from datetime import datetime
+from types import ModuleType
+from typing import Any, Callable, Dict, Tuple, Union
+
+from mt5_replay.codec import RECORDING_FORMAT_VERSION, encode
+from utils.utils import Utils
+
+
+class Mt5Recorder:
+    """
+    Logs every call to the MetaTrader5 API (arguments, result and duration)
+    to a gzip file of pickled records in a portable form, so the session can
+    be replayed later without the terminal (see Mt5Replayer). The functions
+    are wrapped in place on the MetaTrader5 module, so the modules that
+    already imported it are recorded too
+    """
+
+    def __init__(self, path: str, module: Union[ModuleType, None] = None) -> None:
+        self.path = path
+        self.module = module or importlib.import_module("MetaTrader5")
+        self._originals: Dict[str, Callable[..., Any]] = {}
+
+        # The dispatch workers call the API concurrently with the director
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, "wb", compresslevel=6)
+        self.calls: int = 0
+
+        # Constants are stored once, so the replay exposes them as well
+        constants = {
+            name: value
+            for name, value in vars(self.module).items()
+            if name.isupper() and isinstance(value, (int, float, str))
+        }
+        self._write(
+            {
+                "version": RECORDING_FORMAT_VERSION,
+                "created": datetime.now(),
+                "constants": constants,
+            }
+        )
+
+    def _write(self, record: Any) -> None:
+        pickle.dump(record, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def install(self) -> "Mt5Recorder":
+        for name, function in vars(self.module).items():
+            if (
+                name.startswith("_")
+                or not callable(function)
+                or isinstance(function, type)
+            ):
+                continue
+            self._originals[name] = function
+            setattr(self.module, name, self._wrap(name, function))
+        print(
+            f"[{Utils.dateprint()}] - MT5 RECORDER: Recording {len(self._originals)} MT5 functions to {self.path}"
+        )
+        return self
+
+    def _wrap(self, name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        def recorded_call(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                error = (
+                    type(e).__module__,
+                    type(e).__qualname__,
+                    tuple(
+                        arg if isinstance(arg, (str, int, float)) else repr(arg)
+                        for arg in e.args
+                    ),
+                    repr(e),
+                )
+                self._record(
+                    name, args, kwargs, None, time.perf_counter() - start, error
+                )
+                raise
+            self._record(name, args, kwargs, result, time.perf_counter() - start, None)
+            return result
+
+        recorded_call.__name__ = name
+        return recorded_call
+
+    def _record(
+        self,
+        name: str,
+        args: Any,
+        kwargs: Dict[str, Any],
+        result: Any,
+        elapsed: float,
+        error: Union[Tuple[str, str, Tuple[Any, ...], str], None],
+    ) -> None:
+        record = (name, encode(args), encode(kwargs), encode(result), elapsed, error)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._write(record)
+            self.calls += 1
+
+    def uninstall(self) -> None:
+        for name, function in self._originals.items():
+            setattr(self.module, name, function)
+        self._originals.clear()
+
+    def close(self) -> None:
+        """
+        Restores the original functions and closes the recording
+        """
+        self.uninstall()
+        with self._lock:
+            self._file.close()
+        print(
+            f"[{Utils.dateprint()}] - MT5 RECORDER: {self.calls} MT5 calls recorded to {self.path}"
+        )
@@ -0,0 +1,165 @@
+import builtins
+import gzip
+import importlib
+import pickle
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Tuple, Union
+
+from mt5_replay.codec import SUPPORTED_RECORDING_VERSIONS, Decoder, encode
+
+ReplayRecord = Tuple[Any, Any, Any, float, Any]
+
+# Stands for any datetime argument when the calls are matched without their times
+ANY_DATETIME = "<datetime>"
+
+
+def _without_datetimes(value: Any) -> Any:
+    """
+    Replaces the datetimes of the (encoded) arguments of a call, which depend
+    on the time the call is made (i.e. the windows of history_orders_get)
+    """
+    if isinstance(value, datetime):
+        return ANY_DATETIME
+    if isinstance(value, tuple):
+        return tuple(_without_datetimes(item) for item in value)  # type: ignore
+    if isinstance(value, list):
+        return [_without_datetimes(item) for item in value]  # type: ignore
+    if isinstance(value, dict):
+        return {key: _without_datetimes(item) for key, item in value.items()}  # type: ignore
+    return value
+
+
+def _recorded_exception(error: Any) -> Exception:
+    """
+    Rebuilds the exception recorded for a call with its original type when it
+    can be imported (the recordings of version 1 only kept its repr)
+    """
+    if isinstance(error, tuple):
+        module_name, type_name, args, text = error
+        try:
+            module = (
+                builtins
+                if module_name == "builtins"
+                else importlib.import_module(module_name)
+            )
+            exception_type = getattr(module, type_name)
+            if isinstance(exception_type, type) and issubclass(
+                exception_type, Exception
+            ):
+                return exception_type(*args)
+        except Exception:
+            pass
+        error = text
+    return RuntimeError(f"Recorded MT5 error: {error}")
+
+
+class Mt5Replayer:
+    """
+    Stands in for the MetaTrader5 package with the calls of a recording made
+    by Mt5Recorder. Every function returns its recorded results in order
+    (once exhausted, the last one is returned again) and raises the recorded
+    errors with their original type. With speed 0 the results are returned
+    straight away; otherwise the recorded durations are waited, divided by
+    speed. The arguments are matched without their datetimes unless
+    match_datetimes, as those taken from the clock never repeat
+    """
+
+    def __init__(
+        self,
+        path: str,
+        speed: float = 0.0,
+        strict: bool = False,
+        match_datetimes: bool = False,
+    ) -> None:
+        self.path = path
+        self.speed = speed
+        self.strict = strict
+        self.match_datetimes = match_datetimes
+
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Deque[ReplayRecord]] = defaultdict(deque)
+        self._last_results: Dict[str, ReplayRecord] = {}
+
+        # Statistics
+        self.replayed: int = 0
+        self.exhausted: int = 0
+        self.mismatches: int = 0
+
+        decoder = Decoder()
+        with gzip.open(path, "rb") as file:
+            header = pickle.load(file)
+            if header.get("version") not in SUPPORTED_RECORDING_VERSIONS:
+                raise ValueError(
+                    f"ERROR: Unsupported MT5 recording version {header.get('version')} in {path}"
+                )
+            self.constants: Dict[str, Any] = header["constants"]
+            while True:
+                try:
+                    name, args, kwargs, result, elapsed, error = pickle.load(file)
+                except EOFError:
+                    break
+                self._calls[name].append(
+                    (args, kwargs, decoder.decode(result), elapsed, error)
+                )
+
+    def __len__(self) -> int:
+        return sum(len(calls) for calls in self._calls.values())
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for the names that are not attributes of the replayer
+        constants = self.__dict__.get("constants", {})
+        if name in constants:
+            return constants[name]
+        if name in self.__dict__.get("_calls", {}):
+            function = self._replay_function(name)
+            setattr(self, name, function)
+            return function
+        raise AttributeError(f"MetaTrader5 replay has no recorded attribute {name}")
+
+    def _replay_function(self, name: str) -> Callable[..., Any]:
+        def replayed_call(*args: Any, **kwargs: Any) -> Any:
+            with self._lock:
+                calls = self._calls[name]
+                if calls:
+                    record = calls.popleft()
+                    self._last_results[name] = record
+                    self.replayed += 1
+                else:
+                    record = self._last_results[name]
+                    self.exhausted += 1
+
+            recorded_args, recorded_kwargs, result, elapsed, error = record
+            call = (encode(args), encode(kwargs))
+            recorded_call = (recorded_args, recorded_kwargs)
+            if not self.match_datetimes:
+                call = _without_datetimes(call)
+                recorded_call = _without_datetimes(recorded_call)
+            if call != recorded_call:
+                self.mismatches += 1
+                if self.strict:
+                    raise ValueError(
+                        f"ERROR: MT5 replay call {name}{args} {kwargs} does not match the recorded call {name}{recorded_args} {recorded_kwargs}"
+                    )
+            if self.speed > 0:
+                time.sleep(elapsed / self.speed)
+            if error is not None:
+                raise _recorded_exception(error)
+            return result
+
+        replayed_call.__name__ = name
+        return replayed_call
+
+    def install(self) -> "Mt5Replayer":
+        """
+        Registers the replay as the MetaTrader5 module. It must be installed
+        before importing the modules of the framework
+        """
+        sys.modules["MetaTrader5"] = self  # type: ignore
+        return self
+
+    def report(self) -> str:
+        return f"MT5 REPLAY: {self.replayed} calls replayed - {self.exhausted} beyond the recording - {self.mismatches} with different arguments"
@@ -0,0 +1,39 @@
+from typing import IO, Union
+
+from notifications.interfaces.notification_channel import (
+    IAsyncNotificationChannel,
+    INotificationChannel,
+)
+from notifications.properties.properties import FileNotificationProperties
+from utils.utils import Utils
+
+
+class FileNotificationChannel(INotificationChannel, IAsyncNotificationChannel):
+    """
+    Appends the notifications to a local text file
+    """
+
+    def __init__(self, properties: FileNotificationProperties) -> None:
+        self._path = properties.path
+        self._file: Union[IO[str], None] = None
+
+    def _format(self, title: str, message: str) -> str:
+        return f"[{Utils.dateprint()}] {title}\n{message}\n"
+
+    async def open(self) -> None:
+        self._file = open(self._path, "a", encoding="utf-8")
+
+    async def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def async_send_message(self, title: str, message: str) -> None:
+        if self._file is None:
+            await self.open()
+        self._file.write(self._format(title, message))  # type: ignore
+        self._file.flush()  # type: ignore
+
+    def send_message(self, title: str, message: str) -> None:
+        with open(self._path, "a", encoding="utf-8") as file:
+            file.write(self._format(title, message))
@@ -1,20 +1,48 @@
+from __future__ import annotations
+
 import asyncio
-import telegram
-from notifications.interfaces.notification_channel import INotificationChannel
+from typing import TYPE_CHECKING, Union
+from notifications.interfaces.notification_channel import (
+    IAsyncNotificationChannel,
+    INotificationChannel,
+)
 from notifications.properties.properties import TelegramNotificationProperties
 
+if TYPE_CHECKING:
+    import telegram
+
 
-class TelegramNotificationChannel(INotificationChannel):
+class TelegramNotificationChannel(INotificationChannel, IAsyncNotificationChannel):
     def __init__(self, properties: TelegramNotificationProperties) -> None:
         self._channel_id = properties.chat_id
         self._token = properties.token
-        self._bot = telegram.Bot(self._token)
+        self._telegram_bot: Union[telegram.Bot, None] = None
+
+    @property
+    def _bot(self) -> telegram.Bot:
+        # python-telegram-bot (and httpx) take long to import: it is loaded on
+        # first use, i.e. when the dispatcher opens the session in its thread
+        if self._telegram_bot is None:
+            import telegram
+
+            self._telegram_bot = telegram.Bot(self._token)
+        return self._telegram_bot
+
+    async def open(self) -> None:
+        await self._bot.initialize()
+
+    async def close(self) -> None:
+        await self._bot.shutdown()
 
     async def async_send_message(self, title: str, message: str) -> None:
+        # The bot session must be open
+        await self._bot.send_message(
+            text=f"{title}\n{message}", chat_id=self._channel_id
+        )
+
+    async def _send_message_in_new_session(self, title: str, message: str) -> None:
         async with self._bot:
-            await self._bot.send_message(
-                text=f"{title}\n{message}", chat_id=self._channel_id
-            )
+            await self.async_send_message(title, message)
 
     def send_message(self, title: str, message: str) -> None:
-        asyncio.run(self.async_send_message(title, message))
+        asyncio.run(self._send_message_in_new_session(title, message))
@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Union
+
+import httpx
+
+from notifications.interfaces.notification_channel import (
+    IAsyncNotificationChannel,
+    INotificationChannel,
+)
+from notifications.properties.properties import WebhookNotificationProperties
+
+
+# Seconds waited when a rate limited answer does not tell how long to wait
+DEFAULT_RETRY_AFTER = 1.0
+
+
+def parse_retry_after(value: Union[str, None]) -> float:
+    """
+    Seconds to wait from a Retry-After header, which holds either the seconds
+    or an HTTP date
+    """
+    if value is None:
+        return DEFAULT_RETRY_AFTER
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_time = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+    if retry_time.tzinfo is None:
+        retry_time = retry_time.replace(tzinfo=timezone.utc)
+    return max((retry_time - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class WebhookRateLimitedError(Exception):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"Webhook rate limited. Retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+class WebhookNotificationChannel(INotificationChannel, IAsyncNotificationChannel):
+    """
+    Posts the notifications as JSON ({"title": ..., "message": ...}) to a URL
+    """
+
+    def __init__(self, properties: WebhookNotificationProperties) -> None:
+        self._url = properties.url
+        self._headers = properties.headers
+        self._timeout = properties.timeout
+        self._client: Union[httpx.AsyncClient, None] = None
+
+    def _payload(self, title: str, message: str) -> Dict[str, Any]:
+        return {"title": title, "message": message}
+
+    def _check_response(self, response: httpx.Response) -> None:
+        if response.status_code == 429:
+            raise WebhookRateLimitedError(
+                parse_retry_after(response.headers.get("Retry-After"))
+            )
+        response.raise_for_status()
+
+    async def open(self) -> None:
+        self._client = httpx.AsyncClient(headers=self._headers, timeout=self._timeout)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def async_send_message(self, title: str, message: str) -> None:
+        if self._client is None:
+            await self.open()
+        response = await self._client.post(  # type: ignore
+            self._url, json=self._payload(title, message)
+        )
+        self._check_response(response)
+
+    def send_message(self, title: str, message: str) -> None:
+        response = httpx.post(
+            self._url,
+            json=self._payload(title, message),
+            headers=self._headers,
+            timeout=self._timeout,
+        )
+        self._check_response(response)
@@ -1,6 +1,22 @@
-from typing import Protocol
+from typing import Protocol, runtime_checkable
 
 
 class INotificationChannel(Protocol):
     def send_message(self, title: str, message: str) -> None:
         ...
+
+
+@runtime_checkable
+class IAsyncNotificationChannel(Protocol):
+    """
+    Channel able to keep its session open and send from an event loop
+    """
+
+    async def open(self) -> None:
+        ...
+
+    async def async_send_message(self, title: str, message: str) -> None:
+        ...
+
+    async def close(self) -> None:
+        ...
@@ -0,0 +1,230 @@
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+from datetime import timedelta
+from typing import Deque, List, Tuple, Union
+
+from notifications.interfaces.notification_channel import (
+    IAsyncNotificationChannel,
+    INotificationChannel,
+)
+from notifications.properties.properties import (
+    NotificationChannelBaseProperties,
+    NotificationOverflowPolicy,
+)
+from utils.utils import Utils
+
+# Telegram does not accept longer messages
+MAX_MESSAGE_LENGTH = 4096
+MAX_SEND_ATTEMPTS = 3
+
+
+class NotificationDispatcher:
+    """
+    Sends the notifications of a channel from a background thread, so the
+    trading thread never waits for the network. The thread keeps a single
+    event loop and channel session open, sends at most one message every
+    min_interval seconds (the notifications waiting meanwhile are grouped in
+    one message) and keeps at most max_pending notifications waiting. With a
+    digest_interval, the notifications of every window are sent as one digest
+    """
+
+    def __init__(
+        self,
+        channel: INotificationChannel,
+        properties: NotificationChannelBaseProperties,
+    ) -> None:
+        self._channel = channel
+        self.max_pending = properties.max_pending
+        self.overflow_policy = properties.overflow_policy
+        self.min_interval = properties.min_interval
+        self.digest_interval = properties.digest_interval
+
+        self._lock = threading.Lock()
+        self._pending: Deque[Tuple[str, str]] = deque()
+        self._closing = False
+        self._next_send_time = 0.0
+        self._digest_deadline = 0.0
+
+        # Statistics
+        self.sent: int = 0
+        self.dropped: int = 0
+        self.merged: int = 0
+        self.failed: int = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._wakeup = asyncio.Event()
+        self._thread = threading.Thread(
+            target=self._loop.run_until_complete,
+            args=(self._run(),),
+            name="notifications",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(self, title: str, message: str) -> None:
+        """
+        Queues a notification without waiting for it to be sent
+        """
+        with self._lock:
+            if self._closing:
+                return
+
+            if len(self._pending) >= self.max_pending:
+                if self.overflow_policy == NotificationOverflowPolicy.DROP_NEWEST:
+                    self.dropped += 1
+                    return
+
+                last_title, last_message = self._pending[-1]
+                merged_message = f"{last_message}\n{title}: {message}"
+                if (
+                    self.overflow_policy == NotificationOverflowPolicy.MERGE
+                    and len(last_title) + len(merged_message) < MAX_MESSAGE_LENGTH
+                ):
+                    self._pending[-1] = (last_title, merged_message)
+                    self.merged += 1
+                    return
+
+                self._pending.popleft()
+                self.dropped += 1
+
+            if not self._pending:
+                self._digest_deadline = time.monotonic() + self.digest_interval
+            self._pending.append((title, message))
+
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _take_batch(self) -> Union[Tuple[str, str], None]:
+        """
+        Takes the notifications waiting that fit in a single message
+        """
+        batch: List[Tuple[str, str]] = []
+        length = 0
+        with self._lock:
+            while self._pending:
+                title, message = self._pending[0]
+                block_length = len(title) + len(message) + 2
+                if batch and length + block_length > MAX_MESSAGE_LENGTH:
+                    break
+                batch.append(self._pending.popleft())
+                length += block_length
+
+        if not batch:
+            return None
+        if self.digest_interval > 0:
+            return self._format_digest(batch)
+        if len(batch) == 1:
+            title, message = batch[0]
+            return title, message[: MAX_MESSAGE_LENGTH - len(title) - 1]
+
+        message = "\n\n".join(f"{title}\n{message}" for title, message in batch)
+        return f"{len(batch)} notifications", message[: MAX_MESSAGE_LENGTH - 32]
+
+    def _format_digest(self, batch: List[Tuple[str, str]]) -> Tuple[str, str]:
+        # Count of notifications by title, followed by every notification message
+        counts = Counter(title for title, _ in batch)
+        summary = ", ".join(f"{title}: {count}" for title, count in counts.items())
+        messages = "\n".join(message for _, message in batch)
+        title = f"DIGEST - {len(batch)} notifications in {self.digest_interval:.0f}s"
+        return title, f"{summary}\n\n{messages}"[: MAX_MESSAGE_LENGTH - len(title) - 1]
+
+    async def _run(self) -> None:
+        if isinstance(self._channel, IAsyncNotificationChannel):
+            try:
+                await self._channel.open()
+            except Exception as e:
+                print(
+                    f"[{Utils.dateprint()}] - NOTIFICATIONS: Unable to open the channel session: {e}"
+                )
+
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+
+                while self._pending:
+                    # Wait for the rate limit first, so the notifications
+                    # arriving meanwhile travel in the same message
+                    delay = self._next_send_time - time.monotonic()
+                    if not self._closing:
+                        delay = max(delay, self._digest_deadline - time.monotonic())
+                    if delay > 0:
+                        # New notifications or the shutdown wake up the wait to recompute it
+                        try:
+                            await asyncio.wait_for(self._wakeup.wait(), delay)
+                        except asyncio.TimeoutError:
+                            pass
+                        self._wakeup.clear()
+                        continue
+
+                    batch = self._take_batch()
+                    if batch is not None:
+                        await self._send(*batch)
+
+                if self._closing:
+                    return
+        finally:
+            if isinstance(self._channel, IAsyncNotificationChannel):
+                try:
+                    await self._channel.close()
+                except Exception as e:
+                    print(
+                        f"[{Utils.dateprint()}] - NOTIFICATIONS: Unable to close the channel session: {e}"
+                    )
+
+    async def _send(self, title: str, message: str) -> None:
+        for _ in range(MAX_SEND_ATTEMPTS):
+            # Respect the rate limit of the channel
+            delay = self._next_send_time - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                if isinstance(self._channel, IAsyncNotificationChannel):
+                    await self._channel.async_send_message(title, message)
+                else:
+                    self._channel.send_message(title, message)
+            except Exception as e:
+                # Flood control errors tell how long to wait before retrying
+                retry_after = getattr(e, "retry_after", None)
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                if retry_after is None:
+                    print(
+                        f"[{Utils.dateprint()}] - NOTIFICATIONS: Error while sending the notification {title}: {e}"
+                    )
+                    break
+                self._next_send_time = time.monotonic() + float(retry_after)
+            else:
+                self._next_send_time = time.monotonic() + self.min_interval
+                self.sent += 1
+                return
+
+        self.failed += 1
+
+    def request_close(self) -> None:
+        """
+        Stops accepting notifications; the ones waiting are still sent
+        """
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Sends the notifications waiting (for at most timeout seconds) and
+        closes the channel session
+        """
+        self.request_close()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(
+                f"[{Utils.dateprint()}] - NOTIFICATIONS: {len(self._pending)} notifications not sent before closing"
+            )
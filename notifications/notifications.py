@@ -1,24 +1,74 @@
+import time
+from typing import List, Union
+
 from notifications.properties.properties import (
+    FileNotificationProperties,
     NotificationChannelBaseProperties,
     TelegramNotificationProperties,
+    WebhookNotificationProperties,
 )
 from notifications.interfaces.notification_channel import INotificationChannel
-from notifications.channels.telegram_notification_channel import (
-    TelegramNotificationChannel,
-)
+from notifications.notification_dispatcher import NotificationDispatcher
 
 
 class NotificationService:
-    def __init__(self, properties: NotificationChannelBaseProperties) -> None:
-        self._channel = self._get_channel(properties)
+    def __init__(
+        self,
+        properties: Union[
+            NotificationChannelBaseProperties, List[NotificationChannelBaseProperties]
+        ],
+    ) -> None:
+        channels_properties = (
+            properties if isinstance(properties, list) else [properties]
+        )
+
+        # Every channel has its own background dispatcher (and queue), so a
+        # slow channel does not delay the rest
+        self._dispatchers = [
+            NotificationDispatcher(
+                self._get_channel(channel_properties), channel_properties
+            )
+            for channel_properties in channels_properties
+        ]
 
     def _get_channel(
         self, properties: NotificationChannelBaseProperties
     ) -> INotificationChannel:
+        # The channels are imported on demand, so the clients of the unused
+        # ones (telegram, httpx) are never loaded
         if isinstance(properties, TelegramNotificationProperties):
+            from notifications.channels.telegram_notification_channel import (
+                TelegramNotificationChannel,
+            )
+
             return TelegramNotificationChannel(properties)
+        if isinstance(properties, FileNotificationProperties):
+            from notifications.channels.file_notification_channel import (
+                FileNotificationChannel,
+            )
+
+            return FileNotificationChannel(properties)
+        if isinstance(properties, WebhookNotificationProperties):
+            from notifications.channels.webhook_notification_channel import (
+                WebhookNotificationChannel,
+            )
+
+            return WebhookNotificationChannel(properties)
 
         raise ValueError("ERROR: The communication channel does not exist.")
 
     def send_notification(self, title: str, message: str) -> None:
-        self._channel.send_message(title, message)
+        for dispatcher in self._dispatchers:
+            dispatcher.submit(title, message)
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """
+        Sends the notifications still waiting and closes the channels
+        """
+        # All the channels flush at the same time
+        for dispatcher in self._dispatchers:
+            dispatcher.request_close()
+
+        deadline = time.monotonic() + timeout
+        for dispatcher in self._dispatchers:
+            dispatcher.close(max(deadline - time.monotonic(), 0.0))
@@ -1,10 +1,38 @@
+from enum import StrEnum
+from typing import Dict
 from pydantic import BaseModel
 
 
+class NotificationOverflowPolicy(StrEnum):
+    # The oldest notification waiting is discarded
+    DROP_OLDEST = "DROP_OLDEST"
+    # The new notification is discarded
+    DROP_NEWEST = "DROP_NEWEST"
+    # The new notification is appended to the last one waiting
+    MERGE = "MERGE"
+
+
 class NotificationChannelBaseProperties(BaseModel):
-    ...
+    # Notifications waiting to be sent by the background dispatcher
+    max_pending: int = 100
+    overflow_policy: NotificationOverflowPolicy = NotificationOverflowPolicy.MERGE
+    # Minimum seconds between two messages sent through the channel
+    min_interval: float = 1.0
+    # If greater than 0, the notifications are sent as one digest every digest_interval seconds
+    digest_interval: float = 0.0
 
 
 class TelegramNotificationProperties(NotificationChannelBaseProperties):
     chat_id: str
     token: str
+
+
+class FileNotificationProperties(NotificationChannelBaseProperties):
+    path: str
+    min_interval: float = 0.0
+
+
+class WebhookNotificationProperties(NotificationChannelBaseProperties):
+    url: str
+    headers: Dict[str, str] = {}
+    timeout: float = 5.0
@@ -0,0 +1,270 @@
+import threading
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Union
+
+import numpy as np
+
+from symbol_registry.symbol_registry import SymbolRegistry
+
+EXECUTION_LOG_DTYPE = np.dtype(
+    [
+        ("symbol", np.int32),
+        ("side", np.int8),
+        ("signal_time", "datetime64[ms]"),
+        ("generated_time", "datetime64[ms]"),
+        ("send_time", "datetime64[ms]"),
+        ("fill_time", "datetime64[ms]"),
+        ("reference_price", np.float64),
+        ("request_price", np.float64),
+        ("fill_price", np.float64),
+        ("volume", np.float64),
+        ("slippage_points", np.float64),
+        ("execution_slippage_points", np.float64),
+        ("round_trip_ms", np.float64),
+        ("signal_to_fill_ms", np.float64),
+    ]
+)
+
+
+class ExecutionStats(NamedTuple):
+    fills: int
+    mean_slippage_points: float
+    p50_slippage_points: float
+    p95_slippage_points: float
+    mean_execution_slippage_points: float
+    mean_round_trip_ms: float
+    p50_round_trip_ms: float
+    p95_round_trip_ms: float
+    max_round_trip_ms: float
+    mean_signal_to_fill_ms: float
+
+
+class ExecutionAnalytics:
+    """
+    Columnar log of the last max_fills fills of the framework with their
+    slippage (in points, positive when the fill is worse than the reference)
+    and latency. Slippage is measured against the reference price of the
+    signal and against the market price when the request was sent; latency
+    is the local round trip of the request and the local time from the
+    generation of the signal to the fill. Once full, every new fill replaces
+    the oldest one
+    """
+
+    def __init__(
+        self,
+        symbol_registry: SymbolRegistry,
+        capacity: int = 1024,
+        max_fills: int = 100_000,
+    ) -> None:
+        if max_fills <= 0:
+            raise ValueError(
+                f"ERROR: The number of fills kept {max_fills} must be greater than 0"
+            )
+
+        self.symbol_registry = symbol_registry
+        self.max_fills = max_fills
+        capacity = min(capacity, max_fills)
+
+        # Fills are recorded from the dispatch workers
+        self._lock = threading.Lock()
+        self._symbol_index: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.zeros(capacity, dtype=EXECUTION_LOG_DTYPE.fields[name][0])  # type: ignore
+            for name in EXECUTION_LOG_DTYPE.names  # type: ignore
+        }
+        # Fills kept and position of the next one (the oldest once full)
+        self._size = 0
+        self._next = 0
+
+        # Statistics
+        self.recorded_fills: int = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _get_symbol_index(self, symbol: str) -> int:
+        index = self._symbol_index.get(symbol)
+        if index is None:
+            index = len(self._symbols)
+            self._symbol_index[symbol] = index
+            self._symbols.append(symbol)
+        return index
+
+    def record(
+        self,
+        symbol: str,
+        is_buy: bool,
+        signal_time: Union[datetime, None],
+        generated_time: Union[datetime, None],
+        reference_price: float,
+        request_price: float,
+        send_time: datetime,
+        fill_time: datetime,
+        fill_price: float,
+        volume: float,
+        round_trip_ms: float,
+    ) -> None:
+        """
+        Appends a fill to the log. Without reference price (i.e. closes), the
+        market price when the request was sent is used as the reference.
+        send_time and generated_time come from the local clock, the rest of
+        times from the broker
+        """
+        metadata = self.symbol_registry.get(symbol)
+        point = metadata.point if metadata is not None and metadata.point > 0 else 1.0
+        side = 1 if is_buy else -1
+        reference_price = reference_price or request_price
+        # The fill is confirmed locally when order_send returns
+        signal_to_fill_ms = (
+            (send_time - generated_time).total_seconds() * 1000 + round_trip_ms
+            if generated_time is not None
+            else float("nan")
+        )
+
+        with self._lock:
+            size = self._columns["symbol"].size
+            if self._next == size and size < self.max_fills:
+                for name, column in self._columns.items():
+                    self._columns[name] = np.resize(
+                        column, min(2 * size, self.max_fills)
+                    )
+            elif self._next == size:
+                self._next = 0
+
+            row = self._next
+            values = {
+                "symbol": self._get_symbol_index(symbol),
+                "side": side,
+                "signal_time": np.datetime64(signal_time or "NaT", "ms"),
+                "generated_time": np.datetime64(generated_time or "NaT", "ms"),
+                "send_time": np.datetime64(send_time, "ms"),
+                "fill_time": np.datetime64(fill_time, "ms"),
+                "reference_price": reference_price,
+                "request_price": request_price,
+                "fill_price": fill_price,
+                "volume": volume,
+                "slippage_points": side * (fill_price - reference_price) / point,
+                "execution_slippage_points": side
+                * (fill_price - request_price)
+                / point,
+                "round_trip_ms": round_trip_ms,
+                "signal_to_fill_ms": signal_to_fill_ms,
+            }
+            for name, value in values.items():
+                self._columns[name][row] = value
+            self._next += 1
+            self._size = min(self._size + 1, self.max_fills)
+            self.recorded_fills += 1
+
+    def _column(self, name: str) -> np.ndarray:
+        """
+        Values of a column from the oldest fill kept to the latest
+        """
+        column = self._columns[name]
+        if self._size < column.size or self._next == column.size:
+            return column[: self._size]
+        return np.concatenate(
+            (column[self._next :], column[: self._next])  # noqa: E203
+        )
+
+    def records(
+        self,
+        symbol: Union[str, None] = None,
+        since: Union[datetime, None] = None,
+    ) -> np.ndarray:
+        """
+        Returns a copy of the fills (optionally of a symbol and/or filled since
+        a time) as a structured array
+        """
+        with self._lock:
+            mask = np.ones(self._size, dtype=bool)
+            if symbol is not None:
+                mask &= self._column("symbol") == self._symbol_index.get(symbol, -1)
+            if since is not None:
+                mask &= self._column("fill_time") >= np.datetime64(since, "ms")
+
+            records = np.zeros(int(mask.sum()), dtype=EXECUTION_LOG_DTYPE)
+            for name in self._columns:
+                records[name] = self._column(name)[mask]
+        return records
+
+    def symbol_of(self, records: np.ndarray) -> List[str]:
+        return [self._symbols[index] for index in records["symbol"]]
+
+    def summary(
+        self, by: str = "symbol", window: Union[int, None] = None
+    ) -> Dict[Union[str, int], ExecutionStats]:
+        """
+        Slippage and latency statistics of the last window fills (all if None)
+        of every symbol (by="symbol") or hour of the day of the fill (by="hour")
+        """
+        records = self.records()
+        if by == "symbol":
+            keys = records["symbol"].astype(np.int64)
+        elif by == "hour":
+            fill_times = records["fill_time"]
+            keys = (
+                (fill_times - fill_times.astype("datetime64[D]"))
+                // np.timedelta64(1, "h")
+            ).astype(np.int64)
+        else:
+            raise ValueError(f"ERROR: Unknown summary grouping: {by}")
+
+        if records.size == 0:
+            return {}
+
+        # Rolling window: keep the last window fills of every group
+        groups, inverse = np.unique(keys, return_inverse=True)
+        if window is not None:
+            order = np.argsort(inverse, kind="stable")
+            counts = np.bincount(inverse)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            rank = np.arange(order.size) - starts[inverse[order]]
+            keep = np.zeros(order.size, dtype=bool)
+            keep[order] = rank >= (counts - window)[inverse[order]]
+            records, inverse = records[keep], inverse[keep]
+
+        summary: Dict[Union[str, int], ExecutionStats] = {}
+        for group_index, group in enumerate(groups):
+            group_records = records[inverse == group_index]
+            slippage = group_records["slippage_points"]
+            round_trip = group_records["round_trip_ms"]
+            p50_slippage, p95_slippage = np.percentile(slippage, [50, 95])
+            p50_round_trip, p95_round_trip = np.percentile(round_trip, [50, 95])
+            key = self._symbols[group] if by == "symbol" else int(group)
+            summary[key] = ExecutionStats(
+                fills=int(group_records.size),
+                mean_slippage_points=float(slippage.mean()),
+                p50_slippage_points=float(p50_slippage),
+                p95_slippage_points=float(p95_slippage),
+                mean_execution_slippage_points=float(
+                    group_records["execution_slippage_points"].mean()
+                ),
+                mean_round_trip_ms=float(round_trip.mean()),
+                p50_round_trip_ms=float(p50_round_trip),
+                p95_round_trip_ms=float(p95_round_trip),
+                max_round_trip_ms=float(round_trip.max()),
+                mean_signal_to_fill_ms=(
+                    float(np.nanmean(group_records["signal_to_fill_ms"]))
+                    if not np.isnan(group_records["signal_to_fill_ms"]).all()
+                    else float("nan")
+                ),
+            )
+        return summary
+
+    def save(self, path: str) -> None:
+        """
+        Writes the log to a .npy file
+        """
+        np.save(path, self.records())
+
+    def report(self) -> str:
+        lines = [
+            f"EXECUTION ANALYTICS: {self.recorded_fills} fills ({self._size} kept)"
+        ]
+        for symbol, stats in self.summary().items():
+            lines.append(
+                f"  {symbol}: {stats.fills} fills - slippage mean {stats.mean_slippage_points:.1f} / p95 {stats.p95_slippage_points:.1f} points - round trip mean {stats.mean_round_trip_ms:.1f} / p95 {stats.p95_round_trip_ms:.1f} ms"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,179 @@
+from typing import Any, Dict, List, NamedTuple, Union
+import MetaTrader5 as mt5
+
+from symbol_registry.symbol_registry import SymbolMetadata, SymbolRegistry
+
+
+class LocalRejection(NamedTuple):
+    """
+    Result of a trade request rejected locally, before reaching the broker
+    (same retcode/comment fields as the result of mt5.order_send)
+    """
+
+    retcode: int
+    comment: str
+    request: Dict[str, Any]
+
+
+class ExecutionProfile(NamedTuple):
+    symbol: str
+    filling_type: int
+    stops_distance: float
+    freeze_distance: float
+    point: float
+    digits: int
+
+
+class ExecutionProfileCache:
+    """
+    Trade constraints of every symbol (allowed filling type, stops and freeze
+    levels), taken from the symbol registry. Trade requests are checked and
+    adjusted against them before being sent, so the broker does not reject
+    them after a full round trip
+    """
+
+    def __init__(self, symbol_registry: SymbolRegistry) -> None:
+        self.symbol_registry = symbol_registry
+        self._profiles: Dict[str, ExecutionProfile] = {}
+
+    @staticmethod
+    def _filling_types(metadata: SymbolMetadata) -> List[int]:
+        """
+        Filling types allowed in the symbol, in order of preference
+        """
+        # filling_mode is a bitmask of the filling types allowed in the symbol
+        filling_types: List[int] = []
+        if metadata.filling_mode & mt5.SYMBOL_FILLING_FOK:
+            filling_types.append(mt5.ORDER_FILLING_FOK)
+        if metadata.filling_mode & mt5.SYMBOL_FILLING_IOC:
+            filling_types.append(mt5.ORDER_FILLING_IOC)
+        filling_types.append(mt5.ORDER_FILLING_RETURN)
+        return filling_types
+
+    def get(self, symbol: str) -> Union[ExecutionProfile, None]:
+        profile = self._profiles.get(symbol)
+        if profile is not None:
+            return profile
+
+        metadata = self.symbol_registry.get(symbol)
+        if metadata is None:
+            return None
+
+        profile = ExecutionProfile(
+            symbol=symbol,
+            filling_type=self._filling_types(metadata)[0],
+            stops_distance=metadata.trade_stops_level * metadata.point,
+            freeze_distance=metadata.trade_freeze_level * metadata.point,
+            point=metadata.point,
+            digits=metadata.digits,
+        )
+        self._profiles[symbol] = profile
+        return profile
+
+    def refresh(self, symbol: str) -> Union[ExecutionProfile, None]:
+        """
+        Reloads the constraints of symbol from the broker (i.e. after a request
+        was rejected because of them)
+        """
+        self.symbol_registry.refresh([symbol])
+        self._profiles.pop(symbol, None)
+        return self.get(symbol)
+
+    def fall_back_filling_type(
+        self, symbol: str, rejected_filling_type: int
+    ) -> Union[int, None]:
+        """
+        Moves symbol to the next filling type allowed after the one rejected
+        by the broker (FOK -> IOC -> RETURN). Returns the new filling type
+        (None if there is no other one to try)
+        """
+        profile = self.get(symbol)
+        metadata = self.symbol_registry.get(symbol)
+        if profile is None or metadata is None:
+            return None
+
+        filling_types = self._filling_types(metadata)
+        if rejected_filling_type in filling_types:
+            filling_types = filling_types[
+                filling_types.index(rejected_filling_type) + 1 :  # noqa: E203
+            ]
+        if not filling_types:
+            return None
+
+        self._profiles[symbol] = profile._replace(filling_type=filling_types[0])
+        return filling_types[0]
+
+    def prepare_request(
+        self, request: Dict[str, Any], market_price: float
+    ) -> Union[str, None]:
+        """
+        Sets the filling type of request and moves its TP away from
+        market_price up to the stops level. Returns the reason why the
+        request cannot be sent (None if it can), i.e. an SL inside the stops
+        level, which cannot be widened without taking more risk than the
+        volume was sized for
+        """
+        symbol = request["symbol"]
+        profile = self.get(symbol)
+        if profile is None:
+            return f"Symbol {symbol} not found"
+
+        if "type_filling" in request:
+            request["type_filling"] = profile.filling_type
+
+        if "volume" in request:
+            volume = float(
+                self.symbol_registry.normalize_volume(symbol, request["volume"])
+            )
+            if volume <= 0:
+                return (
+                    f"Volume {request['volume']} below the minimum volume of {symbol}"
+                )
+            request["volume"] = volume
+
+        if request["action"] == mt5.TRADE_ACTION_REMOVE:
+            return None
+
+        # Pending orders must be placed at least the stops level away from the market
+        is_buy = request["type"] in (
+            mt5.ORDER_TYPE_BUY,
+            mt5.ORDER_TYPE_BUY_LIMIT,
+            mt5.ORDER_TYPE_BUY_STOP,
+        )
+        if request["action"] == mt5.TRADE_ACTION_PENDING:
+            if abs(request["price"] - market_price) < profile.stops_distance:
+                return f"Price {request['price']} closer to the market ({market_price}) than the stops level of {symbol}"
+            entry_price = request["price"]
+        else:
+            entry_price = market_price
+
+        # Protective levels closer than the stops level: the SL is rejected and
+        # the TP is moved to the minimum distance
+        for level, sign in (("sl", -1.0), ("tp", 1.0)):
+            price = request.get(level, 0.0)
+            if not price:
+                continue
+            direction = sign if is_buy else -sign
+            min_price = entry_price + direction * profile.stops_distance
+            if direction * (price - min_price) >= 0:
+                continue
+            if level == "sl":
+                return f"SL {price} closer to the entry price ({entry_price}) than the stops level of {symbol}"
+            request[level] = round(min_price, profile.digits)
+
+        return None
+
+    def check_freeze_level(
+        self, symbol: str, price: float, market_price: float
+    ) -> Union[str, None]:
+        """
+        Returns the reason why an order at price cannot be modified or cancelled
+        (None if it can)
+        """
+        profile = self.get(symbol)
+        if profile is not None and abs(price - market_price) < profile.freeze_distance:
+            return f"Price {price} inside the freeze level of {symbol} (market: {market_price})"
+        return None
+
+    def symbols(self) -> List[str]:
+        return list(self._profiles)
@@ -0,0 +1,106 @@
+import queue
+import threading
+import zlib
+from typing import Any, Callable, List
+
+from utils.utils import Utils
+
+
+class OrderDispatchPool:
+    """
+    Fixed set of worker threads that send the trade requests to the broker.
+    Every symbol is always handled by the same worker, so the requests of one
+    symbol are sent in the order they were submitted while the requests of
+    different symbols are sent concurrently
+    """
+
+    def __init__(self, num_workers: int = 4, max_pending_per_worker: int = 64) -> None:
+        if num_workers <= 0:
+            raise ValueError(
+                f"ERROR: The number of dispatch workers {num_workers} must be greater than 0"
+            )
+
+        # Paused workers do not start new requests (i.e. while reconnecting)
+        self._condition = threading.Condition()
+        self._paused = False
+        self._busy = 0
+
+        self._queues: List[queue.Queue[Any]] = [
+            queue.Queue(maxsize=max_pending_per_worker) for _ in range(num_workers)
+        ]
+        self._workers = [
+            threading.Thread(
+                target=self._work,
+                args=(worker_queue,),
+                name=f"order-dispatch-{index}",
+                daemon=True,
+            )
+            for index, worker_queue in enumerate(self._queues)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _worker_queue(self, symbol: str) -> queue.Queue[Any]:
+        # Stable hash (the built-in hash of str changes between runs)
+        return self._queues[zlib.crc32(symbol.encode()) % len(self._queues)]
+
+    def submit(self, symbol: str, task: Callable[[], None]) -> None:
+        """
+        Queues task in the worker of symbol (blocks while that worker is full)
+        """
+        self._worker_queue(symbol).put(task)
+
+    def _work(self, worker_queue: queue.Queue[Any]) -> None:
+        while True:
+            task = worker_queue.get()
+            if task is None:
+                worker_queue.task_done()
+                return
+
+            with self._condition:
+                while self._paused:
+                    self._condition.wait()
+                self._busy += 1
+            try:
+                task()
+            except Exception as e:
+                print(
+                    f"[{Utils.dateprint()}] - ORD EXEC: Unexpected error in {threading.current_thread().name}: {e}"
+                )
+            finally:
+                with self._condition:
+                    self._busy -= 1
+                    self._condition.notify_all()
+                worker_queue.task_done()
+
+    def pause(self) -> None:
+        """
+        Stops the workers from starting new requests and waits until the
+        requests being sent are done. The requests submitted meanwhile wait
+        in the queues until resume
+        """
+        with self._condition:
+            self._paused = True
+            while self._busy:
+                self._condition.wait()
+
+    def resume(self) -> None:
+        with self._condition:
+            self._paused = False
+            self._condition.notify_all()
+
+    def join(self) -> None:
+        """
+        Waits until every request already submitted has been sent
+        """
+        for worker_queue in self._queues:
+            worker_queue.join()
+
+    def shutdown(self) -> None:
+        """
+        Sends the requests already submitted and stops the workers
+        """
+        for worker_queue in self._queues:
+            worker_queue.put(None)
+        for worker in self._workers:
+            worker.join()
@@ -1,32 +1,167 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
 from queue import Queue
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Union
 
 import MetaTrader5 as mt5
 import pandas as pd
 
+from account_state.account_state import AccountStateService
+
 from events.events import (
+    DealEntry,
     ExecutionEvent,
     PlacePendingOrderEvent,
     OrderEvent,
+    OrderRejectedEvent,
     OrderType,
     SignalType,
 )
+from order_executor.execution_analytics import ExecutionAnalytics
+from order_executor.execution_profile import ExecutionProfileCache, LocalRejection
+from order_executor.order_dispatch_pool import OrderDispatchPool
+from order_executor.pending_order_tracker import PendingOrderTracker
 from portfolio.portfolio import Portfolio
+from portfolio.position_book import BookPosition
+from symbol_registry.symbol_registry import SymbolRegistry
 from utils.utils import Utils
 
 
 class OrderExecutor:
-    def __init__(self, events_queue: Queue[Any], portfolio: Portfolio) -> None:
+    def __init__(
+        self,
+        events_queue: Queue[Any],
+        portfolio: Portfolio,
+        account_state: AccountStateService,
+        symbol_registry: SymbolRegistry,
+        dispatch_workers: int = 0,
+        max_pending_orders_per_worker: int = 64,
+        max_concurrent_closes: int = 8,
+        max_concurrent_requests: int = 8,
+        deviation_points: int = 0,
+        preflight_checks: bool = False,
+        max_retries: int = 3,
+        retry_backoff: float = 0.05,
+        deal_lookup_attempts: int = 3,
+    ) -> None:
         self.events_queue = events_queue
         self.portfolio = portfolio
+        self.account_state = account_state
+
+        # Trade constraints of every symbol, checked before sending the requests
+        self.execution_profiles = ExecutionProfileCache(symbol_registry)
+        self.deviation_points = deviation_points
+        self.preflight_checks = preflight_checks
+
+        # Slippage and latency of every fill
+        self.analytics = ExecutionAnalytics(symbol_registry)
+
+        # Pending orders placed, followed until they are filled, cancelled or expired
+        self.pending_orders = PendingOrderTracker(events_queue, portfolio.magic)
+
+        # Requotes and off quotes are retried with exponential backoff
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        # The deal of a fill may take a moment to appear in the history
+        self.deal_lookup_attempts = deal_lookup_attempts
+
+        # With dispatch workers, the trade requests are sent in the background and
+        # their results come back to the events queue (0 -> sent synchronously).
+        # The workers only share with the trading director the account state,
+        # the pending order tracker and the execution analytics (all locked),
+        # the symbol registry and the events queue. The position book and the
+        # exposure are only updated by the director, from the events queued
+        self.dispatch_pool: Union[OrderDispatchPool, None] = (
+            OrderDispatchPool(dispatch_workers, max_pending_orders_per_worker)
+            if dispatch_workers > 0
+            else None
+        )
+
+        # Threads used to send the closes of a bulk close at the same time (a
+        # bulk close with more legs takes more than one round trip)
+        self._close_pool = ThreadPoolExecutor(
+            max_workers=max_concurrent_closes, thread_name_prefix="order-close"
+        )
+
+        # The closes are sent from the dispatch workers, so both pools share a
+        # single limit of requests in flight to the terminal
+        self._request_slots = threading.BoundedSemaphore(max_concurrent_requests)
+
+    def _dispatch(
+        self,
+        symbol: str,
+        task: Callable[[], None],
+        order_event: Union[OrderEvent, None] = None,
+    ) -> None:
+        if self.dispatch_pool is None:
+            task()
+        else:
+            self.dispatch_pool.submit(
+                symbol, lambda: self._run_dispatched(task, symbol, order_event)
+            )
+
+    def _run_dispatched(
+        self,
+        task: Callable[[], None],
+        symbol: str,
+        order_event: Union[OrderEvent, None],
+    ) -> None:
+        """
+        Runs a task in a dispatch worker. The outcome of a request that failed
+        halfway is unknown (it may have been filled), so it is reported as
+        rejected and the position book is reconciled with the broker
+        """
+        try:
+            task()
+        except Exception as e:
+            print(
+                f"[{Utils.dateprint()}] - ORD EXEC: Unexpected error while sending a request for {symbol}: {e!r}. Reconciliation requested"
+            )
+            self.portfolio.request_reconciliation()
+            self._create_and_put_order_rejected_event(
+                None, order_event=order_event, symbol=symbol, comment=f"{e!r}"
+            )
+
+    def pause_dispatch(self) -> None:
+        """
+        Waits for the trade requests being sent and holds the rest until
+        resume_dispatch (i.e. while the terminal is reinitialized)
+        """
+        if self.dispatch_pool is not None:
+            self.dispatch_pool.pause()
+
+    def resume_dispatch(self) -> None:
+        if self.dispatch_pool is not None:
+            self.dispatch_pool.resume()
+
+    def shutdown(self) -> None:
+        """
+        Waits for the trade requests already dispatched and stops the workers
+        """
+        if self.dispatch_pool is not None:
+            self.dispatch_pool.shutdown()
+            self.dispatch_pool = None
+        self._close_pool.shutdown()
 
     def execute_order(self, order_event: OrderEvent) -> None:
         if order_event.target_order == "MARKET":
             # Call the method that executes a market order
-            self._execute_market_order(order_event)
+            self._dispatch(
+                order_event.symbol,
+                lambda: self._execute_market_order(order_event),
+                order_event,
+            )
         elif order_event.target_order in (OrderType.LIMIT, OrderType.STOP):
             # Call the method that executes a limit order
-            self._send_pending_order(order_event)
+            self._dispatch(
+                order_event.symbol,
+                lambda: self._send_pending_order(order_event),
+                order_event,
+            )
         else:
             raise ValueError(f"Order type not supported: {order_event.target_order}")
 
@@ -49,14 +184,17 @@ class OrderExecutor:
             "sl": float(order_event.sl),
             "tp": float(order_event.tp),
             "type": order_type,
-            "deviation": 0,
+            "deviation": self.deviation_points,
             "magic": order_event.magic_number,
             "comment": "FWK Market Order",
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
 
         # Send the trade request to be executed
-        result = mt5.order_send(market_order_request)  # type: ignore
+        send_time = datetime.now()
+        start = time.perf_counter()
+        result = self._send_request(market_order_request)
+        round_trip_ms = (time.perf_counter() - start) * 1000
 
         # Check if the order was executed successfully
         if self._check_execution_status(result):
@@ -64,12 +202,15 @@ class OrderExecutor:
                 f"[{Utils.dateprint()}] - ORD EXEC: Market Order {order_event.signal} {order_event.target_order} for {order_event.symbol} with {order_event.volume} lots executed successfully"
             )
             # Generate execution event and add to queue
-            self._create_and_put_execution_event(result)
+            self._create_and_put_execution_event(
+                result, send_time, round_trip_ms, order_event
+            )
         else:
             # Order was not executed
             print(
-                f"[{Utils.dateprint()}] - ORD EXEC: Error while executing the Market Order {order_event.signal} for {order_event.symbol}: {result.comment}"
+                f"[{Utils.dateprint()}] - ORD EXEC: Error while executing the Market Order {order_event.signal} for {order_event.symbol}: {self._describe_failure(result)}"
             )
+            self._create_and_put_order_rejected_event(result, order_event=order_event)
 
     def _send_pending_order(self, order_event: OrderEvent) -> None:
         # Check if the order is STOP or LIMIT
@@ -101,7 +242,7 @@ class OrderExecutor:
             "sl": float(order_event.sl),
             "tp": float(order_event.tp),
             "type": order_type,
-            "deviation": 0,
+            "deviation": self.deviation_points,
             "magic": order_event.magic_number,
             "comment": "FWK Pending Order",
             "type_filling": mt5.ORDER_FILLING_FOK,
@@ -109,24 +250,42 @@ class OrderExecutor:
         }
 
         # Send the trade request to put the pending order
-        result = mt5.order_send(pending_order_request)  # type: ignore
+        result = self._send_request(pending_order_request)
 
         # Check if the order was executed successfully
         if self._check_execution_status(result):
             print(
                 f"[{Utils.dateprint()}] - ORD EXEC: Pending Order {order_event.signal} {order_event.target_order} for {order_event.symbol} with {order_event.volume} lots sent at {order_event.target_price} successfully"
             )
+            self.pending_orders.track(
+                ticket=result.order,
+                symbol=order_event.symbol,
+                magic=order_event.magic_number,
+                order_type=order_type,
+                price_open=pending_order_request["price"],
+                volume=pending_order_request["volume"],
+            )
             # Place the specific pending order event in the queue
-            self._create_and_put_placed_pending_order_event(order_event)
+            self._create_and_put_placed_pending_order_event(order_event, result.order)
         else:
             # Order was not executed
             print(
-                f"[{Utils.dateprint()}] - ORD EXEC: Error while executing the Pending Order {order_event.signal} {order_event.target_order} for {order_event.symbol}: {result.comment}"
+                f"[{Utils.dateprint()}] - ORD EXEC: Error while executing the Pending Order {order_event.signal} {order_event.target_order} for {order_event.symbol}: {self._describe_failure(result)}"
             )
+            self._create_and_put_order_rejected_event(result, order_event=order_event)
 
     def close_position_by_ticket(self, ticket: int) -> None:
+        # The closes of a symbol are sent in order with the rest of its orders
+        book_position = self.portfolio.position_book.get(ticket)
+        self._dispatch(
+            book_position.symbol if book_position is not None else str(ticket),
+            lambda: self._close_position_by_ticket(ticket),
+        )
+
+    def _close_position_by_ticket(self, ticket: int) -> None:
         # Access the position by its ticket
-        position = mt5.positions_get(ticket=ticket)[0]  # type: ignore
+        positions = mt5.positions_get(ticket=ticket)  # type: ignore
+        position = positions[0] if positions else None
 
         # Verifiy that the position exists
         if position is None:
@@ -135,54 +294,160 @@ class OrderExecutor:
             )
             return
 
+        execution_event = self._send_close_request(
+            BookPosition(
+                ticket=position.ticket,
+                symbol=position.symbol,
+                magic=position.magic,
+                type=position.type,
+                volume=position.volume,
+                price_open=position.price_open,
+            )
+        )
+        if execution_event is not None:
+            self.events_queue.put(execution_event)
+
+    def _send_close_request(
+        self, position: BookPosition, volume: Union[float, None] = None
+    ) -> Union[ExecutionEvent, None]:
+        """
+        Closes volume (all by default) of position with a deal on the opposite
+        side and returns its execution event (None if it was rejected)
+        """
+        volume = position.volume if volume is None else volume
+
         # Create the trade request to close the position
         close_request: Dict[str, Any] = {
             "action": mt5.TRADE_ACTION_DEAL,
             "position": position.ticket,
             "symbol": position.symbol,
-            "volume": position.volume,
+            "volume": volume,
             "type": mt5.ORDER_TYPE_SELL
-            if position.type == mt5.ORDER_TYPE_BUY
+            if position.type == mt5.POSITION_TYPE_BUY
             else mt5.ORDER_TYPE_BUY,
+            "magic": position.magic,
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
 
         # Send the trade request to close the position
-        result = mt5.order_send(close_request)  # type: ignore
+        send_time = datetime.now()
+        start = time.perf_counter()
+        result = self._send_request(close_request)
+        round_trip_ms = (time.perf_counter() - start) * 1000
 
         # Check if the order was executed successfully
         if self._check_execution_status(result):
             print(
-                f"[{Utils.dateprint()}] - ORD EXEC: Position with ticket {ticket} for {position.symbol} with volume {position.volume} closed successfully"
+                f"[{Utils.dateprint()}] - ORD EXEC: Position with ticket {position.ticket} for {position.symbol} with volume {volume} closed successfully"
             )
-            # Generate execution event and add to queue
-            self._create_and_put_execution_event(result)
-        else:
-            # Order was not executed
-            print(
-                f"[{Utils.dateprint()}] - ORD EXEC: Error while closing the position {ticket} for {position.symbol} and volume {position.volume}: {result.comment}"
+            return self._create_execution_event(result, send_time, round_trip_ms)
+
+        # Order was not executed
+        print(
+            f"[{Utils.dateprint()}] - ORD EXEC: Error while closing the position {position.ticket} for {position.symbol} and volume {volume}: {self._describe_failure(result)}"
+        )
+        self._create_and_put_order_rejected_event(
+            result,
+            symbol=position.symbol,
+            volume=volume,
+            magic_number=position.magic,
+            ticket=position.ticket,
+        )
+        return None
+
+    def close_positions(
+        self,
+        symbol: Union[str, None] = None,
+        side: Union[int, None] = None,
+        magic: Union[int, None] = None,
+    ) -> None:
+        """
+        Closes every open position that matches the filter (None matches any
+        value), working from the position book instead of asking the broker
+        for every ticket. One aggregated ExecutionEvent is queued per symbol
+        """
+        positions_by_symbol: Dict[str, List[BookPosition]] = {}
+        for position in self.portfolio.get_positions(
+            symbol=symbol, magic=magic, side=side
+        ):
+            positions_by_symbol.setdefault(position.symbol, []).append(position)
+
+        for position_symbol, positions in positions_by_symbol.items():
+            self._dispatch(
+                position_symbol,
+                lambda positions=positions: self._close_positions(positions),  # type: ignore
             )
 
-    def close_strategy_long_positions_by_symbol(self, symbol: str) -> None:
-        # Get the open positions for the strategy
-        positions = self.portfolio.get_strategy_open_positions()  # type: ignore
+    def _close_positions(self, positions: List[BookPosition]) -> None:
+        """
+        Closes positions (all of the same symbol). Netting accounts hold a single
+        position per symbol, so the whole volume is closed with one deal; in
+        hedging accounts every position is closed with its own deal, sent at
+        the same time up to max_concurrent_closes deals (the rest wait for a
+        free thread) and within the max_concurrent_requests shared with the
+        rest of requests. The ExecutionEvent queued aggregates the deals, which
+        belong to different positions: its position_id is 0 and the consumers
+        that follow positions must apply its legs
+        """
+        # Without a snapshot (i.e. invalidated after a reconnect) the margin mode
+        # is unknown: a single ticket is still closed with one deal, and several
+        # tickets with a deal each, which is right for both account types
+        snapshot = self.account_state.get_snapshot()
+        hedging = (
+            snapshot is not None
+            and snapshot.margin_mode == mt5.ACCOUNT_MARGIN_MODE_RETAIL_HEDGING
+        )
+        if not hedging and all(
+            position.ticket == positions[0].ticket for position in positions
+        ):
+            legs = [
+                self._send_close_request(
+                    positions[0],
+                    volume=round(sum(position.volume for position in positions), 8),
+                )
+            ]
+        else:
+            legs = list(self._close_pool.map(self._send_close_request, positions))
+
+        executed_legs = [leg for leg in legs if leg is not None]
+        if executed_legs:
+            self.events_queue.put(self._aggregate_execution_events(executed_legs))
+
+    def _aggregate_execution_events(
+        self, legs: List[ExecutionEvent]
+    ) -> ExecutionEvent:
+        if len(legs) == 1:
+            return legs[0]
+
+        # Volume weighted fill price of all the fills
+        volume = sum((leg.volume for leg in legs), Decimal(0))
+        fill_price = (
+            sum((leg.fill_price * leg.volume for leg in legs), Decimal(0)) / volume
+        )
 
-        # Filter positions by symbol and direction and close
-        for position in positions:  # type: ignore
-            if position.symbol == symbol and position.type == mt5.ORDER_TYPE_BUY:  # type: ignore
-                self.close_position_by_ticket(position.ticket)  # type: ignore
+        return ExecutionEvent(
+            symbol=legs[0].symbol,
+            signal=legs[0].signal,
+            fill_price=fill_price,
+            fill_time=max(leg.fill_time for leg in legs),
+            volume=volume,
+            magic_number=legs[0].magic_number,
+            entry=legs[0].entry,
+            legs=legs,
+        )
 
-    def close_strategy_short_positions_by_symbol(self, symbol: str) -> None:
-        # Get the open positions for the strategy
-        positions = self.portfolio.get_strategy_open_positions()  # type: ignore
+    def close_strategy_long_positions_by_symbol(self, symbol: str) -> None:
+        self.close_positions(
+            symbol=symbol, side=mt5.POSITION_TYPE_BUY, magic=self.portfolio.magic
+        )
 
-        # Filter positions by symbol and direction and close
-        for position in positions:  # type: ignore
-            if position.symbol == symbol and position.type == mt5.ORDER_TYPE_SELL:  # type: ignore
-                self.close_position_by_ticket(position.ticket)  # type: ignore
+    def close_strategy_short_positions_by_symbol(self, symbol: str) -> None:
+        self.close_positions(
+            symbol=symbol, side=mt5.POSITION_TYPE_SELL, magic=self.portfolio.magic
+        )
 
     def _create_and_put_placed_pending_order_event(
-        self, order_event: OrderEvent
+        self, order_event: OrderEvent, ticket: int
     ) -> None:
         # Create the placed pending order event
         placed_pending_order_event = PlacePendingOrderEvent(
@@ -194,14 +459,26 @@ class OrderExecutor:
             sl=order_event.sl,
             tp=order_event.tp,
             volume=order_event.volume,
+            ticket=ticket,
         )
 
         # Put the event in the queue
         self.events_queue.put(placed_pending_order_event)
 
     def cancel_pending_order_by_ticket(self, ticket: int) -> None:
-        # Get the information of the pending order
-        order = mt5.orders_get(ticket=ticket)[0]  # type: ignore
+        # The cancellation is sent in order with the rest of orders of its symbol
+        tracked_order = self.pending_orders.get(ticket)
+        self._dispatch(
+            tracked_order.symbol if tracked_order is not None else str(ticket),
+            lambda: self._cancel_pending_order_by_ticket(ticket),
+        )
+
+    def _cancel_pending_order_by_ticket(self, ticket: int) -> None:
+        # Get the information of the pending order (from the broker if it is not tracked)
+        order: Any = self.pending_orders.get(ticket)
+        if order is None:
+            orders = mt5.orders_get(ticket=ticket)  # type: ignore
+            order = orders[0] if orders else None
 
         # Check if the pending order exists
         if order is None:
@@ -215,8 +492,21 @@ class OrderExecutor:
             "symbol": order.symbol,
         }
 
+        # Orders inside the freeze level cannot be cancelled, so do not even try
+        tick = mt5.symbol_info_tick(order.symbol)  # type: ignore
+        freeze_error = None
+        if tick is not None:
+            is_buy = order.type in (mt5.ORDER_TYPE_BUY_LIMIT, mt5.ORDER_TYPE_BUY_STOP)
+            freeze_error = self.execution_profiles.check_freeze_level(
+                order.symbol, order.price_open, tick.ask if is_buy else tick.bid  # type: ignore
+            )
+
         # Send the trade request to cancel the pending order
-        result = mt5.order_send(cancel_request)  # type: ignore
+        result = (
+            self._send_request(cancel_request)
+            if freeze_error is None
+            else LocalRejection(mt5.TRADE_RETCODE_FROZEN, freeze_error, cancel_request)
+        )
 
         # Check if the order was executed successfully
         if self._check_execution_status(result):
@@ -226,32 +516,241 @@ class OrderExecutor:
         else:
             # Order was not executed
             print(
-                f"[{Utils.dateprint()}] - ORD EXEC: Error while cancelling the pending order {ticket} for {order.symbol} and volume {order.volume_initial}: {result.comment}"
+                f"[{Utils.dateprint()}] - ORD EXEC: Error while cancelling the pending order {ticket} for {order.symbol} and volume {order.volume_initial}: {self._describe_failure(result)}"
+            )
+            self._create_and_put_order_rejected_event(
+                result,
+                symbol=order.symbol,
+                volume=order.volume_current,
+                magic_number=order.magic,
+                ticket=ticket,
+            )
+
+    def _get_market_price(self, request: Dict[str, Any]) -> Union[float, None]:
+        tick = mt5.symbol_info_tick(request["symbol"])  # type: ignore
+        if tick is None:
+            return None
+
+        # Buy orders are filled at the ask and sell orders at the bid
+        if request["type"] in (
+            mt5.ORDER_TYPE_BUY,
+            mt5.ORDER_TYPE_BUY_LIMIT,
+            mt5.ORDER_TYPE_BUY_STOP,
+        ):
+            return tick.ask  # type: ignore
+        return tick.bid  # type: ignore
+
+    def _send_request(self, request: Dict[str, Any]) -> Any:
+        """
+        Checks and adjusts request against the trade constraints of its symbol,
+        optionally validates it with order_check and sends it, retrying the
+        requotes and off quotes. Returns the result of the last order_send
+        (or a LocalRejection if the request was not sent)
+        """
+        result: Any = None
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+            if request["action"] != mt5.TRADE_ACTION_REMOVE:
+                market_price = self._get_market_price(request)
+                if market_price is None:
+                    return LocalRejection(
+                        mt5.TRADE_RETCODE_PRICE_OFF,
+                        f"No quote available for {request['symbol']}",
+                        request,
+                    )
+                if request["action"] == mt5.TRADE_ACTION_DEAL:
+                    request["price"] = market_price
+
+                error = self.execution_profiles.prepare_request(request, market_price)
+                if error is not None:
+                    return LocalRejection(mt5.TRADE_RETCODE_INVALID, error, request)
+
+            with self._request_slots:
+                if self.preflight_checks:
+                    check_result = mt5.order_check(request)  # type: ignore
+                    if check_result is None or check_result.retcode != 0:  # type: ignore
+                        return check_result
+
+                result = mt5.order_send(request)  # type: ignore
+            if result is None or result.retcode not in (
+                mt5.TRADE_RETCODE_REQUOTE,
+                mt5.TRADE_RETCODE_PRICE_CHANGED,
+                mt5.TRADE_RETCODE_PRICE_OFF,
+                mt5.TRADE_RETCODE_INVALID_FILL,
+            ):
+                return result
+
+            # The filling types allowed may have changed since they were loaded:
+            # reload them and try the next one allowed (FOK -> IOC -> RETURN)
+            if result.retcode == mt5.TRADE_RETCODE_INVALID_FILL:
+                self.execution_profiles.refresh(request["symbol"])
+                if (
+                    self.execution_profiles.fall_back_filling_type(
+                        request["symbol"],
+                        request.get("type_filling", mt5.ORDER_FILLING_RETURN),
+                    )
+                    is None
+                ):
+                    return result
+
+            print(
+                f"[{Utils.dateprint()}] - ORD EXEC: Request for {request['symbol']} not filled ({result.comment}). Retry {attempt + 1} of {self.max_retries}"
             )
 
-    def _create_and_put_execution_event(self, order_result: Any) -> None:
+        return result
+
+    def _create_and_put_execution_event(
+        self,
+        order_result: Any,
+        send_time: datetime,
+        round_trip_ms: float,
+        order_event: Union[OrderEvent, None] = None,
+    ) -> None:
+        # Put the execution event in the queue
+        self.events_queue.put(
+            self._create_execution_event(
+                order_result, send_time, round_trip_ms, order_event
+            )
+        )
+
+    def _create_execution_event(
+        self,
+        order_result: Any,
+        send_time: datetime,
+        round_trip_ms: float,
+        order_event: Union[OrderEvent, None] = None,
+    ) -> ExecutionEvent:
         # Get deal info, result of the order execution
-        deal_code = order_result.deal
-        deal = mt5.history_deals_get(ticket=deal_code)[0]  # type: ignore
+        deal = self._get_deal(order_result.deal)
+        if deal is not None:
+            fill = {
+                "signal": SignalType.BUY
+                if deal.type == mt5.DEAL_TYPE_BUY
+                else SignalType.SELL,  # type: ignore
+                "fill_price": deal.price,  # type: ignore
+                "fill_time": pd.to_datetime(deal.time_msc, unit="ms"),  # type: ignore
+                "volume": deal.volume,  # type: ignore
+                "magic_number": deal.magic,  # type: ignore
+                "position_id": deal.position_id,  # type: ignore
+                "entry": self._map_deal_entry(deal.entry),  # type: ignore
+            }
+        else:
+            fill = self._get_fill_from_result(order_result)
 
         # Create the execution event
         execution_event = ExecutionEvent(
             symbol=order_result.request.symbol,
-            signal=SignalType.BUY
-            if deal.type == mt5.DEAL_TYPE_BUY
-            else SignalType.SELL,  # type: ignore
-            fill_price=deal.price,  # type: ignore
-            fill_time=pd.to_datetime(deal.time_msc, unit="ms"),  # type: ignore
-            volume=deal.volume,  # type: ignore
+            **fill,
+            signal_time=order_event.signal_time if order_event is not None else None,
+            reference_price=order_event.reference_price
+            if order_event is not None
+            else Decimal(0),
         )
 
-        # Put the execution event in the queue
-        self.events_queue.put(execution_event)
+        # Record the execution quality of the fill
+        self.analytics.record(
+            symbol=execution_event.symbol,
+            is_buy=execution_event.signal == SignalType.BUY,
+            signal_time=execution_event.signal_time,
+            generated_time=order_event.generated_time
+            if order_event is not None
+            else None,
+            reference_price=float(execution_event.reference_price),
+            request_price=order_result.request.price,
+            send_time=send_time,
+            fill_time=execution_event.fill_time,
+            fill_price=float(execution_event.fill_price),
+            volume=float(execution_event.volume),
+            round_trip_ms=round_trip_ms,
+        )
+
+        return execution_event
+
+    def _get_deal(self, ticket: int) -> Any:
+        """
+        Looks up a deal in the history, which may not include it right after
+        the order was filled (None if it is still missing after a few tries)
+        """
+        for attempt in range(self.deal_lookup_attempts):
+            if attempt > 0:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            deals = mt5.history_deals_get(ticket=ticket)  # type: ignore
+            if deals:
+                return deals[0]
+        return None
+
+    def _get_fill_from_result(self, order_result: Any) -> Dict[str, Any]:
+        """
+        Fill of an order whose deal is not in the history, taken from the
+        result of order_send. The position of an opening deal is taken as
+        the ticket of the order (a deal that adds to a netting position does
+        not match it), so the position book is reconciled with the broker
+        """
+        request = order_result.request
+        print(
+            f"[{Utils.dateprint()}] - ORD EXEC: Deal {order_result.deal} of the order {order_result.order} on {request.symbol} not found in the history. Fill taken from the order result and reconciliation requested"
+        )
+        self.portfolio.request_reconciliation()
+
+        return {
+            "signal": SignalType.BUY
+            if request.type == mt5.ORDER_TYPE_BUY
+            else SignalType.SELL,
+            "fill_price": order_result.price or request.price,
+            "fill_time": pd.Timestamp(datetime.now()),
+            "volume": order_result.volume or request.volume,
+            "magic_number": request.magic,
+            "position_id": request.position or order_result.order,
+            "entry": DealEntry.OUT if request.position else DealEntry.IN,
+        }
+
+    def _map_deal_entry(self, deal_entry: int) -> DealEntry:
+        deal_entry_mapping: Dict[int, DealEntry] = {
+            mt5.DEAL_ENTRY_IN: DealEntry.IN,
+            mt5.DEAL_ENTRY_OUT: DealEntry.OUT,
+            mt5.DEAL_ENTRY_INOUT: DealEntry.INOUT,
+            mt5.DEAL_ENTRY_OUT_BY: DealEntry.OUT_BY,
+        }
+        return deal_entry_mapping.get(deal_entry, DealEntry.IN)
+
+    def _create_and_put_order_rejected_event(
+        self,
+        order_result: Any,
+        order_event: Union[OrderEvent, None] = None,
+        symbol: str = "",
+        volume: float = 0.0,
+        magic_number: int = 0,
+        ticket: int = 0,
+        comment: Union[str, None] = None,
+    ) -> None:
+        # Create the rejection event (order_send returns None if the request did not reach the broker)
+        order_rejected_event = OrderRejectedEvent(
+            symbol=order_event.symbol if order_event is not None else symbol,
+            signal=order_event.signal if order_event is not None else None,
+            target_order=order_event.target_order if order_event is not None else None,
+            volume=order_event.volume if order_event is not None else Decimal(str(volume)),
+            magic_number=order_event.magic_number
+            if order_event is not None
+            else magic_number,
+            ticket=ticket,
+            retcode=order_result.retcode if order_result is not None else 0,
+            comment=comment
+            if comment is not None
+            else self._describe_failure(order_result),
+        )
+
+        # Put the rejection event in the queue
+        self.events_queue.put(order_rejected_event)
+
+    def _describe_failure(self, order_result: Any) -> str:
+        if order_result is None:
+            return f"Request not sent. MT5 error: {mt5.last_error()}"
+        return f"{order_result.comment} (retcode {order_result.retcode})"
 
     def _check_execution_status(self, order_result: Any) -> bool:
-        if order_result.retcode in (
+        return order_result is not None and order_result.retcode in (
             mt5.TRADE_RETCODE_DONE,
             mt5.TRADE_RETCODE_DONE_PARTIAL,
-        ):
-            return True
-        return False
+        )
@@ -0,0 +1,277 @@
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from queue import Queue
+from typing import Any, Dict, List, NamedTuple, Tuple, Union
+import MetaTrader5 as mt5
+
+from events.events import (
+    OrderType,
+    PendingOrderState,
+    PendingOrderUpdateEvent,
+    SignalType,
+)
+from utils.utils import Utils
+
+
+class TrackedOrder(NamedTuple):
+    ticket: int
+    symbol: str
+    magic: int
+    type: int
+    price_open: float
+    volume_initial: float
+    volume_current: float
+    state: PendingOrderState
+    tracked_since: datetime
+
+
+class PendingOrderTracker:
+    """
+    Follows the pending orders placed by the framework until they are filled,
+    cancelled, expired or rejected. Every poll asks the broker for all the
+    live orders at once. Only the orders that just left the live orders are
+    looked up in the order history, with one query around the time they left.
+    The orders not found yet are looked up again later, with backoff, and
+    given up after max_history_misses lookups. Every state change is queued
+    as a PendingOrderUpdateEvent
+    """
+
+    # Margin of the history queries, as the server time may be in another timezone
+    HISTORY_MARGIN = timedelta(days=1)
+
+    def __init__(
+        self,
+        events_queue: Queue[Any],
+        magic_number: Union[int, None] = None,
+        poll_interval: float = 1.0,
+        max_history_misses: int = 5,
+    ) -> None:
+        self.events_queue = events_queue
+        self.magic = magic_number
+        self.poll_interval = poll_interval
+        self.max_history_misses = max_history_misses
+        self._next_poll_time = 0.0
+
+        # Orders are registered from the dispatch workers and polled from the director
+        self._lock = threading.Lock()
+        self._orders: Dict[int, TrackedOrder] = {}
+
+        # Orders no longer live waiting for their final state: time they left the
+        # live orders and history lookups missed, plus the lookups by due time
+        self._awaiting_history: Dict[int, Tuple[datetime, int]] = {}
+        self._history_checks: List[Tuple[float, int]] = []
+
+        # Statistics
+        self.polls: int = 0
+        self.history_queries: int = 0
+        self.history_misses: int = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._orders)
+
+    def get(self, ticket: int) -> Union[TrackedOrder, None]:
+        with self._lock:
+            return self._orders.get(ticket)
+
+    def orders(self, symbol: Union[str, None] = None) -> List[TrackedOrder]:
+        with self._lock:
+            return [
+                order
+                for order in self._orders.values()
+                if symbol is None or order.symbol == symbol
+            ]
+
+    def track(
+        self,
+        ticket: int,
+        symbol: str,
+        magic: int,
+        order_type: int,
+        price_open: float,
+        volume: float,
+    ) -> None:
+        """
+        Starts following a pending order just placed
+        """
+        with self._lock:
+            self._register(
+                ticket, symbol, magic, order_type, price_open, volume, volume
+            )
+
+    def _register(
+        self,
+        ticket: int,
+        symbol: str,
+        magic: int,
+        order_type: int,
+        price_open: float,
+        volume_initial: float,
+        volume_current: float,
+    ) -> None:
+        self._orders[ticket] = TrackedOrder(
+            ticket=ticket,
+            symbol=symbol,
+            magic=magic,
+            type=order_type,
+            price_open=price_open,
+            volume_initial=volume_initial,
+            volume_current=volume_current,
+            state=PendingOrderState.PLACED,
+            tracked_since=datetime.now(),
+        )
+
+    def poll(self, force: bool = False) -> None:
+        """
+        Compares the tracked orders against the broker (at most once every
+        poll_interval seconds unless force) and queues their state changes
+        """
+        now = time.monotonic()
+        if not force and now < self._next_poll_time:
+            return
+        self._next_poll_time = now + self.poll_interval
+        poll_time = datetime.now()
+
+        live_orders = mt5.orders_get()  # type: ignore
+        if live_orders is None:
+            print(
+                f"[{Utils.dateprint()}] - PENDING ORDERS: Unable to retrieve the live orders - MT5 error: {mt5.last_error()}"  # type: ignore
+            )
+            return
+        self.polls += 1
+
+        live_by_ticket = {order.ticket: order for order in live_orders}  # type: ignore
+        due_tickets: List[int] = []
+        with self._lock:
+            for ticket, live_order in live_by_ticket.items():
+                order = self._orders.get(ticket)
+                if order is None:
+                    # Orders of the strategy placed outside this session are followed too
+                    if live_order.magic == self.magic:
+                        self._register(
+                            ticket,
+                            live_order.symbol,
+                            live_order.magic,
+                            live_order.type,
+                            live_order.price_open,
+                            live_order.volume_initial,
+                            live_order.volume_current,
+                        )
+                elif live_order.volume_current < order.volume_current:
+                    self._transition(
+                        order,
+                        PendingOrderState.PARTIALLY_FILLED,
+                        live_order.volume_current,
+                    )
+
+            # Orders that just left the live orders are looked up in the history
+            for ticket in (
+                self._orders.keys()
+                - live_by_ticket.keys()
+                - self._awaiting_history.keys()
+            ):
+                # Orders tracked after the request may just not be in the answer
+                if self._orders[ticket].tracked_since < poll_time:
+                    self._awaiting_history[ticket] = (poll_time, 0)
+                    heapq.heappush(self._history_checks, (now, ticket))
+
+            while self._history_checks and self._history_checks[0][0] <= now:
+                _, ticket = heapq.heappop(self._history_checks)
+                if ticket in self._awaiting_history:
+                    due_tickets.append(ticket)
+
+        if due_tickets:
+            self._resolve_finished_orders(due_tickets)
+
+    def _resolve_finished_orders(self, tickets: List[int]) -> None:
+        """
+        Looks up the final state of the orders no longer live with a single
+        query of the order history, bounded by the time they left the live
+        orders
+        """
+        with self._lock:
+            left_since = min(self._awaiting_history[ticket][0] for ticket in tickets)
+        history = mt5.history_orders_get(  # type: ignore
+            left_since - self.HISTORY_MARGIN, datetime.now() + self.HISTORY_MARGIN
+        )
+        self.history_queries += 1
+        if history is None:
+            print(
+                f"[{Utils.dateprint()}] - PENDING ORDERS: Unable to retrieve the order history - MT5 error: {mt5.last_error()}"  # type: ignore
+            )
+            # Not the fault of the orders: looked up again without counting a miss
+            with self._lock:
+                for ticket in tickets:
+                    self._schedule_history_check(ticket)
+            return
+
+        history_by_ticket = {order.ticket: order for order in history}  # type: ignore
+        final_states = {
+            mt5.ORDER_STATE_FILLED: PendingOrderState.FILLED,
+            mt5.ORDER_STATE_PARTIAL: PendingOrderState.PARTIALLY_FILLED,
+            mt5.ORDER_STATE_CANCELED: PendingOrderState.CANCELLED,
+            mt5.ORDER_STATE_EXPIRED: PendingOrderState.EXPIRED,
+            mt5.ORDER_STATE_REJECTED: PendingOrderState.REJECTED,
+        }
+
+        with self._lock:
+            for ticket in tickets:
+                order = self._orders[ticket]
+                history_order = history_by_ticket.get(ticket)
+                if history_order is not None:
+                    state = final_states.get(
+                        history_order.state, PendingOrderState.CANCELLED
+                    )
+                    volume_current = history_order.volume_current
+                else:
+                    self.history_misses += 1
+                    left_at, misses = self._awaiting_history[ticket]
+                    if misses + 1 < self.max_history_misses:
+                        # Not in the history yet: looked up again a bit later
+                        self._awaiting_history[ticket] = (left_at, misses + 1)
+                        self._schedule_history_check(ticket)
+                        continue
+
+                    print(
+                        f"[{Utils.dateprint()}] - PENDING ORDERS: Order {ticket} not found in the history after {misses + 1} lookups. Taken as cancelled"
+                    )
+                    state = PendingOrderState.CANCELLED
+                    volume_current = order.volume_current
+
+                self._transition(order, state, volume_current)
+                # A partially filled order that left the live orders will not fill anymore
+                self._orders.pop(ticket, None)
+                self._awaiting_history.pop(ticket, None)
+
+    def _schedule_history_check(self, ticket: int) -> None:
+        misses = self._awaiting_history[ticket][1]
+        heapq.heappush(
+            self._history_checks,
+            (time.monotonic() + self.poll_interval * 2**misses, ticket),
+        )
+
+    def _transition(
+        self, order: TrackedOrder, state: PendingOrderState, volume_current: float
+    ) -> None:
+        self._orders[order.ticket] = order._replace(
+            state=state, volume_current=volume_current
+        )
+
+        is_buy = order.type in (mt5.ORDER_TYPE_BUY_LIMIT, mt5.ORDER_TYPE_BUY_STOP)
+        is_limit = order.type in (mt5.ORDER_TYPE_BUY_LIMIT, mt5.ORDER_TYPE_SELL_LIMIT)
+        self.events_queue.put(
+            PendingOrderUpdateEvent(
+                ticket=order.ticket,
+                symbol=order.symbol,
+                signal=SignalType.BUY if is_buy else SignalType.SELL,
+                target_order=OrderType.LIMIT if is_limit else OrderType.STOP,
+                target_price=order.price_open,
+                magic_number=order.magic,
+                state=state,
+                previous_state=order.state,
+                volume_initial=order.volume_initial,
+                volume_filled=order.volume_initial - volume_current,
+            )
+        )
@@ -0,0 +1,191 @@
+import time
+from typing import Union
+import MetaTrader5 as mt5
+
+from account_state.account_state import AccountStateService
+from data_provider.data_provider import DataProvider
+from order_executor.order_executor import OrderExecutor
+from platform_connector.platform_connector import PlatformConnector
+from portfolio.portfolio import Portfolio
+from utils.utils import Utils
+
+
+class ConnectionSupervisor:
+    """
+    Watches the link with the MT5 terminal with cheap heartbeats and, when it
+    is lost, reconnects with exponential backoff. After reconnecting, the
+    cached state is refreshed and the bars closed meanwhile are backfilled.
+    The order dispatch workers are paused while the terminal is reinitialized
+    """
+
+    # Errors of the MetaTrader5 package raised when the terminal cannot be reached
+    CONNECTION_ERRORS = (
+        mt5.RES_E_INTERNAL_FAIL_SEND,
+        mt5.RES_E_INTERNAL_FAIL_RECEIVE,
+        mt5.RES_E_INTERNAL_FAIL_INIT,
+        mt5.RES_E_INTERNAL_FAIL_CONNECT,
+        mt5.RES_E_INTERNAL_FAIL_TIMEOUT,
+    )
+
+    def __init__(
+        self,
+        platform_connector: PlatformConnector,
+        data_provider: DataProvider,
+        portfolio: Portfolio,
+        account_state: AccountStateService,
+        order_executor: Union[OrderExecutor, None] = None,
+        heartbeat_interval: float = 1.0,
+        stale_quotes_after: float = 120.0,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+    ) -> None:
+        self.platform_connector = platform_connector
+        self.data_provider = data_provider
+        self.portfolio = portfolio
+        self.account_state = account_state
+        self.order_executor = order_executor
+
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_quotes_after = stale_quotes_after
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+
+        self.connected = True
+        self._next_check_time = 0.0
+        self._last_quote_time = 0
+        self._last_quote_change = time.monotonic()
+
+        # Reconnection state
+        self._disconnected_since = 0.0
+        self._next_reconnect_time = 0.0
+        self._backoff = initial_backoff
+
+        # Metrics
+        self.disconnections: int = 0
+        self.reconnect_attempts: int = 0
+        self._disconnected_seconds: float = 0.0
+
+    @property
+    def disconnected_seconds(self) -> float:
+        """
+        Total time without connection (including the current disconnection)
+        """
+        if self.connected:
+            return self._disconnected_seconds
+        return self._disconnected_seconds + time.monotonic() - self._disconnected_since
+
+    def check(self) -> bool:
+        """
+        Runs the heartbeat (at most once every heartbeat_interval seconds) or
+        the next reconnection attempt when it is due. Returns whether the
+        terminal is connected
+        """
+        now = time.monotonic()
+        if self.connected:
+            if now >= self._next_check_time:
+                self._next_check_time = now + self.heartbeat_interval
+                if not self._heartbeat(now):
+                    self._on_connection_lost(now)
+        elif now >= self._next_reconnect_time:
+            self._try_reconnect(now)
+
+        return self.connected
+
+    def _heartbeat(self, now: float) -> bool:
+        terminal_info = mt5.terminal_info()  # type: ignore
+        if terminal_info is None:
+            return mt5.last_error()[0] not in self.CONNECTION_ERRORS  # type: ignore
+        if not terminal_info.connected:  # type: ignore
+            return False
+
+        # Quotes frozen for too long may mean a broken link with the trade server
+        # (not checked without symbols, i.e. all removed by a configuration reload)
+        if not self.data_provider.symbols:
+            return True
+        tick = mt5.symbol_info_tick(self.data_provider.symbols[0])  # type: ignore
+        if tick is not None and tick.time_msc != self._last_quote_time:  # type: ignore
+            self._last_quote_time = tick.time_msc  # type: ignore
+            self._last_quote_change = now
+        elif now - self._last_quote_change > self.stale_quotes_after:
+            # The market may just be closed: the account must answer to call it a lost link
+            self._last_quote_change = now
+            return mt5.account_info() is not None  # type: ignore
+
+        return True
+
+    def _on_connection_lost(self, now: float) -> None:
+        self.connected = False
+        self.disconnections += 1
+        self._disconnected_since = now
+        self._next_reconnect_time = now
+        self._backoff = self.initial_backoff
+        print(
+            f"[{Utils.dateprint()}] - CONNECTION: Link with the MT5 terminal lost - MT5 error: {mt5.last_error()}. Reconnecting..."  # type: ignore
+        )
+
+    def _try_reconnect(self, now: float) -> None:
+        self.reconnect_attempts += 1
+
+        # No trade request may be in flight while the terminal is shut down and
+        # initialized again, nor use the state while it is refreshed
+        if self.order_executor is not None:
+            self.order_executor.pause_dispatch()
+        try:
+            reprimed = self._reconnect_and_reprime(now)
+        finally:
+            if self.order_executor is not None:
+                self.order_executor.resume_dispatch()
+        if not reprimed:
+            return
+
+        outage = time.monotonic() - self._disconnected_since
+        self._disconnected_seconds += outage
+        self.connected = True
+        self._next_check_time = time.monotonic() + self.heartbeat_interval
+        self._last_quote_change = time.monotonic()
+        print(
+            f"[{Utils.dateprint()}] - CONNECTION: Reconnected to the MT5 terminal after {outage:.1f} seconds"
+        )
+
+    def _reconnect_and_reprime(self, now: float) -> bool:
+        if not self.platform_connector.reconnect():
+            self._schedule_reconnect(now, "Reconnection failed")
+            return False
+
+        # The link only counts as back once the cached state is refreshed (the
+        # terminal may still be synchronizing right after reconnecting)
+        try:
+            self._reprime()
+        except Exception as e:
+            self._schedule_reconnect(
+                now, f"Refreshing the state after reconnecting failed ({e})"
+            )
+            return False
+        return True
+
+    def _schedule_reconnect(self, now: float, reason: str) -> None:
+        self._next_reconnect_time = now + self._backoff
+        print(
+            f"[{Utils.dateprint()}] - CONNECTION: {reason}. Next attempt in {self._backoff:.1f} seconds"
+        )
+        self._backoff = min(self._backoff * 2, self.max_backoff)
+
+    def _reprime(self) -> None:
+        """
+        Refreshes the state cached while the terminal was not reachable
+        """
+        self.platform_connector.symbol_registry.load()
+        self.account_state.invalidate()
+        self.portfolio.request_reconciliation()
+
+        backfilled_bars = self.data_provider.backfill()
+        print(
+            f"[{Utils.dateprint()}] - CONNECTION: {backfilled_bars} bars closed while disconnected backfilled"
+        )
+
+    def report(self) -> str:
+        return (
+            f"CONNECTION: {self.disconnections} disconnections - "
+            f"{self.disconnected_seconds:.1f} seconds disconnected - "
+            f"{self.reconnect_attempts} reconnection attempts"
+        )
@@ -2,6 +2,10 @@ from typing import List, Dict
 from decouple import config
 import MetaTrader5 as mt5
 
+from symbol_registry.symbol_registry import SymbolRegistry
+from utils.currency_converter import CurrencyConverter
+from utils.utils import Utils
+
 
 class PlatformConnector:
     def __init__(self, symbol_list: List[str]) -> None:
@@ -25,6 +29,13 @@ class PlatformConnector:
         # Check algorithmic trading
         self._check_algo_trading_enabled()
 
+        # Load the metadata of the broker symbols in bulk
+        self.symbol_registry = SymbolRegistry()
+        self.symbol_registry.load()
+
+        # Build the currency conversion graph from the broker symbols
+        Utils.set_currency_converter(CurrencyConverter(self.symbol_registry.values()))
+
         # Add symbols to MarketWatch
         self._add_symbols_to_marketwatch(symbol_list)
 
@@ -53,6 +64,27 @@ class PlatformConnector:
                 f"Ha ocurrido un error al inicializar la plataforma MT5: {mt5.last_error()}"  # type: ignore
             )
 
+    def reconnect(self) -> bool:
+        """
+        Shuts down the link with the MT5 terminal and initializes it again
+        with the same credentials. Returns whether it succeeded
+        """
+        mt5.shutdown()  # type: ignore
+        if mt5.initialize(  # type: ignore
+            path=self.path,
+            login=self.login,
+            password=self.password,
+            server=self.server,
+            timeout=self.timeout,
+            portable=self.portable,
+        ):
+            return True
+
+        print(
+            f"[{Utils.dateprint()}] - CONNECTION: Unable to initialize the MT5 platform: {mt5.last_error()}"  # type: ignore
+        )
+        return False
+
     def _live_account_warning(self) -> None:
         """
         Checks the account type launched
@@ -95,6 +127,23 @@ class PlatformConnector:
                 "El trading algoritmico está desactivado. Por favor, actívalo MANUALMENTE!"
             )
 
+    def add_symbols(self, symbols: List[str]) -> None:
+        """
+        Adds symbols to market watch (i.e. symbols added to the strategy at runtime)
+        """
+        self._add_symbols_to_marketwatch(symbols)
+
+    def remove_symbols(self, symbols: List[str]) -> None:
+        """
+        Removes symbols from market watch. The terminal keeps the symbols with
+        open positions, orders or charts
+        """
+        for symbol in symbols:
+            if not mt5.symbol_select(symbol, False):  # type: ignore
+                print(
+                    f"[{Utils.dateprint()}] - PLATFORM: Symbol {symbol} kept in MarketWatch: {mt5.last_error()}"  # type: ignore
+                )
+
     def _add_symbols_to_marketwatch(self, symbols: List[str]) -> None:
         """
         Adds the symbols to market watch
@@ -109,19 +158,21 @@ class PlatformConnector:
         # 1) Check if the symbol is already visible in the Market Watch
         # 2) If it is not, we will add it to the Market Watch
         for symbol in symbols:
-            if mt5.symbol_info(symbol) is None:  # type: ignore
+            symbol_metadata = self.symbol_registry.get(symbol)
+            if symbol_metadata is None:
                 print(
                     f"No se ha podido añadir el símbol {symbol} al MarketWatch: {mt5.last_error()}"  # type: ignore
                 )
                 continue
 
-            if not mt5.symbol_info(symbol).visible:  # type: ignore
+            if not symbol_metadata.visible:
                 if not mt5.symbol_select(symbol, True):  # type: ignore
                     print(
                         f"No se ha podido añadir el símbol {symbol} al MarketWatch: {mt5.last_error()}"  # type: ignore
                     )
                 else:
                     print(f"Símbolo {symbol} se ha añadido con éxito al MarketWatch!")
+                    self.symbol_registry.refresh([symbol])
             else:
                 print(f"El símbolo {symbol} ya estaba en el MarketWatch.")
 
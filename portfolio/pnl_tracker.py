@@ -0,0 +1,300 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Union
+
+import numpy as np
+import MetaTrader5 as mt5
+
+from account_state.account_state import AccountStateService
+from symbol_registry.symbol_registry import SymbolRegistry
+from events.events import DealEntry, ExecutionEvent, SignalType
+from portfolio.position_book import BookPosition, VOLUME_TOLERANCE
+from utils.ring_buffer import RingBuffer
+from utils.utils import Utils
+
+EQUITY_CURVE_DTYPE = np.dtype(
+    [
+        ("time", "datetime64[ms]"),
+        ("realized", np.float64),
+        ("unrealized", np.float64),
+        ("equity", np.float64),
+        ("drawdown", np.float64),
+    ]
+)
+
+
+class StrategyPnL(NamedTuple):
+    realized: float
+    unrealized: float
+    equity: float
+    drawdown: float
+    max_drawdown: float
+
+
+class PnLTracker:
+    """
+    Keeps the realized and unrealized PnL (in account currency) and the equity
+    curve of every magic number. Fills update the open lots and the realized PnL;
+    quotes update the prices, and all lots are marked to market at once
+    """
+
+    def __init__(
+        self,
+        account_state: AccountStateService,
+        symbol_registry: SymbolRegistry,
+        curve_capacity: int = 100_000,
+    ) -> None:
+        self.account_state = account_state
+        self.symbol_registry = symbol_registry
+        self.curve_capacity = curve_capacity
+
+        # Per symbol data: last price, contract size and profit -> account ccy rate
+        self._symbol_index: Dict[str, int] = {}
+        self._prices = np.zeros(0)
+        self._contract_sizes = np.zeros(0)
+        self._fx_rates = np.ones(0)
+        self._profit_ccys: List[str] = []
+
+        # Per magic data: realized PnL, equity peak and max drawdown
+        self._magic_index: Dict[int, int] = {}
+        self._realized = np.zeros(0)
+        self._peak_equity = np.zeros(0)
+        self._max_drawdown = np.zeros(0)
+        self._equity_curves: Dict[int, RingBuffer] = {}
+
+        # Open lots, one row per position (signed units: negative for shorts)
+        self._lot_row: Dict[int, int] = {}
+        self._lot_tickets = np.zeros(0, dtype=np.int64)
+        self._lot_symbols = np.zeros(0, dtype=np.int64)
+        self._lot_magics = np.zeros(0, dtype=np.int64)
+        self._lot_units = np.zeros(0)
+        self._lot_prices = np.zeros(0)
+        self._num_lots = 0
+
+    def _get_symbol_index(self, symbol: str) -> int:
+        index = self._symbol_index.get(symbol)
+        if index is not None:
+            return index
+
+        symbol_info = self.symbol_registry.get(symbol)
+        contract_size = (
+            symbol_info.trade_contract_size if symbol_info is not None else 1.0
+        )
+        index = len(self._symbol_index)
+        self._symbol_index[symbol] = index
+        self._prices = np.append(self._prices, np.nan)
+        self._contract_sizes = np.append(self._contract_sizes, contract_size)
+        self._fx_rates = np.append(self._fx_rates, 1.0)
+        self._profit_ccys.append(
+            symbol_info.currency_profit if symbol_info is not None else ""
+        )
+        self._refresh_fx_rates()
+        return index
+
+    def _refresh_fx_rates(self) -> None:
+        """
+        Takes the profit currency -> account currency rates of every symbol
+        from the currency converter cache (keeping the last known rate of the
+        symbols that cannot be converted now)
+        """
+        fx_rates = Utils.get_currency_converter().rates(
+            self._profit_ccys, self.account_state.currency, default=np.nan
+        )
+        self._fx_rates = np.where(np.isnan(fx_rates), self._fx_rates, fx_rates)
+
+    def _get_magic_index(self, magic: int) -> int:
+        index = self._magic_index.get(magic)
+        if index is not None:
+            return index
+
+        index = len(self._magic_index)
+        self._magic_index[magic] = index
+        self._realized = np.append(self._realized, 0.0)
+        self._peak_equity = np.append(self._peak_equity, 0.0)
+        self._max_drawdown = np.append(self._max_drawdown, 0.0)
+        self._equity_curves[magic] = RingBuffer(
+            EQUITY_CURVE_DTYPE, self.curve_capacity
+        )
+        return index
+
+    def _open_lot(
+        self, ticket: int, symbol: str, magic: int, units: float, price: float
+    ) -> None:
+        if self._num_lots == self._lot_units.size:
+            new_size = max(16, 2 * self._num_lots)
+            self._lot_tickets = np.resize(self._lot_tickets, new_size)
+            self._lot_symbols = np.resize(self._lot_symbols, new_size)
+            self._lot_magics = np.resize(self._lot_magics, new_size)
+            self._lot_units = np.resize(self._lot_units, new_size)
+            self._lot_prices = np.resize(self._lot_prices, new_size)
+
+        row = self._num_lots
+        self._lot_tickets[row] = ticket
+        self._lot_symbols[row] = self._get_symbol_index(symbol)
+        self._lot_magics[row] = self._get_magic_index(magic)
+        self._lot_units[row] = units
+        self._lot_prices[row] = price
+        self._lot_row[ticket] = row
+        self._num_lots += 1
+
+    def _close_lot(self, ticket: int) -> None:
+        # Move the last lot to the freed row to keep the arrays compact
+        row = self._lot_row.pop(ticket)
+        last = self._num_lots - 1
+        if row != last:
+            for array in (
+                self._lot_tickets,
+                self._lot_symbols,
+                self._lot_magics,
+                self._lot_units,
+                self._lot_prices,
+            ):
+                array[row] = array[last]
+            self._lot_row[int(self._lot_tickets[row])] = row
+        self._num_lots = last
+
+    def _realize(self, row: int, units: float, price: float) -> None:
+        """
+        Realizes the PnL of closing units (same sign as the lot) of the lot at price
+        """
+        symbol_index = self._lot_symbols[row]
+        pnl = (price - self._lot_prices[row]) * units * self._fx_rates[symbol_index]
+        self._realized[self._lot_magics[row]] += pnl
+
+    def on_execution_event(self, event: ExecutionEvent) -> None:
+        """
+        Updates the open lots and the realized PnL with a fill
+        """
+        symbol_index = self._get_symbol_index(event.symbol)
+        self._refresh_fx_rates()
+
+        price = float(event.fill_price)
+        sign = 1.0 if event.signal == SignalType.BUY else -1.0
+        units = sign * float(event.volume) * self._contract_sizes[symbol_index]
+        if np.isnan(self._prices[symbol_index]):
+            self._prices[symbol_index] = price
+
+        row = self._lot_row.get(event.position_id)
+
+        if event.entry == DealEntry.IN:
+            if row is None:
+                self._open_lot(
+                    event.position_id, event.symbol, event.magic_number, units, price
+                )
+            else:
+                # Increase of an existing position (netting accounts): weighted open price
+                total_units = self._lot_units[row] + units
+                self._lot_prices[row] = (
+                    self._lot_prices[row] * self._lot_units[row] + price * units
+                ) / total_units
+                self._lot_units[row] = total_units
+            return
+
+        if row is None:
+            return
+
+        # OUT, OUT_BY or INOUT: the fill closes (part of) the lot
+        lot_units = self._lot_units[row]
+        closed_units = lot_units if abs(units) >= abs(lot_units) else -units
+        self._realize(row, closed_units, price)
+        remaining_units = lot_units - closed_units
+
+        if event.entry == DealEntry.INOUT:
+            # Reversal: the volume left is opened on the other side
+            remaining_units = units + lot_units
+            self._lot_prices[row] = price
+
+        if abs(remaining_units) <= VOLUME_TOLERANCE:
+            self._close_lot(event.position_id)
+        else:
+            self._lot_units[row] = remaining_units
+
+    def reset_positions(self, positions: Iterable[BookPosition]) -> None:
+        """
+        Rebuilds the open lots from a set of positions (i.e. after a reconciliation)
+        """
+        self._lot_row = {}
+        self._num_lots = 0
+        for position in positions:
+            symbol_index = self._get_symbol_index(position.symbol)
+            sign = 1.0 if position.type == mt5.POSITION_TYPE_BUY else -1.0
+            units = sign * position.volume * self._contract_sizes[symbol_index]
+            self._open_lot(
+                position.ticket,
+                position.symbol,
+                position.magic,
+                units,
+                position.price_open,
+            )
+
+    def on_quote(self, symbol: str, price: float) -> None:
+        """
+        Updates the last known price of a symbol already tracked
+        """
+        index = self._symbol_index.get(symbol)
+        if index is not None:
+            self._prices[index] = price
+
+    def mark_to_market(self, time: Union[datetime, None] = None) -> None:
+        """
+        Marks every open lot to the last known prices in a single step and
+        appends a point to the equity curve of every magic number
+        """
+        num_magics = len(self._magic_index)
+        if num_magics == 0:
+            return
+
+        self._refresh_fx_rates()
+        n = self._num_lots
+        symbols = self._lot_symbols[:n]
+        lot_pnl = (
+            (self._prices[symbols] - self._lot_prices[:n])
+            * self._lot_units[:n]
+            * self._fx_rates[symbols]
+        )
+        unrealized = np.bincount(
+            self._lot_magics[:n], weights=np.nan_to_num(lot_pnl), minlength=num_magics
+        )
+        equity = self._realized + unrealized
+        self._peak_equity = np.maximum(self._peak_equity, equity)
+        drawdown = self._peak_equity - equity
+        self._max_drawdown = np.maximum(self._max_drawdown, drawdown)
+
+        timestamp = np.datetime64(time or datetime.now(), "ms")
+        for magic, index in self._magic_index.items():
+            self._equity_curves[magic].append(
+                (
+                    timestamp,
+                    self._realized[index],
+                    unrealized[index],
+                    equity[index],
+                    drawdown[index],
+                )
+            )
+
+    def get_pnl(self, magic: int) -> StrategyPnL:
+        """
+        Returns the PnL figures of magic as of the last mark to market
+        """
+        curve = self._equity_curves.get(magic)
+        last_point = curve.last() if curve is not None else None
+        if last_point is None:
+            index = self._magic_index.get(magic)
+            realized = float(self._realized[index]) if index is not None else 0.0
+            return StrategyPnL(realized, 0.0, realized, 0.0, 0.0)
+
+        return StrategyPnL(
+            realized=float(last_point["realized"]),
+            unrealized=float(last_point["unrealized"]),
+            equity=float(last_point["equity"]),
+            drawdown=float(last_point["drawdown"]),
+            max_drawdown=float(self._max_drawdown[self._magic_index[magic]]),
+        )
+
+    def get_equity_curve(self, magic: int) -> np.ndarray:
+        """
+        Returns the equity curve of magic (time, realized, unrealized, equity, drawdown)
+        """
+        curve = self._equity_curves.get(magic)
+        if curve is None:
+            return np.zeros(0, dtype=EQUITY_CURVE_DTYPE)
+        return curve.to_array()
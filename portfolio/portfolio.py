@@ -1,49 +1,129 @@
-from typing import Tuple, Dict
+import time
+from typing import List, Tuple, Dict, Union
 import MetaTrader5 as mt5
 
+from account_state.account_state import AccountStateService
+from events.events import DataEvent, ExecutionEvent
+from portfolio.pnl_tracker import PnLTracker, StrategyPnL
+from portfolio.position_book import BookPosition, PositionBook
+from symbol_registry.symbol_registry import SymbolRegistry
+from utils.utils import Utils
+
 
 class Portfolio:
-    def __init__(self, magic_number: int):
+    def __init__(
+        self,
+        magic_number: int,
+        account_state: AccountStateService,
+        symbol_registry: SymbolRegistry,
+        reconciliation_interval: float = 60.0,
+    ):
         self.magic = magic_number
 
-    def get_open_positions(self) -> Tuple[str, int]:
-        return mt5.positions_get()  # type: ignore
+        # Local book of open positions, fed by the ExecutionEvents and
+        # reconciled against the broker every reconciliation_interval seconds
+        self.position_book = PositionBook()
+        self.reconciliation_interval = reconciliation_interval
+        self._next_reconciliation_time = 0.0
 
-    def get_strategy_open_positions(self) -> Tuple[str, int]:
-        positions = []
-        for position in self.get_open_positions():
-            if position.magic == self.magic:  # type: ignore
-                positions.append(position)
+        # Realized/unrealized PnL and equity curve of every magic number
+        self.pnl_tracker = PnLTracker(account_state, symbol_registry)
 
-        return tuple(positions)  # type: ignore
+    def on_execution_event(self, event: ExecutionEvent) -> None:
+        """
+        Updates the position book and the PnL with a fill (or with every
+        fill of an aggregated execution)
+        """
+        for fill in event.legs or [event]:
+            self.pnl_tracker.on_execution_event(fill)
 
-    def get_number_of_open_positions_by_symbol(self, symbol: str) -> Dict[str, int]:
-        positions_tuple = mt5.positions_get(symbol=symbol)  # type: ignore
+            if not self.position_book.apply_execution_event(fill):
+                print(
+                    f"[{Utils.dateprint()}] - PORTFOLIO: Fill of position {fill.position_id} on {fill.symbol} could not be applied to the position book. Reconciliation requested"
+                )
+                self.request_reconciliation()
+
+    def request_reconciliation(self) -> None:
+        """
+        Forces a reconciliation with the broker on the next lookup
+        """
+        self._next_reconciliation_time = 0.0
+
+    def reconcile(self) -> None:
+        """
+        Reconciles the position book against the positions reported by the broker
+        """
+        self._next_reconciliation_time = time.monotonic() + self.reconciliation_interval
+
+        broker_positions = mt5.positions_get()  # type: ignore
+        if broker_positions is None:
+            print(
+                f"[{Utils.dateprint()}] - PORTFOLIO: Unable to retrieve the open positions for reconciliation - MT5 error: {mt5.last_error()}"  # type: ignore
+            )
+            self.request_reconciliation()
+            return
+
+        drifts = self.position_book.reconcile(broker_positions)  # type: ignore
+        for drift in drifts:
+            print(f"[{Utils.dateprint()}] - PORTFOLIO: Reconciliation drift: {drift}")
+
+        if drifts:
+            self.pnl_tracker.reset_positions(self.position_book.positions())
+
+    def on_data_events(self, data_events: List[DataEvent]) -> None:
+        """
+        Marks the open positions to market with the closes of new bars
+        """
+        for data_event in data_events:
+            self.pnl_tracker.on_quote(data_event.symbol, data_event.data.close)  # type: ignore
 
-        longs = 0
-        shorts = 0
+        self.pnl_tracker.mark_to_market(data_events[-1].data.name)  # type: ignore
 
-        for position in positions_tuple:  # type: ignore
-            if position.type == mt5.ORDER_TYPE_BUY:
-                longs += 1
-            elif position.type == mt5.ORDER_TYPE_SELL:
-                shorts += 1
+    def get_strategy_pnl(self) -> StrategyPnL:
+        return self.pnl_tracker.get_pnl(self.magic)
+
+    def _reconcile_if_due(self) -> None:
+        if time.monotonic() >= self._next_reconciliation_time:
+            self.reconcile()
+
+    def get_open_positions(self) -> Tuple[BookPosition, ...]:
+        self._reconcile_if_due()
+        return self.position_book.positions()
+
+    def get_positions(
+        self,
+        symbol: Union[str, None] = None,
+        magic: Union[int, None] = None,
+        side: Union[int, None] = None,
+    ) -> Tuple[BookPosition, ...]:
+        """
+        Open positions that match the filter (None matches any value)
+        """
+        self._reconcile_if_due()
+        return self.position_book.positions(symbol=symbol, magic=magic, side=side)
+
+    def get_strategy_open_positions(self) -> Tuple[BookPosition, ...]:
+        self._reconcile_if_due()
+        return self.position_book.positions(magic=self.magic)
+
+    def get_number_of_open_positions_by_symbol(self, symbol: str) -> Dict[str, int]:
+        self._reconcile_if_due()
+
+        longs = self.position_book.count(symbol=symbol, side=mt5.POSITION_TYPE_BUY)
+        shorts = self.position_book.count(symbol=symbol, side=mt5.POSITION_TYPE_SELL)
 
         return {"LONG": longs, "SHORT": shorts, "TOTAL": longs + shorts}
 
     def get_number_of_strategy_open_positions_by_symbol(
         self, symbol: str
     ) -> Dict[str, int]:
-        positions_tuple = mt5.positions_get(symbol=symbol)  # type: ignore
-
-        longs = 0
-        shorts = 0
+        self._reconcile_if_due()
 
-        for position in positions_tuple:  # type: ignore
-            if position.symbol == symbol:  # type: ignore
-                if position.type == mt5.ORDER_TYPE_BUY:
-                    longs += 1
-                elif position.type == mt5.ORDER_TYPE_SELL:
-                    shorts += 1
+        longs = self.position_book.count(
+            symbol=symbol, magic=self.magic, side=mt5.POSITION_TYPE_BUY
+        )
+        shorts = self.position_book.count(
+            symbol=symbol, magic=self.magic, side=mt5.POSITION_TYPE_SELL
+        )
 
         return {"LONG": longs, "SHORT": shorts, "TOTAL": longs + shorts}
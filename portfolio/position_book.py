@@ -0,0 +1,205 @@
+from itertools import product
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple, Union
+import MetaTrader5 as mt5
+
+from events.events import DealEntry, ExecutionEvent, SignalType
+
+
+class BookPosition(NamedTuple):
+    # Same field names as the MT5 TradePosition so both can be used indistinctly
+    ticket: int
+    symbol: str
+    magic: int
+    type: int
+    volume: float
+    price_open: float
+
+
+# Index key: (symbol, magic, side). None acts as a wildcard
+BookKey = Tuple[Union[str, None], Union[int, None], Union[int, None]]
+
+VOLUME_TOLERANCE = 1e-9
+
+
+class PositionBook:
+    """
+    In-memory book of open positions, indexed by every combination of
+    symbol, magic number and side so any lookup is a single dict read
+    """
+
+    def __init__(self) -> None:
+        self._positions: Dict[int, BookPosition] = {}
+        self._index: Dict[BookKey, Dict[int, BookPosition]] = {}
+
+        # Number of times the book was rebuilt from the broker
+        self.reconciliations: int = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    @staticmethod
+    def _keys(position: BookPosition) -> Iterable[BookKey]:
+        return product(
+            (position.symbol, None), (position.magic, None), (position.type, None)
+        )
+
+    def _add(self, position: BookPosition) -> None:
+        self._positions[position.ticket] = position
+        for key in self._keys(position):
+            self._index.setdefault(key, {})[position.ticket] = position
+
+    def _remove(self, ticket: int) -> Union[BookPosition, None]:
+        position = self._positions.pop(ticket, None)
+        if position is None:
+            return None
+
+        for key in self._keys(position):
+            bucket = self._index[key]
+            del bucket[ticket]
+            if not bucket:
+                del self._index[key]
+        return position
+
+    def get(self, ticket: int) -> Union[BookPosition, None]:
+        return self._positions.get(ticket)
+
+    def positions(
+        self,
+        symbol: Union[str, None] = None,
+        magic: Union[int, None] = None,
+        side: Union[int, None] = None,
+    ) -> Tuple[BookPosition, ...]:
+        """
+        Returns the open positions matching the filter (None matches anything)
+        """
+        return tuple(self._index.get((symbol, magic, side), {}).values())
+
+    def count(
+        self,
+        symbol: Union[str, None] = None,
+        magic: Union[int, None] = None,
+        side: Union[int, None] = None,
+    ) -> int:
+        """
+        Returns the number of open positions matching the filter (None matches anything)
+        """
+        return len(self._index.get((symbol, magic, side), ()))
+
+    def apply_execution_event(self, event: ExecutionEvent) -> bool:
+        """
+        Updates the book with a fill
+
+        Args:
+            event (ExecutionEvent): the fill to apply (one leg of an aggregated execution)
+
+        Returns:
+            bool: False if the fill could not be applied and the book must be reconciled
+        """
+        if event.position_id == 0:
+            return False
+
+        side = (
+            mt5.POSITION_TYPE_BUY
+            if event.signal == SignalType.BUY
+            else mt5.POSITION_TYPE_SELL
+        )
+        volume = float(event.volume)
+        price = float(event.fill_price)
+        current = self._positions.get(event.position_id)
+
+        if event.entry == DealEntry.IN:
+            if current is None:
+                self._add(
+                    BookPosition(
+                        event.position_id,
+                        event.symbol,
+                        event.magic_number,
+                        side,
+                        volume,
+                        price,
+                    )
+                )
+                return True
+            if current.type != side:
+                return False
+            # Increase of an existing position (netting accounts): weighted open price
+            total_volume = current.volume + volume
+            price_open = (
+                current.price_open * current.volume + price * volume
+            ) / total_volume
+            self._remove(current.ticket)
+            self._add(current._replace(volume=total_volume, price_open=price_open))
+            return True
+
+        if current is None:
+            return False
+
+        if event.entry == DealEntry.INOUT:
+            # Reversal (netting accounts): the remaining volume is opened on the other side
+            self._remove(current.ticket)
+            remaining_volume = volume - current.volume
+            if remaining_volume > VOLUME_TOLERANCE:
+                self._add(
+                    current._replace(
+                        type=side, volume=remaining_volume, price_open=price
+                    )
+                )
+            return True
+
+        # OUT or OUT_BY: (partial) close of the position
+        self._remove(current.ticket)
+        remaining_volume = current.volume - volume
+        if remaining_volume > VOLUME_TOLERANCE:
+            self._add(current._replace(volume=remaining_volume))
+        return True
+
+    def reconcile(self, broker_positions: Iterable[Any]) -> List[str]:
+        """
+        Replaces the content of the book with the positions reported by the broker
+
+        Args:
+            broker_positions (Iterable[Any]): MT5 TradePosition objects
+
+        Returns:
+            List[str]: description of every difference found (drift)
+        """
+        broker_book: Dict[int, BookPosition] = {
+            position.ticket: BookPosition(
+                position.ticket,
+                position.symbol,
+                position.magic,
+                position.type,
+                position.volume,
+                position.price_open,
+            )
+            for position in broker_positions
+        }
+
+        drift: List[str] = []
+        for ticket, position in self._positions.items():
+            broker_position = broker_book.get(ticket)
+            if broker_position is None:
+                drift.append(
+                    f"position {ticket} {position.symbol} vol {position.volume} is not open in the broker"
+                )
+            elif (
+                abs(broker_position.volume - position.volume) > VOLUME_TOLERANCE
+                or broker_position.type != position.type
+            ):
+                drift.append(
+                    f"position {ticket} {position.symbol} is type {position.type} vol {position.volume} in the book but type {broker_position.type} vol {broker_position.volume} in the broker"
+                )
+        for ticket, broker_position in broker_book.items():
+            if ticket not in self._positions:
+                drift.append(
+                    f"position {ticket} {broker_position.symbol} vol {broker_position.volume} is missing from the book"
+                )
+
+        # Rebuild the book from the broker data
+        self._positions = {}
+        self._index = {}
+        for position in broker_book.values():
+            self._add(position)
+        self.reconciliations += 1
+
+        return drift
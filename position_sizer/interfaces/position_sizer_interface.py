@@ -1,9 +1,13 @@
+from __future__ import annotations
+
 from decimal import Decimal
-from typing import Protocol, Union
+from typing import TYPE_CHECKING, Protocol, Union
 
-from data_provider.data_provider import DataProvider
 from events.events import SignalEvent
 
+if TYPE_CHECKING:
+    from data_provider.data_provider import DataProvider
+
 
 class IPositionSizer(Protocol):
     def size_signal(
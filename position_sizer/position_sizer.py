@@ -1,7 +1,7 @@
 from decimal import Decimal
 from queue import Queue
 from typing import Any
-import MetaTrader5 as mt5
+from account_state.account_state import AccountStateService
 from data_provider.data_provider import DataProvider
 from events.events import SignalEvent, SizingEvent
 
@@ -25,9 +25,11 @@ class PositionSizer(IPositionSizer):
         events_queue: Queue[Any],
         data_provider: DataProvider,
         sizing_properties: BaseSizerProps,
+        account_state: AccountStateService,
     ) -> None:  # type: ignore
         self.events_queue = events_queue
         self.data_provider = data_provider
+        self.account_state = account_state
 
         self.position_sizing_method = self._get_position_sizing_method(
             sizing_properties
@@ -51,12 +53,20 @@ class PositionSizer(IPositionSizer):
         elif isinstance(sizing_properties, FixedSizingProps):
             return FixedSizePositionSizer(sizing_properties)
         elif isinstance(sizing_properties, RiskPctSizingProps):
-            return RiskPctPositionSizer(sizing_properties)
+            return RiskPctPositionSizer(sizing_properties, self.account_state)
 
         raise ValueError(
             f"ERROR: Position sizer method not recognized. Please check the properties passed {sizing_properties}"
         )
 
+    def update_properties(self, sizing_properties: BaseSizerProps) -> None:
+        """
+        Replaces the position sizing method
+        """
+        self.position_sizing_method = self._get_position_sizing_method(
+            sizing_properties
+        )
+
     def _create_and_put_sizing_event(
         self, signal_event: SignalEvent, volume: Decimal
     ) -> None:
@@ -76,6 +86,9 @@ class PositionSizer(IPositionSizer):
             sl=signal_event.sl,
             tp=signal_event.tp,
             volume=volume,
+            signal_time=signal_event.signal_time,
+            reference_price=signal_event.reference_price,
+            generated_time=signal_event.generated_time,
         )
 
         # Put sizing event in the events queue
@@ -88,9 +101,15 @@ class PositionSizer(IPositionSizer):
         )  # Use the appropiate position sizing metho
 
         # Safety controls
-        if volume < mt5.symbol_info(signal_event.symbol).volume_min:  # type: ignore
+        symbol_metadata = self.data_provider.symbol_registry.get(signal_event.symbol)
+        if symbol_metadata is None:
+            print(f"ERROR. Symbol {signal_event.symbol} not found")
+            return
+        # The float minimum is compared through its decimal representation
+        # (Decimal("0.01") < 0.01 is True)
+        if volume < Decimal(str(symbol_metadata.volume_min)):  # type: ignore
             print(
-                f"ERROR. Volume calculated {volume} is lower than the minimum volume allowed {mt5.symbol_info(signal_event.symbol).volume_min} by symbol {signal_event.symbol}"  # type: ignore
+                f"ERROR. Volume calculated {volume} is lower than the minimum volume allowed {symbol_metadata.volume_min} by symbol {signal_event.symbol}"  # type: ignore
             )  # type: ignore
             return
         # Put volume in a sizing event and add event to the events queue
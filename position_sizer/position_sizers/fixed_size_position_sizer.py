@@ -1,10 +1,15 @@
+from __future__ import annotations
+
 from decimal import Decimal
+from typing import TYPE_CHECKING
 
-from data_provider.data_provider import DataProvider
 from events.events import SignalEvent
 from position_sizer.interfaces.position_sizer_interface import IPositionSizer
 from position_sizer.properties.position_sizer_properties import FixedSizingProps
 
+if TYPE_CHECKING:
+    from data_provider.data_provider import DataProvider
+
 
 class FixedSizePositionSizer(IPositionSizer):
     def __init__(self, properties: FixedSizingProps):
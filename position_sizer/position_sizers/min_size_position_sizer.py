@@ -1,20 +1,24 @@
+from __future__ import annotations
+
 from decimal import Decimal
-import MetaTrader5 as mt5
+from typing import TYPE_CHECKING
 
-from data_provider.data_provider import DataProvider
 from events.events import SignalEvent
 from position_sizer.interfaces.position_sizer_interface import IPositionSizer
 
+if TYPE_CHECKING:
+    from data_provider.data_provider import DataProvider
+
 
 class MinSizePositionSizer(IPositionSizer):
     def size_signal(
         self, signal_event: SignalEvent, data_provider: DataProvider
     ) -> Decimal:
         symbol = signal_event.symbol
-        volume: float = mt5.symbol_info(symbol).volume_min  # type: ignore
+        symbol_metadata = data_provider.symbol_registry.get(symbol)
 
-        if volume is not None:
-            return Decimal(volume)  # type: ignore
+        if symbol_metadata is not None:
+            return Decimal(symbol_metadata.volume_min)  # type: ignore
 
         print(
             f"ERROR (MinSizePositionSizer): Could not determine minimum volume for {symbol}"
@@ -1,16 +1,24 @@
+from __future__ import annotations
+
 from decimal import Decimal
-import MetaTrader5 as mt5
+from typing import TYPE_CHECKING
 
+from account_state.account_state import AccountStateService
 from utils.utils import Utils
-from data_provider.data_provider import DataProvider
 from events.events import SignalEvent
 from position_sizer.interfaces.position_sizer_interface import IPositionSizer
 from position_sizer.properties.position_sizer_properties import RiskPctSizingProps
 
+if TYPE_CHECKING:
+    from data_provider.data_provider import DataProvider
+
 
 class RiskPctPositionSizer(IPositionSizer):
-    def __init__(self, properties: RiskPctSizingProps):
+    def __init__(
+        self, properties: RiskPctSizingProps, account_state: AccountStateService
+    ):
         self.risk_pct = properties.risk_pct
+        self.account_state = account_state
 
     def size_signal(
         self, signal_event: SignalEvent, data_provider: DataProvider
@@ -28,10 +36,20 @@ class RiskPctPositionSizer(IPositionSizer):
                 f"ERROR (FixedPctPositionSizer): The Stop Loss value {signal_event} is not valid"
             )
             return Decimal(0.0)
-        # Access the account information (currency)
-        account_info = mt5.account_info()  # type: ignore
+        # Access the account information (equity and currency)
+        account_info = self.account_state.get_snapshot()
+        if account_info is None:
+            print(
+                "ERROR (FixedPctPositionSizer): The account information is not available"
+            )
+            return Decimal(0.0)
         # Accces the symbol information (to be able to calculate the risk)
-        symbol_info = mt5.symbol_info(signal_event.symbol)  # type: ignore
+        symbol_info = data_provider.symbol_registry.get(signal_event.symbol)
+        if symbol_info is None:
+            print(
+                f"ERROR (FixedPctPositionSizer): The symbol {signal_event.symbol} was not found"
+            )
+            return Decimal(0.0)
 
         # Retrieve the entry price (from the event type (MARKET or PENDING))
 
@@ -0,0 +1,184 @@
+"""
+Startup profile of the framework: import time of every module (measured in a
+fresh interpreter with -X importtime) and construction time of every
+component built by trading_app.main, which is stopped before the main loop.
+
+    python -m profiling.startup_profiler [--replay session.mt5rec] [--top 20]
+
+With --replay, the MT5 calls are served from a recording (see mt5_replay), so
+the startup can be profiled without the terminal
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, NamedTuple, Union
+
+# Packages of the framework, which are reported apart from the third-party ones
+FRAMEWORK_PACKAGES = (
+    "account_state",
+    "data_provider",
+    "events",
+    "mt5_replay",
+    "notifications",
+    "order_executor",
+    "platform_connector",
+    "portfolio",
+    "position_sizer",
+    "risk_manager",
+    "signal_generator",
+    "symbol_registry",
+    "trading_app",
+    "trading_director",
+    "utils",
+)
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_ms: float
+    cumulative_ms: float
+    depth: int
+
+
+def profile_imports(module: str = "trading_app") -> List[ImportTiming]:
+    """
+    Imports module in a fresh interpreter and returns the import time of every
+    module loaded, in import order
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise ValueError(f"ERROR: Unable to import {module}:\n{process.stderr}")
+
+    timings: List[ImportTiming] = []
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        timings.append(
+            ImportTiming(
+                module=name.strip(),
+                self_ms=int(self_us) / 1000,
+                cumulative_ms=int(cumulative_us) / 1000,
+                # Nesting level of the import (two spaces per level)
+                depth=(len(name) - len(name.lstrip()) - 1) // 2,
+            )
+        )
+    return timings
+
+
+def profile_initialization(
+    replay_path: Union[str, None] = None,
+) -> Dict[str, float]:
+    """
+    Runs trading_app.main up to the main loop and returns the construction
+    time (ms) of every component, plus the total under "main"
+    """
+    if replay_path:
+        from mt5_replay.replayer import Mt5Replayer
+
+        Mt5Replayer(replay_path).install()
+
+    import trading_app
+
+    timings: Dict[str, float] = defaultdict(float)
+
+    def timed(name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        def timed_call(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timings[name] += (time.perf_counter() - start) * 1000
+
+        return timed_call
+
+    # Components of the framework created by main (the pydantic properties are skipped)
+    components = [
+        value
+        for value in vars(trading_app).values()
+        if isinstance(value, type)
+        and value.__module__.split(".")[0] in FRAMEWORK_PACKAGES
+        and not hasattr(value, "model_fields")
+    ]
+    originals = {component: component.__init__ for component in components}
+    original_execute = trading_app.TradingDirector.execute
+    try:
+        for component in components:
+            component.__init__ = timed(component.__name__, component.__init__)  # type: ignore
+        trading_app.TradingDirector.execute = lambda self: None  # type: ignore
+        timed("main", trading_app.main)()
+    finally:
+        for component, init in originals.items():
+            component.__init__ = init  # type: ignore
+        trading_app.TradingDirector.execute = original_execute  # type: ignore
+
+    return dict(timings)
+
+
+def report(
+    imports: List[ImportTiming], initialization: Dict[str, float], top: int = 20
+) -> str:
+    total_import_ms = sum(timing.self_ms for timing in imports)
+    lines = [
+        f"STARTUP PROFILE: {total_import_ms:.1f} ms importing {len(imports)} modules"
+    ]
+
+    # Import time of every top-level package (self times, so nothing is counted twice)
+    by_package: Dict[str, float] = defaultdict(float)
+    for timing in imports:
+        by_package[timing.module.split(".")[0]] += timing.self_ms
+    lines.append("  Import time by package:")
+    for package, package_ms in sorted(by_package.items(), key=lambda item: -item[1])[
+        :top
+    ]:
+        tag = " (framework)" if package in FRAMEWORK_PACKAGES else ""
+        lines.append(f"    {package_ms:8.1f} ms  {package}{tag}")
+
+    lines.append("  Slowest framework modules (cumulative import time):")
+    framework_imports = [
+        timing
+        for timing in imports
+        if timing.module.split(".")[0] in FRAMEWORK_PACKAGES
+    ]
+    for timing in sorted(framework_imports, key=lambda timing: -timing.cumulative_ms)[
+        :top
+    ]:
+        lines.append(f"    {timing.cumulative_ms:8.1f} ms  {timing.module}")
+
+    if initialization:
+        lines.append(
+            f"  Initialization: {initialization.get('main', 0.0):.1f} ms up to the main loop"
+        )
+        for name, init_ms in sorted(initialization.items(), key=lambda item: -item[1]):
+            if name != "main":
+                lines.append(f"    {init_ms:8.1f} ms  {name}")
+
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Startup profile of the framework")
+    parser.add_argument(
+        "--replay", default=None, help="MT5 recording to serve the MT5 calls from"
+    )
+    parser.add_argument(
+        "--imports-only", action="store_true", help="Skip the initialization profile"
+    )
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    imports = profile_imports()
+    initialization = {} if args.imports_only else profile_initialization(args.replay)
+    print(report(imports, initialization, args.top))
+
+
+if __name__ == "__main__":
+    main()
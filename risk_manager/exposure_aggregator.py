@@ -0,0 +1,154 @@
+from decimal import Decimal
+from typing import Dict, List
+import numpy as np
+import MetaTrader5 as mt5
+
+from account_state.account_state import AccountStateService
+from data_provider.data_provider import DataProvider
+from events.events import ExecutionEvent
+from portfolio.portfolio import Portfolio
+from utils.utils import Utils
+
+
+class ExposureAggregator:
+    """
+    Net signed units (volume x contract size) held by the strategy in every
+    symbol. The whole book is valued in account currency as the dot product
+    of the units vector and the price x FX rate vector. It is only used by
+    the trading director thread (the fills reach it through the events queue)
+    """
+
+    def __init__(
+        self,
+        portfolio: Portfolio,
+        data_provider: DataProvider,
+        account_state: AccountStateService,
+    ) -> None:
+        self.portfolio = portfolio
+        self.data_provider = data_provider
+        self.account_state = account_state
+
+        self._symbol_index: Dict[str, int] = {}
+        self._units = np.zeros(0)
+        self._prices = np.zeros(0)
+        self._fx_rates = np.zeros(0)
+        self._profit_ccys: List[str] = []
+
+        # Position book reconciliations already taken into account
+        self._reconciliations_seen = -1
+
+    def _get_symbol_index(self, symbol: str) -> int:
+        index = self._symbol_index.get(symbol)
+        if index is not None:
+            return index
+
+        index = len(self._symbol_index)
+        self._symbol_index[symbol] = index
+        self._units = np.append(self._units, 0.0)
+        self._prices = np.append(self._prices, np.nan)
+        self._fx_rates = np.append(self._fx_rates, np.nan)
+        symbol_info = self.data_provider.symbol_registry.get(symbol)
+        self._profit_ccys.append(
+            symbol_info.currency_profit if symbol_info is not None else ""
+        )
+        return index
+
+    def _contract_size(self, symbol: str) -> float:
+        symbol_info = self.data_provider.symbol_registry.get(symbol)
+        return symbol_info.trade_contract_size if symbol_info is not None else 0.0
+
+    def _refresh_symbol(self, symbol: str) -> None:
+        """
+        Recomputes the net units of symbol from the position book
+        """
+        net_volume = 0.0
+        for position in self.portfolio.position_book.positions(
+            symbol=symbol, magic=self.portfolio.magic
+        ):
+            net_volume += (
+                position.volume
+                if position.type == mt5.POSITION_TYPE_BUY
+                else -position.volume
+            )
+        index = self._get_symbol_index(symbol)
+        self._units[index] = net_volume * self._contract_size(symbol)
+
+    def _resync_if_reconciled(self) -> None:
+        """
+        Rebuilds every net position if the book was reconciled since the last look
+        """
+        # Looking up the strategy positions triggers the reconciliation when due
+        positions = self.portfolio.get_strategy_open_positions()
+        if self.portfolio.position_book.reconciliations == self._reconciliations_seen:
+            return
+
+        self._reconciliations_seen = self.portfolio.position_book.reconciliations
+        self._units[:] = 0.0
+        for symbol in {position.symbol for position in positions}:
+            self._refresh_symbol(symbol)
+
+    def _refresh_fx_rates(self) -> None:
+        """
+        Takes the profit currency -> account currency rates of every symbol
+        from the currency converter cache (NaN if they cannot be converted)
+        """
+        self._fx_rates = Utils.get_currency_converter().rates(
+            self._profit_ccys, self.account_state.currency, default=np.nan
+        )
+
+    def _update_price(self, index: int, symbol: str) -> None:
+        tick = self.data_provider.get_latest_tick(symbol)
+        if tick:
+            self._prices[index] = tick["bid"]
+
+    def on_execution_event(self, event: ExecutionEvent) -> None:
+        """
+        Updates the net position of the symbol filled (the position book
+        must already include the fill)
+        """
+        self._refresh_symbol(event.symbol)
+
+    def on_quote(self, symbol: str, price: float) -> None:
+        # The index first: a new symbol reallocates the arrays
+        index = self._get_symbol_index(symbol)
+        self._prices[index] = price
+
+    def _complete_valuation_data(self, indices: np.ndarray) -> None:
+        """
+        Retrieves the prices never seen for the given symbols and refreshes the FX rates
+        """
+        symbols = list(self._symbol_index)
+        for index in indices[np.isnan(self._prices[indices])]:
+            self._update_price(int(index), symbols[index])
+        self._refresh_fx_rates()
+
+    def position_value(self, symbol: str, volume: float) -> Decimal:
+        """
+        Value in account currency of a signed volume (negative for shorts) of symbol
+        """
+        index = self._get_symbol_index(symbol)
+        self._complete_valuation_data(np.array([index]))
+
+        value = volume * self._contract_size(symbol) * self._prices[index]
+        value *= self._fx_rates[index]
+        return Decimal(float(np.nan_to_num(value)))
+
+    def total_value(self) -> Decimal:
+        """
+        Net value in account currency of every position held by the strategy
+        """
+        self._resync_if_reconciled()
+        self._complete_valuation_data(np.flatnonzero(self._units))
+
+        value = np.dot(self._units, np.nan_to_num(self._prices * self._fx_rates))
+        return Decimal(float(value))
+
+    def values_by_symbol(self) -> Dict[str, float]:
+        """
+        Net value in account currency of the position held in every symbol
+        """
+        self._resync_if_reconciled()
+        self._complete_valuation_data(np.flatnonzero(self._units))
+
+        values = self._units * np.nan_to_num(self._prices * self._fx_rates)
+        return dict(zip(self._symbol_index, values.tolist()))
@@ -1,9 +1,26 @@
 from decimal import Decimal
-from typing import Protocol, Union
+from typing import List, Protocol, Union, runtime_checkable
 
-from events.events import SizingEvent
+from events.events import DataEvent, SizingEvent
 
 
 class IRiskManager(Protocol):
     def assess_order(self, sizing_event: SizingEvent) -> Union[Decimal, None]:
         ...
+
+
+@runtime_checkable
+class IBatchRiskManager(Protocol):
+    def assess_orders(
+        self,
+        sizing_events: List[SizingEvent],
+        current_positions_value_acc_ccy: Decimal,
+        new_positions_value_acc_ccy: List[Decimal],
+    ) -> List[Decimal]:
+        ...
+
+
+@runtime_checkable
+class IMarketDataRiskManager(Protocol):
+    def on_data_events(self, data_events: List[DataEvent]) -> None:
+        ...
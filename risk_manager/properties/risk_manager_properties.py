@@ -1,10 +1,26 @@
 from decimal import Decimal
+from enum import StrEnum
 from pydantic import BaseModel
 
 
+class BatchAllocationPolicy(StrEnum):
+    # Orders are accepted in arrival order while they fit the budget
+    FIRST_COME = "FIRST_COME"
+    # All the orders are scaled down by the same factor to fit the budget
+    PROPORTIONAL = "PROPORTIONAL"
+
+
 class BaseRiskProps(BaseModel):
     pass
 
 
 class MaxLeverageFactorRiskProps(BaseRiskProps):
     max_leverage_factor: Decimal
+    batch_allocation_policy: BatchAllocationPolicy = BatchAllocationPolicy.FIRST_COME
+
+
+class VaRRiskProps(BaseRiskProps):
+    max_var_pct: Decimal
+    confidence_level: Decimal = Decimal("0.99")
+    window: int = 250
+    min_observations: int = 30
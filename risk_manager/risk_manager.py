@@ -1,19 +1,31 @@
 from decimal import Decimal
 from queue import Queue
-from typing import Any
-import MetaTrader5 as mt5
+from typing import Any, List
+from account_state.account_state import AccountStateService
 from data_provider.data_provider import DataProvider
-from events.events import OrderEvent, SizingEvent
+from events.events import (
+    DataEvent,
+    ExecutionEvent,
+    OrderEvent,
+    SignalType,
+    SizingEvent,
+)
 from portfolio.portfolio import Portfolio
-from risk_manager.interfaces.risk_manager_interface import IRiskManager
+from risk_manager.exposure_aggregator import ExposureAggregator
+from risk_manager.interfaces.risk_manager_interface import (
+    IBatchRiskManager,
+    IMarketDataRiskManager,
+    IRiskManager,
+)
 from risk_manager.properties.risk_manager_properties import (
     BaseRiskProps,
     MaxLeverageFactorRiskProps,
+    VaRRiskProps,
 )
 from risk_manager.risk_managers.max_leverage_factor_risk_manager import (
     MaxLeverageFactorRiskManager,
 )
-from utils.utils import Utils
+from risk_manager.risk_managers.var_risk_manager import VaRRiskManager
 
 
 class RiskManager(IRiskManager):
@@ -23,10 +35,15 @@ class RiskManager(IRiskManager):
         data_provider: DataProvider,
         portfolio: Portfolio,
         risk_properties: BaseRiskProps,
+        account_state: AccountStateService,
     ) -> None:
         self.events_queue = events_queue
         self.data_provider = data_provider
         self.portfolio = portfolio
+        self.account_state = account_state
+
+        # Net exposure of the strategy, maintained incrementally with every fill
+        self.exposure = ExposureAggregator(portfolio, data_provider, account_state)
 
         self.risk_manager_method = self._get_risk_manager_method(risk_properties)
 
@@ -42,12 +59,47 @@ class RiskManager(IRiskManager):
             IRiskManager: _description_
         """
         if isinstance(risk_properties, MaxLeverageFactorRiskProps):
-            return MaxLeverageFactorRiskManager(risk_properties)
+            return MaxLeverageFactorRiskManager(
+                risk_properties, self.account_state, self.data_provider.symbol_registry
+            )
+        elif isinstance(risk_properties, VaRRiskProps):
+            return VaRRiskManager(
+                risk_properties, self.account_state, self.exposure, self.data_provider
+            )
 
         raise ValueError(
             f"ERROR: Risk manager method not recognized. Please check the properties passed {risk_properties}"
         )
 
+    def update_properties(self, risk_properties: BaseRiskProps) -> None:
+        """
+        Replaces the risk manager method (the net exposure and the market data
+        already collected are kept)
+        """
+        risk_manager_method = self._get_risk_manager_method(risk_properties)
+        if isinstance(risk_manager_method, VaRRiskManager) and isinstance(
+            self.risk_manager_method, VaRRiskManager
+        ):
+            risk_manager_method.take_market_data(self.risk_manager_method)
+        self.risk_manager_method = risk_manager_method
+
+    def on_execution_event(self, event: ExecutionEvent) -> None:
+        """
+        Updates the net exposure with a fill
+        """
+        self.exposure.on_execution_event(event)
+
+    def on_data_events(self, data_events: List[DataEvent]) -> None:
+        """
+        Updates the prices used to value the exposure and the market
+        data of the risk manager method (if it uses any)
+        """
+        for data_event in data_events:
+            self.exposure.on_quote(data_event.symbol, data_event.data.close)  # type: ignore
+
+        if isinstance(self.risk_manager_method, IMarketDataRiskManager):
+            self.risk_manager_method.on_data_events(data_events)
+
     def _compute_current_value_of_position_in_account_currency(self) -> Decimal:
         """
         Compute the current value of the positions in the account currency
@@ -55,23 +107,10 @@ class RiskManager(IRiskManager):
         Returns:
             Decimal: _description_
         """
-        # Gather current positions by the strategy
-        current_positions = self.portfolio.get_strategy_open_positions()  # type: ignore
-
-        # Calculate value of open positions
-        total_value = Decimal(0)
-
-        for position in current_positions:
-            total_value += self._compute_value_of_position_in_account_currency(
-                position.symbol,  # type: ignore
-                position.volume,  # type: ignore
-                position.type,  # type: ignore
-            )
-
-        return total_value  # type: ignore
+        return self.exposure.total_value()
 
     def _compute_value_of_position_in_account_currency(
-        self, symbol: str, volume: Decimal, position_type: int
+        self, symbol: str, volume: Decimal, signal: SignalType
     ) -> Decimal:
         """
         Compute the value of the position in the account currency
@@ -79,29 +118,10 @@ class RiskManager(IRiskManager):
         Returns:
             Decimal: _description_
         """
-        # Get the symbol info
-        symbol_info = mt5.symbol_info(symbol)  # type: ignore
+        # Sells count as negative exposure
+        signed_volume = float(volume) if signal == SignalType.BUY else -float(volume)
 
-        # Units operated volume in symbol units (base currency, barrels of oil, ounces of gold, etc)
-        traded_units = Decimal(volume) * Decimal(symbol_info.trade_contract_size)  # type: ignore
-
-        # Convert traded units to profit or quoted currency (USD for gold, oil, CHF for GBPCHF, EUR for DAX,....)
-        value_traded_in_profit_ccy = traded_units * Decimal(
-            self.data_provider.get_latest_tick(symbol)["bid"]
-        )  # type: ignore
-
-        # Convert value_traded_in_profit_ccy to account currency (MT5 broker account currency, USD, EUR, CHF, ...)
-        value_traded_in_account_ccy = Utils.convert_currency_amount_to_another_currency(
-            value_traded_in_profit_ccy,
-            symbol_info.currency_profit,  # type: ignore
-            mt5.account_info().currency,  # type: ignore
-        )
-
-        # Evaluate if the position is a buy or a sell
-        if position_type == mt5.ORDER_TYPE_SELL:
-            return -Decimal(value_traded_in_account_ccy)
-
-        return Decimal(value_traded_in_account_ccy)
+        return self.exposure.position_value(symbol, signed_volume)
 
     def _create_and_put_order_event(
         self, sizing_event: SizingEvent, volume: Decimal
@@ -123,6 +143,9 @@ class RiskManager(IRiskManager):
             sl=sizing_event.sl,
             tp=sizing_event.tp,
             volume=volume,
+            signal_time=sizing_event.signal_time,
+            reference_price=sizing_event.reference_price,
+            generated_time=sizing_event.generated_time,
         )
 
         # Put order event in the events queue
@@ -136,30 +159,52 @@ class RiskManager(IRiskManager):
         Args:
             sizing_event (SizingEvent): _description_
         """
+        self.assess_orders([sizing_event])
+
+    def assess_orders(self, sizing_events: List[SizingEvent]) -> None:
+        """
+        Assess several simultaneous orders (i.e. from the same bar) together,
+        valuing the current book only once
+
+        Args:
+            sizing_events (List[SizingEvent]): _description_
+        """
 
         # Get value for all positions opened by the strategy in account currency
         current_position_value = (
             self._compute_current_value_of_position_in_account_currency()
         )
 
-        # Get value of the new position in account currency
-        position_type = (
-            mt5.ORDER_TYPE_BUY if sizing_event.signal == "LONG" else mt5.ORDER_TYPE_SELL
-        )  # type: ignore
-        new_position_value = self._compute_value_of_position_in_account_currency(
-            symbol=sizing_event.symbol,
-            volume=sizing_event.volume,
-            position_type=position_type,
-        )
-
-        # Get the new operation volume to be executed after being assessed by risk manager
-        new_volume = self.risk_manager_method.assess_order(  # type: ignore
-            sizing_event=sizing_event,
-            current_positions_value_acc_ccy=current_position_value,  # type: ignore
-            new_position_value_acc_ccy=new_position_value,  # type: ignore
-        )
-
-        # Evaluate new volume
-        if new_volume > Decimal(0):
-            # Put the new sizing event in the events queue
-            self._create_and_put_order_event(sizing_event, new_volume)  # type: ignore
+        # Get value of the new positions in account currency
+        new_positions_value = [
+            self._compute_value_of_position_in_account_currency(
+                symbol=sizing_event.symbol,
+                volume=sizing_event.volume,
+                signal=sizing_event.signal,
+            )
+            for sizing_event in sizing_events
+        ]
+
+        # Get the new operation volumes to be executed after being assessed by risk manager
+        if isinstance(self.risk_manager_method, IBatchRiskManager):
+            new_volumes = self.risk_manager_method.assess_orders(
+                sizing_events=sizing_events,
+                current_positions_value_acc_ccy=current_position_value,
+                new_positions_value_acc_ccy=new_positions_value,
+            )
+        else:
+            new_volumes = [
+                self.risk_manager_method.assess_order(  # type: ignore
+                    sizing_event=sizing_event,
+                    current_positions_value_acc_ccy=current_position_value,  # type: ignore
+                    new_position_value_acc_ccy=new_position_value,  # type: ignore
+                )
+                for sizing_event, new_position_value in zip(
+                    sizing_events, new_positions_value
+                )
+            ]
+
+        # Evaluate new volumes and put the accepted orders in the events queue together
+        for sizing_event, new_volume in zip(sizing_events, new_volumes):
+            if new_volume > Decimal(0):
+                self._create_and_put_order_event(sizing_event, new_volume)  # type: ignore
@@ -1,16 +1,32 @@
 from decimal import Decimal
-import MetaTrader5 as mt5
+from typing import List
+from account_state.account_state import AccountStateService
 from events.events import SizingEvent
-from risk_manager.interfaces.risk_manager_interface import IRiskManager
-from risk_manager.properties.risk_manager_properties import MaxLeverageFactorRiskProps
+from risk_manager.interfaces.risk_manager_interface import (
+    IBatchRiskManager,
+    IRiskManager,
+)
+from risk_manager.properties.risk_manager_properties import (
+    BatchAllocationPolicy,
+    MaxLeverageFactorRiskProps,
+)
+from symbol_registry.symbol_registry import SymbolRegistry
 
 
-class MaxLeverageFactorRiskManager(IRiskManager):
-    def __init__(self, properties: MaxLeverageFactorRiskProps) -> None:
+class MaxLeverageFactorRiskManager(IRiskManager, IBatchRiskManager):
+    def __init__(
+        self,
+        properties: MaxLeverageFactorRiskProps,
+        account_state: AccountStateService,
+        symbol_registry: SymbolRegistry,
+    ) -> None:
         self.max_leverage_factor = properties.max_leverage_factor
+        self.batch_allocation_policy = properties.batch_allocation_policy
+        self.account_state = account_state
+        self.symbol_registry = symbol_registry
 
     def _compute_leverage_factor(self, account_value_acc_ccy: Decimal) -> Decimal:
-        account_equity = Decimal(mt5.account_info().equity)  # type: ignore
+        account_equity = Decimal(self.account_state.equity)
 
         if account_equity <= Decimal(0):
             return Decimal("Inf")
@@ -44,14 +60,90 @@ class MaxLeverageFactorRiskManager(IRiskManager):
     ) -> Decimal:
         # This is like a disco doorman -> it lets the op pass
 
-        if (
-            self._check_expected_new_position_is_compliant_with_max_leverage_factor(
-                sizing_event=sizing_event,
-                current_positions_value_acc_ccy=current_positions_value_acc_ccy,
-                new_position_value_acc_ccy=new_position_value_acc_ccy,
-            )
-            < self.max_leverage_factor
+        if self._check_expected_new_position_is_compliant_with_max_leverage_factor(
+            sizing_event=sizing_event,
+            current_positions_value_acc_ccy=current_positions_value_acc_ccy,
+            new_position_value_acc_ccy=new_position_value_acc_ccy,
         ):
             return Decimal(sizing_event.volume)
 
         return Decimal(0)
+
+    def assess_orders(
+        self,
+        sizing_events: List[SizingEvent],
+        current_positions_value_acc_ccy: Decimal,
+        new_positions_value_acc_ccy: List[Decimal],
+    ) -> List[Decimal]:
+        """
+        Fits several simultaneous orders in the leverage budget together,
+        according to the batch allocation policy
+        """
+        if self.batch_allocation_policy == BatchAllocationPolicy.PROPORTIONAL:
+            return self._assess_orders_proportionally(
+                sizing_events,
+                current_positions_value_acc_ccy,
+                new_positions_value_acc_ccy,
+            )
+
+        # FIRST_COME: each order is assessed on top of the ones already accepted
+        volumes: List[Decimal] = []
+        accepted_value = current_positions_value_acc_ccy
+        for sizing_event, new_position_value in zip(
+            sizing_events, new_positions_value_acc_ccy
+        ):
+            volume = self.assess_order(sizing_event, accepted_value, new_position_value)
+            if volume > Decimal(0):
+                accepted_value += new_position_value
+            volumes.append(volume)
+
+        return volumes
+
+    def _assess_orders_proportionally(
+        self,
+        sizing_events: List[SizingEvent],
+        current_positions_value_acc_ccy: Decimal,
+        new_positions_value_acc_ccy: List[Decimal],
+    ) -> List[Decimal]:
+        new_value = sum(new_positions_value_acc_ccy, Decimal(0))
+        leverage_factor = self._compute_leverage_factor(
+            current_positions_value_acc_ccy + new_value
+        )
+        if abs(leverage_factor) <= self.max_leverage_factor:
+            return [Decimal(sizing_event.volume) for sizing_event in sizing_events]
+
+        # Only the orders that add to the side of the book above the limit are
+        # scaled (netting them against the orders that reduce it would let
+        # large opposite orders through); the rest are accepted in full
+        direction = 1 if leverage_factor > 0 else -1
+        adding = [value * direction > 0 for value in new_positions_value_acc_ccy]
+        adding_value = sum(
+            (
+                value
+                for value, is_adding in zip(new_positions_value_acc_ccy, adding)
+                if is_adding
+            ),
+            Decimal(0),
+        )
+        if adding_value == Decimal(0):
+            return [Decimal(sizing_event.volume) for sizing_event in sizing_events]
+
+        # Largest common factor that keeps the whole book within the max leverage
+        max_value = self.max_leverage_factor * Decimal(self.account_state.equity)
+        reducing_value = new_value - adding_value
+        scale = (
+            direction * max_value - current_positions_value_acc_ccy - reducing_value
+        ) / adding_value
+        scale = min(max(scale, Decimal(0)), Decimal(1))
+
+        print(
+            f"RISK MGMT: The {len(sizing_events)} objective positions imply a Leverage Factor of {abs(leverage_factor):.2f} which is higher than the max leverage factor {self.max_leverage_factor:.4f}. Volumes of the orders that add exposure scaled by {scale:.4f}"
+        )
+        return [
+            self.symbol_registry.normalize_volume(
+                sizing_event.symbol, float(sizing_event.volume * scale)
+            )
+            if is_adding
+            else Decimal(sizing_event.volume)
+            for sizing_event, is_adding in zip(sizing_events, adding)
+        ]
@@ -0,0 +1,187 @@
+import math
+from decimal import Decimal
+from statistics import NormalDist
+from typing import List
+
+import numpy as np
+
+from account_state.account_state import AccountStateService
+from data_provider.data_provider import DataProvider
+from events.events import DataEvent, SizingEvent
+from risk_manager.exposure_aggregator import ExposureAggregator
+from risk_manager.interfaces.risk_manager_interface import (
+    IBatchRiskManager,
+    IMarketDataRiskManager,
+    IRiskManager,
+)
+from risk_manager.properties.risk_manager_properties import VaRRiskProps
+from risk_manager.rolling_covariance import RollingCovariance
+
+
+class VaRRiskManager(IRiskManager, IBatchRiskManager, IMarketDataRiskManager):
+    """
+    Parametric (variance-covariance) VaR of the strategy book. Orders that would
+    take the VaR above max_var_pct of the equity are scaled down to the largest
+    volume that fits the limit, or rejected
+    """
+
+    def __init__(
+        self,
+        properties: VaRRiskProps,
+        account_state: AccountStateService,
+        exposure: ExposureAggregator,
+        data_provider: DataProvider,
+    ) -> None:
+        self.max_var_pct = properties.max_var_pct
+        self.min_observations = properties.min_observations
+        self.z_score = NormalDist().inv_cdf(float(properties.confidence_level))
+
+        self.account_state = account_state
+        self.exposure = exposure
+        self.data_provider = data_provider
+
+        # Rolling covariance of the bar returns and last close of every symbol
+        self.covariance = RollingCovariance(properties.window)
+        self._last_closes = np.zeros(0)
+
+    def take_market_data(self, previous: "VaRRiskManager") -> None:
+        """
+        Keeps the returns collected by the risk manager this one replaces (i.e.
+        when the properties change at runtime), so it does not start over
+        """
+        self.covariance = previous.covariance.resized(self.covariance.window)
+        self._last_closes = previous._last_closes.copy()
+
+    def _add_symbol(self, symbol: str) -> int:
+        index = self.covariance.add_symbol(symbol)
+        if index == self._last_closes.size:
+            self._last_closes = np.append(self._last_closes, np.nan)
+        return index
+
+    def _seed(self, symbols: List[str]) -> None:
+        """
+        Fills the covariance window with the history of symbols (the bars
+        without history stay missing, not zero)
+        """
+        closes = self.data_provider.get_latest_closes_matrix(
+            symbols, self.data_provider.timeframe, self.covariance.window + 1
+        )
+        indices = [self._add_symbol(symbol) for symbol in symbols]
+
+        bar_returns = closes[:, 1:] / closes[:, :-1] - 1.0
+        returns = np.full(len(self.covariance.symbol_index), np.nan)
+        for column in range(bar_returns.shape[1]):
+            returns[indices] = bar_returns[:, column]
+            self.covariance.update(returns)
+
+    def on_data_events(self, data_events: List[DataEvent]) -> None:
+        """
+        Adds the returns of a new bar to the covariance window. The symbols
+        without a bar (or without a previous close) have no return for it
+        """
+        symbols = [data_event.symbol for data_event in data_events]
+        closes = np.array([data_event.data.close for data_event in data_events])  # type: ignore
+
+        if len(self.covariance) == 0:
+            self._seed(symbols)
+        else:
+            indices = [self._add_symbol(symbol) for symbol in symbols]
+            returns = np.full(len(self.covariance.symbol_index), np.nan)
+            returns[indices] = closes / self._last_closes[indices] - 1.0
+            self.covariance.update(returns)
+
+        self._last_closes[[self._add_symbol(symbol) for symbol in symbols]] = closes
+
+    def assess_order(  # type: ignore
+        self,
+        sizing_event: SizingEvent,
+        current_positions_value_acc_ccy: Decimal,
+        new_position_value_acc_ccy: Decimal,
+    ) -> Decimal:
+        return self.assess_orders(
+            [sizing_event],
+            current_positions_value_acc_ccy,
+            [new_position_value_acc_ccy],
+        )[0]
+
+    def assess_orders(
+        self,
+        sizing_events: List[SizingEvent],
+        current_positions_value_acc_ccy: Decimal,
+        new_positions_value_acc_ccy: List[Decimal],
+    ) -> List[Decimal]:
+        """
+        Assesses several simultaneous orders (i.e. from the same bar) one after
+        the other, each on top of the book and the orders already accepted
+        """
+        # Value of the current book (w) by symbol
+        book_values = self.exposure.values_by_symbol()
+        for symbol in [*book_values, *(event.symbol for event in sizing_events)]:
+            self._add_symbol(symbol)
+        book = np.zeros(len(self.covariance.symbol_index))
+        for symbol, value in book_values.items():
+            book[self.covariance.symbol_index[symbol]] = value
+
+        volumes: List[Decimal] = []
+        for sizing_event, new_position_value in zip(
+            sizing_events, new_positions_value_acc_ccy
+        ):
+            new_index = self.covariance.symbol_index[sizing_event.symbol]
+            volume = self._assess_order(
+                sizing_event, book, new_index, float(new_position_value)
+            )
+            if sizing_event.volume > 0:
+                book[new_index] += float(
+                    new_position_value * volume / sizing_event.volume
+                )
+            volumes.append(volume)
+
+        return volumes
+
+    def _assess_order(
+        self,
+        sizing_event: SizingEvent,
+        book: np.ndarray,
+        new_index: int,
+        new_value: float,
+    ) -> Decimal:
+        """
+        Volume of the order (of value d in its symbol only) that keeps the VaR
+        of the book w within the limit
+        """
+        observations = int(self.covariance.observations()[new_index])
+        if observations < self.min_observations:
+            print(
+                f"RISK MGMT: Only {observations} bars of returns of {sizing_event.symbol} available to compute the VaR ({self.min_observations} needed). Order rejected"
+            )
+            return Decimal(0)
+
+        # VaR(alpha)^2 = z^2 * (w'Sw + 2 alpha d'Sw + alpha^2 d'Sd)
+        covariance = self.covariance.covariance()
+        covariance_book = covariance @ book
+        a = float(book @ covariance_book)
+        b = new_value * float(covariance_book[new_index])
+        c = new_value**2 * float(covariance[new_index, new_index])
+
+        var_limit = float(self.max_var_pct) * self.account_state.equity
+        max_variance = (var_limit / self.z_score) ** 2
+        new_var = self.z_score * math.sqrt(max(a + 2 * b + c, 0.0))
+
+        # Orders that lower the VaR are accepted even above the limit (i.e.
+        # after the equity dropped), as rejecting them keeps the risk higher
+        if new_var <= var_limit or 2 * b + c <= 0:
+            return Decimal(sizing_event.volume)
+
+        # Largest fraction alpha of the order that keeps the VaR within the limit
+        discriminant = b**2 - c * (a - max_variance)
+        alpha = (
+            (-b + math.sqrt(discriminant)) / c if c > 0 and discriminant >= 0 else 0.0
+        )
+        volume = self.data_provider.symbol_registry.normalize_volume(
+            sizing_event.symbol, float(sizing_event.volume) * min(alpha, 1.0)
+        )
+
+        print(
+            f"RISK MGMT: The objective position {sizing_event.signal} {sizing_event.volume:.2f} implies a VaR of {new_var:.2f} which is higher than the limit {var_limit:.2f}. Volume reduced to {volume:.2f}"
+        )
+        return volume
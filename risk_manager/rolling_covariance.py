@@ -0,0 +1,136 @@
+from typing import Dict, List
+
+import numpy as np
+
+
+class RollingCovariance:
+    """
+    Covariance matrix of the returns of the last window bars of a set of symbols.
+    Each new bar updates the running sums with a rank-one update (adding the
+    new returns and removing the ones leaving the window) instead of
+    recomputing the whole matrix. Missing returns (NaN) are left out: every
+    pair of symbols uses the bars where both have a return
+    """
+
+    def __init__(self, window: int) -> None:
+        if window < 2:
+            raise ValueError(
+                f"ERROR: The covariance window {window} must be at least 2"
+            )
+
+        self.window = window
+        self.symbol_index: Dict[str, int] = {}
+
+        # Returns (0 where missing) and whether they were observed
+        self._returns = np.zeros((window, 0))
+        self._observed = np.zeros((window, 0))
+        # Per pair (i, j) over the bars where both are observed: number of bars,
+        # sum of the returns of i and sum of the products
+        self._pair_count = np.zeros((0, 0))
+        self._sum = np.zeros((0, 0))
+        self._sum_outer = np.zeros((0, 0))
+        self._next = 0
+        self._count = 0
+        self._updates_since_rebuild = 0
+
+        self._covariance = np.zeros((0, 0))
+        self._covariance_outdated = False
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.symbol_index)
+
+    def observations(self) -> np.ndarray:
+        """
+        Number of returns actually observed of every symbol in the window
+        """
+        return np.diag(self._pair_count).astype(int)
+
+    def resized(self, window: int) -> "RollingCovariance":
+        """
+        New covariance over window bars holding the latest bars of this one
+        """
+        covariance = RollingCovariance(window)
+        for symbol in self.symbol_index:
+            covariance.add_symbol(symbol)
+
+        first = (self._next - self._count) % self.window
+        for row in range(max(self._count - window, 0), self._count):
+            position = (first + row) % self.window
+            covariance.update(
+                np.where(
+                    self._observed[position] > 0, self._returns[position], np.nan
+                )
+            )
+        return covariance
+
+    def add_symbol(self, symbol: str) -> int:
+        index = self.symbol_index.get(symbol)
+        if index is not None:
+            return index
+
+        # A new symbol has no returns in the bars already in the window
+        index = len(self.symbol_index)
+        self.symbol_index[symbol] = index
+        self._returns = np.pad(self._returns, ((0, 0), (0, 1)))
+        self._observed = np.pad(self._observed, ((0, 0), (0, 1)))
+        self._pair_count = np.pad(self._pair_count, ((0, 1), (0, 1)))
+        self._sum = np.pad(self._sum, ((0, 1), (0, 1)))
+        self._sum_outer = np.pad(self._sum_outer, ((0, 1), (0, 1)))
+        self._covariance_outdated = True
+        return index
+
+    def update(self, returns: np.ndarray) -> None:
+        """
+        Adds the returns of a new bar (one per symbol, in symbol_index order,
+        NaN where missing)
+        """
+        observed = ~np.isnan(returns)
+        returns = np.where(observed, returns, 0.0)
+        observed = observed.astype(float)
+
+        if self._count == self.window:
+            oldest = self._returns[self._next]
+            oldest_observed = self._observed[self._next]
+            self._pair_count -= np.outer(oldest_observed, oldest_observed)
+            self._sum -= np.outer(oldest, oldest_observed)
+            self._sum_outer -= np.outer(oldest, oldest)
+        else:
+            self._count += 1
+
+        self._returns[self._next] = returns
+        self._observed[self._next] = observed
+        self._pair_count += np.outer(observed, observed)
+        self._sum += np.outer(returns, observed)
+        self._sum_outer += np.outer(returns, returns)
+        self._next = (self._next + 1) % self.window
+        self._covariance_outdated = True
+
+        # Rebuild the sums from the window from time to time to avoid drift
+        self._updates_since_rebuild += 1
+        if self._updates_since_rebuild >= self.window:
+            rows = self._returns[: self._count]
+            rows_observed = self._observed[: self._count]
+            self._pair_count = rows_observed.T @ rows_observed
+            self._sum = rows.T @ rows_observed
+            self._sum_outer = rows.T @ rows
+            self._updates_since_rebuild = 0
+
+    def covariance(self) -> np.ndarray:
+        """
+        Sample covariance matrix of the returns in the window (0 for the pairs
+        with less than 2 bars observed together)
+        """
+        if self._covariance_outdated:
+            n = self._pair_count
+            enough = n >= 2
+            safe_n = np.where(enough, n, 2.0)
+            covariance = (self._sum_outer - self._sum * self._sum.T / safe_n) / (
+                safe_n - 1
+            )
+            self._covariance = np.where(enough, covariance, 0.0)
+            self._covariance_outdated = False
+        return self._covariance
@@ -1,9 +1,16 @@
-from typing import Protocol
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Protocol, runtime_checkable
+
+import numpy as np
 
-from data_provider.data_provider import DataProvider
 from events.events import DataEvent, SignalEvent
-from order_executor.order_executor import OrderExecutor
-from portfolio.portfolio import Portfolio
+
+# Only needed for type hints (importing them would load the whole framework)
+if TYPE_CHECKING:
+    from data_provider.data_provider import DataProvider
+    from order_executor.order_executor import OrderExecutor
+    from portfolio.portfolio import Portfolio
 
 
 class ISignalGenerator(Protocol):
@@ -15,3 +22,20 @@ class ISignalGenerator(Protocol):
         order_executor: OrderExecutor,
     ) -> SignalEvent | None:
         ...
+
+
+@runtime_checkable
+class IBatchSignalGenerator(Protocol):
+    lookback: int
+
+    def generate_signals(
+        self,
+        symbols: List[str],
+        closes: np.ndarray,
+        portfolio: Portfolio,
+        order_executor: OrderExecutor,
+    ) -> List[SignalEvent]:
+        ...
+
+    def seed(self, symbols: List[str], closes: np.ndarray) -> None:
+        ...
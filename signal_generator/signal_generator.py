@@ -1,10 +1,15 @@
+from datetime import datetime
+from decimal import Decimal
 from queue import Queue
-from typing import Any
+from typing import Any, List
 from data_provider.data_provider import DataProvider
-from events.events import DataEvent
+from events.events import DataEvent, SignalEvent
 from order_executor.order_executor import OrderExecutor
 from portfolio.portfolio import Portfolio
-from signal_generator.interfaces.signal_generator_interface import ISignalGenerator
+from signal_generator.interfaces.signal_generator_interface import (
+    IBatchSignalGenerator,
+    ISignalGenerator,
+)
 from signal_generator.properties.signal_generator_properties import (
     BaseSignalProps,
     MACrossoverProps,
@@ -46,6 +51,25 @@ class SignalGenerator(ISignalGenerator):
         else:
             raise ValueError(f"ERROR: props type not supported: {signal_props}")
 
+    def update_properties(self, signal_properties: BaseSignalProps) -> None:
+        """
+        Replaces the entry logic. The state of the new one is seeded from the
+        cached closes, so it does not signal the crossovers already seen
+        """
+        signal_generator_method = self._get_signal_generator(
+            signal_props=signal_properties
+        )
+        if isinstance(signal_generator_method, IBatchSignalGenerator):
+            symbols = list(self.data_provider.symbols)
+            closes = self.data_provider.get_latest_closes_matrix(
+                symbols,
+                signal_generator_method.timeframe,  # type: ignore
+                signal_generator_method.lookback,
+            )
+            signal_generator_method.seed(symbols, closes)
+
+        self.signal_generator_method = signal_generator_method
+
     def generate_signal(  # type: ignore
         self,
         data_event: DataEvent,
@@ -65,4 +89,62 @@ class SignalGenerator(ISignalGenerator):
         )
 
         if signal_event is not None:
+            self._stamp_signal_event(signal_event, data_event)
             self.events_queue.put(signal_event)
+
+    def generate_signals(self, data_events: List[DataEvent]) -> None:
+        """generate_signals
+
+        Generates the signals for several DataEvents of the same bar at once,
+        evaluating all their symbols in a single pass when the entry logic
+        supports it.
+
+        Args:
+            data_events (List[DataEvent]): _description_
+
+        """
+        if not isinstance(self.signal_generator_method, IBatchSignalGenerator):
+            for data_event in data_events:
+                self.generate_signal(data_event)
+            return
+
+        # Build the aligned (symbols x lookback) closes matrix for the bar
+        symbols = [data_event.symbol for data_event in data_events]
+        closes = self.data_provider.get_latest_closes_matrix(
+            symbols,
+            self.signal_generator_method.timeframe,  # type: ignore
+            self.signal_generator_method.lookback,
+        )
+
+        # Retrieve the SignalEvents of the symbols whose state changed
+        signal_events = self.signal_generator_method.generate_signals(
+            symbols=symbols,
+            closes=closes,
+            portfolio=self.portfolio,
+            order_executor=self.order_executor,
+        )
+
+        generated_time = datetime.now()
+        data_events_by_symbol = {
+            data_event.symbol: data_event for data_event in data_events
+        }
+        for signal_event in signal_events:
+            self._stamp_signal_event(
+                signal_event, data_events_by_symbol[signal_event.symbol], generated_time
+            )
+            self.events_queue.put(signal_event)
+
+    def _stamp_signal_event(
+        self, signal_event: SignalEvent, data_event: DataEvent, generated_time: datetime
+    ) -> None:
+        """
+        Sets the bar time, the time the signal was generated and the reference
+        price (the close of the bar unless the entry logic set one) used to
+        measure the execution quality
+        """
+        if signal_event.generated_time is None:
+            signal_event.generated_time = generated_time
+        if signal_event.signal_time is None:
+            signal_event.signal_time = data_event.data.name  # type: ignore
+        if signal_event.reference_price == Decimal(0):
+            signal_event.reference_price = Decimal(str(data_event.data.close))  # type: ignore
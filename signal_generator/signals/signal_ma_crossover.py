@@ -1,15 +1,24 @@
+from __future__ import annotations
+
 from decimal import Decimal
-from typing import Any
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+import numpy as np
 
 from events.events import DataEvent, OrderType, SignalEvent, SignalType
-from data_provider.data_provider import DataProvider
-from order_executor.order_executor import OrderExecutor
-from portfolio.portfolio import Portfolio
-from signal_generator.interfaces.signal_generator_interface import ISignalGenerator
+from signal_generator.interfaces.signal_generator_interface import (
+    IBatchSignalGenerator,
+    ISignalGenerator,
+)
 from signal_generator.properties.signal_generator_properties import MACrossoverProps
 
+if TYPE_CHECKING:
+    from data_provider.data_provider import DataProvider
+    from order_executor.order_executor import OrderExecutor
+    from portfolio.portfolio import Portfolio
+
 
-class SignalMACrossover(ISignalGenerator):
+class SignalMACrossover(ISignalGenerator, IBatchSignalGenerator):
     def __init__(
         self,
         properties: MACrossoverProps,
@@ -23,6 +32,12 @@ class SignalMACrossover(ISignalGenerator):
                 f"ERROR: The fast moving average {self.fast_period} should be lower than the slow moving average {self.slow_period}."
             )
 
+        # Bars needed to evaluate the crossover
+        self.lookback = self.slow_period
+
+        # Last crossover state seen for each symbol (1: fast above slow, -1: fast below slow)
+        self._crossover_state: Dict[str, int] = {}
+
     def generate_signal(
         self,
         data_event: DataEvent,
@@ -42,11 +57,6 @@ class SignalMACrossover(ISignalGenerator):
             symbol, self.timeframe, self.slow_period
         )
 
-        # Retrieve the open positions by this strategy in the symbol
-        open_positions = portfolio.get_number_of_strategy_open_positions_by_symbol(
-            symbol
-        )
-
         # Calculate the moving averages
         fast_ma: Any = (
             # bars.close.rolling(window=self.fast_period).mean().iloc[-1].values
@@ -57,6 +67,82 @@ class SignalMACrossover(ISignalGenerator):
             bars["close"].mean()
         )  # type: ignore
 
+        return self._create_signal_event(
+            symbol, fast_ma, slow_ma, portfolio, order_executor
+        )
+
+    def generate_signals(
+        self,
+        symbols: List[str],
+        closes: np.ndarray,
+        portfolio: Portfolio,
+        order_executor: OrderExecutor,
+    ) -> List[SignalEvent]:
+        """
+        Generate the signals of all the symbols of a bar at once, from a
+        (symbols x lookback) matrix of closes. Only the symbols whose crossover
+        state changed since their previous bar are evaluated against the portfolio.
+        """
+
+        fast_ma, slow_ma, state = self._compute_crossover_state(closes)
+        previous_state = np.fromiter(
+            (self._crossover_state.get(symbol, 0) for symbol in symbols),
+            dtype=np.int8,
+            count=len(symbols),
+        )
+        changed = np.flatnonzero((state != 0) & (state != previous_state))
+
+        signal_events: List[SignalEvent] = []
+        for row in changed:
+            symbol = symbols[row]
+            self._crossover_state[symbol] = int(state[row])
+
+            signal_event = self._create_signal_event(
+                symbol, fast_ma[row], slow_ma[row], portfolio, order_executor
+            )
+            if signal_event is not None:
+                signal_events.append(signal_event)
+
+        return signal_events
+
+    def seed(self, symbols: List[str], closes: np.ndarray) -> None:
+        """
+        Sets the crossover state of the symbols from a (symbols x lookback)
+        matrix of closes without generating signals
+        """
+        _, _, state = self._compute_crossover_state(closes)
+        for row, symbol in enumerate(symbols):
+            if state[row] != 0:
+                self._crossover_state[symbol] = int(state[row])
+
+    def _compute_crossover_state(
+        self, closes: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Calculate the moving averages of every symbol in a single pass
+        fast_ma = closes[:, -self.fast_period :].mean(axis=1)  # noqa: E203
+        slow_ma = closes[:, -self.slow_period :].mean(axis=1)  # noqa: E203
+
+        # Symbols without enough data (NaN) keep state 0 and never signal
+        state = np.nan_to_num(np.sign(fast_ma - slow_ma)).astype(np.int8)
+        return fast_ma, slow_ma, state
+
+    def _create_signal_event(
+        self,
+        symbol: str,
+        fast_ma: Any,
+        slow_ma: Any,
+        portfolio: Portfolio,
+        order_executor: OrderExecutor,
+    ) -> SignalEvent | None:
+        """
+        Creates the SignalEvent (if any) that corresponds to the moving averages
+        given the open positions of the strategy in the symbol
+        """
+        # Retrieve the open positions by this strategy in the symbol
+        open_positions = portfolio.get_number_of_strategy_open_positions_by_symbol(
+            symbol
+        )
+
         # Detect a buying singal
         if open_positions["LONG"] == 0 and fast_ma > slow_ma:
             # Check if there are short positions open
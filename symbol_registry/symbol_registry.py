@@ -0,0 +1,127 @@
+import math
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, NamedTuple, Set, Union
+import MetaTrader5 as mt5
+
+from utils.utils import Utils
+
+
+class SymbolMetadata(NamedTuple):
+    name: str
+    currency_base: str
+    currency_profit: str
+    currency_margin: str
+    trade_contract_size: float
+    trade_tick_size: float
+    volume_min: float
+    volume_max: float
+    volume_step: float
+    digits: int
+    point: float
+    filling_mode: int
+    trade_exemode: int
+    trade_stops_level: int
+    trade_freeze_level: int
+    visible: bool
+
+
+class SymbolRegistry:
+    """
+    Immutable metadata of the broker symbols, loaded in bulk at startup so
+    the components do not need to ask the terminal for it on every event
+    """
+
+    def __init__(self) -> None:
+        self._symbols: Dict[str, SymbolMetadata] = {}
+        # Symbols the broker does not offer, not asked for again until the next load
+        self._unknown: Set[str] = set()
+
+        # Statistics
+        self.lookups: int = 0
+        self.misses: int = 0
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._symbols
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    @staticmethod
+    def _to_metadata(symbol_info: Any) -> SymbolMetadata:
+        return SymbolMetadata(
+            **{field: getattr(symbol_info, field) for field in SymbolMetadata._fields}
+        )
+
+    def load(self) -> None:
+        """
+        Loads the metadata of every symbol offered by the broker with a single call
+        """
+        symbols_info = mt5.symbols_get()  # type: ignore
+        if symbols_info is None:
+            raise ValueError(
+                f"ERROR (SymbolRegistry): Unable to retrieve the broker symbols - MT5 error: {mt5.last_error()}"  # type: ignore
+            )
+
+        self._symbols = {
+            symbol_info.name: self._to_metadata(symbol_info)  # type: ignore
+            for symbol_info in symbols_info  # type: ignore
+        }
+        self._unknown.clear()
+
+    def refresh(self, symbols: Union[Iterable[str], None] = None) -> None:
+        """
+        Reloads the metadata of symbols (all the symbols if None)
+        """
+        if symbols is None:
+            self.load()
+            return
+
+        for symbol in symbols:
+            self._fetch(symbol)
+
+    def _fetch(self, symbol: str) -> Union[SymbolMetadata, None]:
+        symbol_info = mt5.symbol_info(symbol)  # type: ignore
+        if symbol_info is None:
+            print(
+                f"[{Utils.dateprint()}] - SYMBOL REGISTRY: Unable to retrieve the info of {symbol} - MT5 error: {mt5.last_error()}"  # type: ignore
+            )
+            self._symbols.pop(symbol, None)
+            self._unknown.add(symbol)
+            return None
+
+        metadata = self._to_metadata(symbol_info)
+        self._symbols[symbol] = metadata
+        self._unknown.discard(symbol)
+        return metadata
+
+    def get(self, symbol: str) -> Union[SymbolMetadata, None]:
+        """
+        Returns the metadata of symbol (None if the symbol does not exist)
+        """
+        self.lookups += 1
+        metadata = self._symbols.get(symbol)
+        if metadata is not None or symbol in self._unknown:
+            return metadata
+
+        # Symbols added to the broker after the load are fetched once
+        self.misses += 1
+        return self._fetch(symbol)
+
+    def normalize_volume(self, symbol: str, volume: float) -> Decimal:
+        """
+        Rounds volume down to the volume step of symbol (0 if below the minimum volume)
+        """
+        metadata = self.get(symbol)
+        if metadata is None:
+            return Decimal(0)
+
+        volume = math.floor(volume / metadata.volume_step + 1e-9) * metadata.volume_step
+        if volume < metadata.volume_min:
+            return Decimal(0)
+        return Decimal(str(round(min(volume, metadata.volume_max), 8)))
+
+    def symbols(self) -> List[str]:
+        return list(self._symbols)
+
+    def values(self) -> List[SymbolMetadata]:
+        return list(self._symbols.values())
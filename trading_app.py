@@ -1,113 +1,194 @@
-from decimal import Decimal
-from queue import Queue
-from typing import Any
+from typing import List
 
 from decouple import config
 
+from account_state.account_state import AccountStateService
+from config_manager.config_manager import ConfigManager
+from config_manager.trading_config import load_trading_config
 from data_provider.data_provider import DataProvider
+from events.event_queue import EventQueue
+from events.events import EventType
 from notifications.notifications import (
+    FileNotificationProperties,
     NotificationService,
     TelegramNotificationProperties,
 )
 from order_executor.order_executor import OrderExecutor
+from platform_connector.connection_supervisor import ConnectionSupervisor
 from platform_connector.platform_connector import PlatformConnector
 from portfolio.portfolio import Portfolio
 from position_sizer.position_sizer import PositionSizer
-from position_sizer.properties.position_sizer_properties import (
-    FixedSizingProps,
-    # MinSizingProps,
-)
-
-
-from risk_manager.properties.risk_manager_properties import MaxLeverageFactorRiskProps
 from risk_manager.risk_manager import RiskManager
-from signal_generator.properties.signal_generator_properties import MACrossoverProps
 from signal_generator.signal_generator import SignalGenerator
 from trading_director.trading_director import TradingDirector
 
 
+def _split(values: str) -> List[str]:
+    return [value.strip() for value in values.split(",") if value.strip()]
+
+
 def main() -> None:
-    # Definición de variables necesarias para la estrategia
-    symbols = [
-        "EURUSD",
-        "USDJPY",
-        "USDSGD",
-        "EURGBP",
-        "XAUUSD",
-        "SP500",
-        "XTIUSD",
-        "GBPUSD",
-        "USDCHF",
-        "GBPJPY",
-        "NDX",
-        "SPA35",
-    ]
-    timeframe = "1min"
+    # Definición de variables necesarias para la estrategia (the strategy and
+    # risk settings come from a configuration file reloaded at runtime)
+    config_path: str = config("STRATEGY_CONFIG_PATH", default="strategy.toml")  # type: ignore
+    trading_config = load_trading_config(config_path)
+    symbols = list(trading_config.symbols)
+    timeframe = trading_config.timeframe
     magic_number = 12345
-    slow_ma_pd = 50
-    fast_ma_pd = 25
 
-    # Create main events queue
-    events_queue: Queue[Any] = Queue()
+    # Create main events queue. With an event transport, the queue is shared
+    # with other processes (i.e. a strategy process sending its orders to an
+    # execution process): the events of EVENT_TRANSPORT_REMOTE_TYPES are
+    # published instead of handled here, and the events received are queued
+    publish_endpoint: str = config("EVENT_TRANSPORT_PUBLISH", default="")  # type: ignore
+    subscribe_endpoints: str = config("EVENT_TRANSPORT_SUBSCRIBE", default="")  # type: ignore
+    transport_queue = None
+    if publish_endpoint or subscribe_endpoints:
+        # Imported here, so ZeroMQ is only needed when distributing the events
+        from event_transport.transport_queue import TransportEventQueue
+        from event_transport.transports.zmq_transport import (
+            ZmqEventTransport,
+            parse_topic,
+        )
+
+        remote_types: str = config("EVENT_TRANSPORT_REMOTE_TYPES", default="")  # type: ignore
+        topics: str = config("EVENT_TRANSPORT_TOPICS", default="")  # type: ignore
+        transport_queue = TransportEventQueue(
+            transport=ZmqEventTransport(
+                publish_endpoint=publish_endpoint or None,
+                subscribe_endpoints=_split(subscribe_endpoints) or None,
+                topics=[parse_topic(topic) for topic in _split(topics)] or None,
+            ),
+            remote_types=[
+                EventType(event_type.upper()) for event_type in _split(remote_types)
+            ],
+            receive_events=bool(subscribe_endpoints),
+        )
+    events_queue: EventQueue = (
+        transport_queue if transport_queue is not None else EventQueue()
+    )
+
+    # Optionally record every MT5 call of the session to replay it later
+    record_path: str = config("MT5_RECORD_PATH", default="")  # type: ignore
+    recorder = None
+    if record_path:
+        from mt5_replay.recorder import Mt5Recorder
+
+        recorder = Mt5Recorder(record_path).install()
 
     # Create main modules for the framework
-    # connect: PlatformConnector = PlatformConnector(symbol_list=symbols)
-    PlatformConnector(symbol_list=symbols)
+    connect: PlatformConnector = PlatformConnector(symbol_list=symbols)
 
-    data_provider: DataProvider = DataProvider(
-        events_queue=events_queue, symbol_list=symbols, timeframe=timeframe
-    )
+    # With a market data bus, the bars and quotes come from its publisher
+    # (python -m market_data_bus.publisher) instead of polling the terminal
+    bus_name: str = config("MARKET_DATA_BUS", default="")  # type: ignore
+    if bus_name:
+        from market_data_bus.subscriber import BusDataProvider
 
-    portfolio = Portfolio(magic_number=magic_number)
-    order_executor = OrderExecutor(events_queue=events_queue, portfolio=portfolio)
+        data_provider: DataProvider = BusDataProvider(
+            events_queue=events_queue,
+            symbol_list=symbols,
+            timeframe=timeframe,
+            symbol_registry=connect.symbol_registry,
+            bus_name=bus_name,
+        )
+    else:
+        data_provider = DataProvider(
+            events_queue=events_queue,
+            symbol_list=symbols,
+            timeframe=timeframe,
+            symbol_registry=connect.symbol_registry,
+        )
+
+    account_state = AccountStateService(max_staleness=1.0)
+    portfolio = Portfolio(
+        magic_number=magic_number,
+        account_state=account_state,
+        symbol_registry=connect.symbol_registry,
+    )
+    order_executor = OrderExecutor(
+        events_queue=events_queue,
+        portfolio=portfolio,
+        account_state=account_state,
+        symbol_registry=connect.symbol_registry,
+        dispatch_workers=4,
+        deviation_points=10,
+    )
 
     signal_generator = SignalGenerator(
         events_queue=events_queue,
         data_provider=data_provider,
         portfolio=portfolio,
         order_executor=order_executor,
-        signal_properties=MACrossoverProps(
-            timeframe=timeframe,
-            fast_period=fast_ma_pd,
-            slow_period=slow_ma_pd,
-        ),
+        signal_properties=trading_config.signal,
     )
 
-    sizing_properties = FixedSizingProps(volume=Decimal(1.0))
-
     position_sizer = PositionSizer(
         events_queue=events_queue,
         data_provider=data_provider,
-        sizing_properties=sizing_properties,
+        sizing_properties=trading_config.sizing,
+        account_state=account_state,
     )
 
-    risk_properties = MaxLeverageFactorRiskProps(max_leverage_factor=Decimal(5))
-
     risk_manager = RiskManager(
         events_queue=events_queue,
         data_provider=data_provider,
         portfolio=portfolio,
-        risk_properties=risk_properties,
+        risk_properties=trading_config.risk,
+        account_state=account_state,
+    )
+
+    config_manager = ConfigManager(
+        path=config_path,
+        trading_config=trading_config,
+        platform_connector=connect,
+        data_provider=data_provider,
+        signal_generator=signal_generator,
+        position_sizer=position_sizer,
+        risk_manager=risk_manager,
     )
 
     notifications = NotificationService(
-        properties=TelegramNotificationProperties(
-            token=config("TELEGRAM_API_TOKEN"),  # type: ignore
-            chat_id=config("TELEGRAM_CHAT_ID"),  # type: ignore
-        )
+        properties=[
+            TelegramNotificationProperties(
+                token=config("TELEGRAM_API_TOKEN"),  # type: ignore
+                chat_id=config("TELEGRAM_CHAT_ID"),  # type: ignore
+                digest_interval=60.0,
+            ),
+            FileNotificationProperties(path="notifications.log"),
+        ]
+    )
+
+    connection_supervisor = ConnectionSupervisor(
+        platform_connector=connect,
+        data_provider=data_provider,
+        portfolio=portfolio,
+        account_state=account_state,
+        order_executor=order_executor,
+        heartbeat_interval=1.0,
     )
 
     # Create the trading director and start the main loop
     trading_director: TradingDirector = TradingDirector(
         events_queue=events_queue,
         data_provider=data_provider,
+        portfolio=portfolio,
         signal_generator=signal_generator,
         position_sizer=position_sizer,
         risk_manager=risk_manager,
         order_executor=order_executor,
         notification_service=notifications,
+        account_state=account_state,
+        connection_supervisor=connection_supervisor,
+        config_manager=config_manager,
     )
-    trading_director.execute()
+    try:
+        trading_director.execute()
+    finally:
+        if recorder is not None:
+            recorder.close()
+        if transport_queue is not None:
+            transport_queue.close()
 
 
 if __name__ == "__main__":
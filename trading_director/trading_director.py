@@ -1,18 +1,26 @@
 import queue
 import time
-from typing import Any, Callable, Dict, Union
+from typing import Any, Callable, Dict, List, Union
 
+from account_state.account_state import AccountStateService
+from config_manager.config_manager import ConfigManager
 from data_provider.data_provider import DataProvider
 from notifications.notifications import NotificationService
 from order_executor.order_executor import OrderExecutor
+from platform_connector.connection_supervisor import ConnectionSupervisor
+from portfolio.portfolio import Portfolio
 from position_sizer.position_sizer import PositionSizer
 from risk_manager.risk_manager import RiskManager
-from signal_generator.interfaces.signal_generator_interface import ISignalGenerator
+from signal_generator.signal_generator import SignalGenerator
 
+from events.event_queue import EventQueue
 from events.events import (
     DataEvent,
     ExecutionEvent,
     OrderEvent,
+    OrderRejectedEvent,
+    PendingOrderState,
+    PendingOrderUpdateEvent,
     PlacePendingOrderEvent,
     SignalEvent,
     SizingEvent,
@@ -26,23 +34,31 @@ T = Union[DataEvent, SignalEvent]
 class TradingDirector:
     def __init__(
         self,
-        events_queue: queue.Queue[Any],
+        events_queue: EventQueue,
         data_provider: DataProvider,
-        signal_generator: ISignalGenerator,
+        portfolio: Portfolio,
+        signal_generator: SignalGenerator,
         position_sizer: PositionSizer,
         risk_manager: RiskManager,
         order_executor: OrderExecutor,
         notification_service: NotificationService,
+        account_state: AccountStateService,
+        connection_supervisor: ConnectionSupervisor,
+        config_manager: ConfigManager,
     ) -> None:
         self.events_queue = events_queue
 
         # References from the different modules
         self.data_provider = data_provider
+        self.portfolio = portfolio
         self.signal_generator = signal_generator
         self.position_sizer = position_sizer
         self.risk_manager = risk_manager
         self.order_executor = order_executor
         self.notifications = notification_service
+        self.account_state = account_state
+        self.connection_supervisor = connection_supervisor
+        self.config_manager = config_manager
 
         # Trading controller
         self.continue_trading: bool = True
@@ -55,16 +71,33 @@ class TradingDirector:
             "ORDER": self._handle_order_event,
             "EXECUTION": self._handle_execution_event,
             "PENDING": self._handle_pending_order_event,
+            "REJECTED": self._handle_order_rejected_event,
+            "PENDING_UPDATE": self._handle_pending_order_update_event,
         }
 
     def _handle_data_event(self, event: DataEvent) -> None:
         """
-        Handle the data event
+        Handle the data event, together with the rest of data events
+        of the same bar already waiting in the queue
         """
-        print(
-            f"[{Utils.dateprint()}] - DATA EVENT received for symbol: {event.symbol} - Last close price: {event.data.close}"  # type: ignore
+        data_events = [event] + self._get_queued_data_events_of_bar(event)
+
+        for data_event in data_events:
+            print(
+                f"[{Utils.dateprint()}] - DATA EVENT received for symbol: {data_event.symbol} - Last close price: {data_event.data.close}"  # type: ignore
+            )
+        self.portfolio.on_data_events(data_events)
+        self.risk_manager.on_data_events(data_events)
+        self.signal_generator.generate_signals(data_events)
+
+    def _get_queued_data_events_of_bar(self, event: DataEvent) -> List[DataEvent]:
+        """
+        Takes from the head of the queue the data events of the same bar as event
+        """
+        return self.events_queue.take_while(
+            lambda queued_event: isinstance(queued_event, DataEvent)
+            and queued_event.data.name == event.data.name  # type: ignore
         )
-        self.signal_generator.generate_signal(event)  # type: ignore
 
     def _handle_signal_event(self, event: SignalEvent) -> None:
         """
@@ -77,12 +110,18 @@ class TradingDirector:
 
     def _handle_sizing_event(self, event: SizingEvent) -> None:
         """
-        Handle the sizing event
+        Handle the sizing event, together with the rest of sizing events
+        already waiting in the queue (same burst)
         """
-        print(
-            f"[{Utils.dateprint()}] - SIZING EVENT received with volume {event.volume:.2f} for symbol: {event.symbol}"  # type: ignore
+        sizing_events = [event] + self.events_queue.take_while(
+            lambda queued_event: isinstance(queued_event, SizingEvent)
         )
-        self.risk_manager.assess_order(event)
+
+        for sizing_event in sizing_events:
+            print(
+                f"[{Utils.dateprint()}] - SIZING EVENT received with volume {sizing_event.volume:.2f} for symbol: {sizing_event.symbol}"  # type: ignore
+            )
+        self.risk_manager.assess_orders(sizing_events)
 
     def _handle_order_event(self, event: OrderEvent) -> None:
         """
@@ -102,6 +141,9 @@ class TradingDirector:
         print(
             f"[{Utils.dateprint()}] - Received EXECUTION EVENT for {event.signal} on {event.symbol} with volume {event.volume} at price {event.fill_price}"
         )
+        self.portfolio.on_execution_event(event)
+        self.account_state.invalidate()
+        self.risk_manager.on_execution_event(event)
         self._process_execution_or_pending_events(event)
 
     def _handle_pending_order_event(self, event: PlacePendingOrderEvent) -> None:
@@ -115,6 +157,43 @@ class TradingDirector:
         )
         self._process_execution_or_pending_events(event)
 
+    def _handle_order_rejected_event(self, event: OrderRejectedEvent) -> None:
+        """
+        Handle the rejection of a trade request by the broker
+        """
+        print(
+            f"[{Utils.dateprint()}] - Received ORDER REJECTED EVENT for {event.signal or 'CLOSE/CANCEL'} on {event.symbol} with volume {event.volume}: {event.comment}"
+        )
+        # The local position book and account state may not reflect the broker anymore
+        self.portfolio.request_reconciliation()
+        self.account_state.invalidate()
+        self.notifications.send_notification(
+            title=f"{event.symbol} - ORDER REJECTED",
+            message=f"Order {event.signal or 'CLOSE/CANCEL'} on {event.symbol} with volume {event.volume} rejected: {event.comment}",
+        )
+
+    def _handle_pending_order_update_event(
+        self, event: PendingOrderUpdateEvent
+    ) -> None:
+        """
+        Handle a change in the state of a pending order
+        """
+        print(
+            f"[{Utils.dateprint()}] - Received PENDING ORDER UPDATE EVENT: {event.signal} {event.target_order} {event.ticket} on {event.symbol} at price {event.target_price} {event.previous_state} -> {event.state} ({event.volume_filled} of {event.volume_initial} filled)"
+        )
+        # Fills open positions that the position book does not know yet
+        if event.state in (
+            PendingOrderState.FILLED,
+            PendingOrderState.PARTIALLY_FILLED,
+        ):
+            self.portfolio.request_reconciliation()
+            self.account_state.invalidate()
+
+        self.notifications.send_notification(
+            title=f"{event.symbol} PENDING ORDER {event.state}",
+            message=f"PENDING ORDER {event.signal} {event.target_order} on {event.symbol} at price {event.target_price} {event.state} ({event.volume_filled} of {event.volume_initial} filled)",
+        )
+
     def _process_execution_or_pending_events(
         self, event: Union[ExecutionEvent, PlacePendingOrderEvent]
     ) -> None:
@@ -160,7 +239,13 @@ class TradingDirector:
             try:
                 event = self.events_queue.get(block=False)
             except queue.Empty:
-                self.data_provider.check_for_new_data()
+                # Configuration changes are applied between events
+                self.config_manager.check_for_changes()
+
+                # The terminal is not polled while the link is down
+                if self.connection_supervisor.check():
+                    self.data_provider.check_for_new_data()
+                    self.order_executor.pending_orders.poll()
             else:
                 if event is not None:
                     handler = self.event_handler.get(
@@ -172,4 +257,9 @@ class TradingDirector:
 
             time.sleep(0.01)
 
+        self.order_executor.shutdown()
+        print(self.account_state.report())
+        print(self.order_executor.analytics.report())
+        print(self.connection_supervisor.report())
+        self.notifications.shutdown()
         print("END")
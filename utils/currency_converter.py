@@ -0,0 +1,193 @@
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple, Union
+
+import numpy as np
+import MetaTrader5 as mt5
+
+# A conversion step: (symbol, True if the amount is in the base currency of symbol)
+ConversionStep = Tuple[str, bool]
+CurrencyPair = Tuple[str, str]
+
+
+class CurrencyConverter:
+    """
+    Converts amounts between currencies through the graph formed by the broker
+    symbols (base currency <-> profit currency). The shortest path between every
+    pair of currencies is computed once, and the rate of every pair already used
+    is kept up to date as the quotes of its symbols are refreshed
+    """
+
+    def __init__(self, symbols_info: Iterable[Any], max_rate_age: float = 60.0) -> None:
+        self.max_rate_age = max_rate_age
+
+        # Graph of currencies: currency -> {neighbour currency: conversion step}
+        self._graph: Dict[str, Dict[str, ConversionStep]] = {}
+        for symbol_info in symbols_info:
+            self._add_edge(symbol_info)
+
+        # Shortest conversion path between every pair of connected currencies
+        self._paths: Dict[CurrencyPair, List[ConversionStep]] = {}
+        for currency in self._graph:
+            self._compute_paths_from(currency)
+
+        # Last bid of every symbol used in a path and the time it was seen
+        self._symbol_rates: Dict[str, float] = {}
+        self._symbol_rate_times: Dict[str, float] = {}
+
+        # Cache of the rates of the pairs already requested (rate, expiry time)
+        self._pair_rates: Dict[CurrencyPair, Tuple[float, float]] = {}
+        self._pairs_by_symbol: Dict[str, Set[CurrencyPair]] = {}
+
+    @property
+    def currencies(self) -> List[str]:
+        return list(self._graph)
+
+    def _add_edge(self, symbol_info: Any) -> None:
+        base = symbol_info.currency_base
+        profit = symbol_info.currency_profit
+        if not base or not profit or base == profit:
+            return
+
+        # Keep a single symbol per pair of currencies, preferring the visible ones
+        current = self._graph.get(base, {}).get(profit)
+        if current is not None and not symbol_info.visible:
+            return
+
+        self._graph.setdefault(base, {})[profit] = (symbol_info.name, True)
+        self._graph.setdefault(profit, {})[base] = (symbol_info.name, False)
+
+    def _compute_paths_from(self, origin: str) -> None:
+        """
+        Breadth-first search of the shortest path from origin to every currency
+        """
+        paths: Dict[str, List[ConversionStep]] = {origin: []}
+        pending = deque([origin])
+        while pending:
+            currency = pending.popleft()
+            for neighbour, step in self._graph[currency].items():
+                if neighbour not in paths:
+                    paths[neighbour] = paths[currency] + [step]
+                    pending.append(neighbour)
+
+        for destination, path in paths.items():
+            if destination != origin:
+                self._paths[(origin, destination)] = path
+
+    def get_path(self, from_currency: str, to_currency: str) -> List[ConversionStep]:
+        return list(self._paths.get((from_currency.upper(), to_currency.upper()), []))
+
+    def update_rate(self, symbol: str, bid: float) -> None:
+        """
+        Refreshes the rate of symbol (if it is used by any conversion) and
+        the rates of the pairs already requested that go through it
+        """
+        if symbol not in self._pairs_by_symbol or bid <= 0:
+            return
+
+        self._symbol_rates[symbol] = bid
+        self._symbol_rate_times[symbol] = time.monotonic()
+        for pair in self._pairs_by_symbol[symbol]:
+            if pair in self._pair_rates:
+                self._pair_rates[pair] = self._compute_pair_rate(pair)
+
+    def _fetch_symbol_rate(self, symbol: str) -> None:
+        tick = mt5.symbol_info_tick(symbol)  # type: ignore
+        if tick is None or tick.bid <= 0:  # type: ignore
+            raise ValueError(
+                f"Unable to retrieve the tick for {symbol}. MT5 error: {mt5.last_error()}"  # type: ignore
+            )
+        self._symbol_rates[symbol] = tick.bid  # type: ignore
+        self._symbol_rate_times[symbol] = time.monotonic()
+
+    def _compute_pair_rate(self, pair: CurrencyPair) -> Tuple[float, float]:
+        """
+        Returns the rate of pair and the time until it is valid
+        """
+        rate = 1.0
+        oldest_rate_time = float("inf")
+        for symbol, from_base in self._paths[pair]:
+            symbol_rate = self._symbol_rates[symbol]
+            rate = rate * symbol_rate if from_base else rate / symbol_rate
+            oldest_rate_time = min(oldest_rate_time, self._symbol_rate_times[symbol])
+
+        return rate, oldest_rate_time + self.max_rate_age
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """
+        Amount of to_currency worth one unit of from_currency (uppercase ISO codes)
+
+        Raises:
+            ValueError: if there is no conversion path or its quotes are not available
+        """
+        if from_currency == to_currency:
+            return 1.0
+
+        pair = (from_currency, to_currency)
+        cached = self._pair_rates.get(pair)
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[0]
+
+        return self._refresh_pair_rate(pair)
+
+    def _refresh_pair_rate(self, pair: CurrencyPair) -> float:
+        path = self._paths.get(pair)
+        if path is None:
+            raise ValueError(f"There is no conversion path from {pair[0]} to {pair[1]}")
+
+        # Fetch the quotes never seen or too old
+        now = time.monotonic()
+        for symbol, _ in path:
+            self._pairs_by_symbol.setdefault(symbol, set()).add(pair)
+            if now - self._symbol_rate_times.get(symbol, -np.inf) > self.max_rate_age:
+                self._fetch_symbol_rate(symbol)
+
+        self._pair_rates[pair] = self._compute_pair_rate(pair)
+        return self._pair_rates[pair][0]
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> float:
+        return amount * self.rate(from_currency, to_currency)
+
+    def rates(
+        self,
+        from_currencies: Sequence[str],
+        to_currency: str,
+        default: Union[float, None] = None,
+    ) -> np.ndarray:
+        """
+        Rates to to_currency of every currency in from_currencies. If default is
+        given, it is used for the currencies that cannot be converted instead
+        of raising ValueError
+        """
+        if default is None:
+            return np.fromiter(
+                (self.rate(currency, to_currency) for currency in from_currencies),
+                dtype=np.float64,
+                count=len(from_currencies),
+            )
+
+        rates = np.full(len(from_currencies), default, dtype=np.float64)
+        for index, currency in enumerate(from_currencies):
+            try:
+                rates[index] = self.rate(currency, to_currency)
+            except ValueError:
+                pass
+        return rates
+
+    def convert_array(
+        self,
+        amounts: np.ndarray,
+        from_currencies: Union[str, Sequence[str]],
+        to_currency: str,
+    ) -> np.ndarray:
+        """
+        Converts an array of amounts, all in the same currency or each one in
+        the currency at the same position of from_currencies
+        """
+        if isinstance(from_currencies, str):
+            return np.asarray(amounts, dtype=np.float64) * self.rate(
+                from_currencies, to_currency
+            )
+        return np.asarray(amounts, dtype=np.float64) * self.rates(
+            from_currencies, to_currency
+        )
@@ -0,0 +1,44 @@
+from typing import Any, Tuple
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity buffer of records backed by a numpy structured array.
+    Once full, every new record overwrites the oldest one
+    """
+
+    def __init__(self, dtype: Any, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError(f"ERROR: The capacity {capacity} must be greater than 0")
+
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def dtype(self) -> np.dtype:  # type: ignore
+        return self._data.dtype
+
+    def append(self, record: Tuple[Any, ...]) -> None:
+        self._data[self._next] = record
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def last(self) -> Any:
+        if self._size == 0:
+            return None
+        return self._data[self._next - 1]
+
+    def to_array(self) -> np.ndarray:
+        """
+        Returns a copy of the records, from the oldest to the newest
+        """
+        if self._size < self.capacity:
+            return self._data[: self._size].copy()
+        return np.concatenate((self._data[self._next :], self._data[: self._next]))
@@ -1,92 +1,50 @@
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from decimal import Decimal
+from typing import Union
 import MetaTrader5 as mt5
 
+from utils.currency_converter import CurrencyConverter
+
 
 # Create a static method to convert currencies between each other
 class Utils:
+    # Currency converter shared by the whole framework (built on first use)
+    _currency_converter: Union[CurrencyConverter, None] = None
+
     def __init__(self):
         pass
 
+    @staticmethod
+    def set_currency_converter(converter: CurrencyConverter) -> None:
+        Utils._currency_converter = converter
+
+    @staticmethod
+    def get_currency_converter() -> CurrencyConverter:
+        if Utils._currency_converter is None:
+            symbols_info = mt5.symbols_get()  # type: ignore
+            Utils._currency_converter = CurrencyConverter(symbols_info or ())  # type: ignore
+        return Utils._currency_converter
+
     # Static method using @staticmethod decorator
     @staticmethod
     def convert_currency_amount_to_another_currency(
         amount: Decimal, from_currency: str, to_currency: str
     ) -> Decimal:
-        all_fx_symbol = (
-            "AUDCAD",
-            "AUDCHF",
-            "AUDJPY",
-            "AUDNZD",
-            "AUDUSD",
-            "CADCHF",
-            "CADJPY",
-            "CHFJPY",
-            "EURAUD",
-            "EURCAD",
-            "EURCHF",
-            "EURGBP",
-            "EURJPY",
-            "EURNZD",
-            "EURUSD",
-            "EURSEK",
-            "EURSGD",
-            "GBPAUD",
-            "GBPCAD",
-            "GBPCHF",
-            "GBPJPY",
-            "GBPNZD",
-            "GBPUSD",
-            "NZDCAD",
-            "NZDCHF",
-            "NZDJPY",
-            "NZDUSD",
-            "USDCAD",
-            "USDCHF",
-            "USDJPY",
-            "USDSEK",
-            "USDNOK",
-            "SGDUSD",
-            "SGDJPY",
-            "XTIUSD",
-            "SPA500",
-        )
-
         # Convert currecies to uppercase (just in case)
         from_ccy = from_currency.upper()
         to_ccy = to_currency.upper()
 
-        fx_symbol = [
-            symbol
-            for symbol in all_fx_symbol
-            if from_ccy in symbol and to_ccy in symbol
-        ][0]
-
-        fx_symbol_base = fx_symbol[:3]
-
-        # Retrieve the last data for the fx_symbol
         try:
-            tick = mt5.symbol_info_tick(fx_symbol)  # type: ignore
-
-            if tick is None:
-                raise ValueError(
-                    f"ERROR (Utils.convert_currency): Unable to retrieve the tick for {fx_symbol}. Please check available broker symbols"
-                )
+            rate = Utils.get_currency_converter().rate(from_ccy, to_ccy)
         except ValueError as e:
             print(
-                f"ERROR (Utils.convert_currency): The latest tick from {fx_symbol} could not be retrieved. MT5 error: {mt5.last_error()}, Exception: {e}"  # type: ignore
-            )  # type: ignore
+                f"ERROR (Utils.convert_currency): Unable to convert {from_ccy} to {to_ccy}. Exception: {e}"
+            )
             return Decimal(0.0)
 
-        # Retrieve last available bid price for symbol
-        last_price = Decimal(tick.bid)  # type: ignore
-
         # Convert the amount from the origin currency to the target currency
-        converted_amount = (  # type: ignore
-            amount / last_price if fx_symbol_base == to_ccy else amount * last_price
-        )
-        return Decimal(converted_amount)  # type: ignore
+        return Decimal(amount) * Decimal(rate)  # type: ignore
 
     @staticmethod
     def dateprint() -> str: